@@ -0,0 +1,171 @@
+"""
+Summary:
+    Represents the A-G requirement engine of this backend framework, which computes the progress of students towards
+    the UC A-G subject requirements from their grades. Grades are evaluated as flat numpy arrays, one entry per grade,
+    so a whole school cohort is evaluated with a handful of array operations rather than a loop over every student.
+    A single student is evaluated the same way, as a cohort of one.
+"""
+import numpy as np
+
+from .grades import HONORS_BONUS, PASSING_GRADE
+from .models import Grade
+
+LETTERS = 'abcdefg'
+# The years of each A-G subject required by the UC, in the order of LETTERS
+REQUIRED_YEARS = np.array([2, 4, 3, 2, 2, 1, 1], dtype=np.float64)
+# The minimum A-G GPA (weighted for honors courses) of UC eligibility
+MIN_GPA = 3.0
+# Half-year courses earn half a year of credit, and every other course a full year
+HALF_YEAR_CREDIT = 0.5
+
+GRADE_FIELDS = ('ag_designation', 'course_length', 'value', 'is_honors')
+
+def get_course_credit(course_length):
+    """
+    Summary:
+        Returns the years of credit of a course from its length, such as "Half Year" (0.5) or "Full Year" (1).
+
+    Args:
+        course_length (string): The length of the course, which may be empty.
+
+    Returns:
+        float: The years of credit of the course.
+    """
+    return HALF_YEAR_CREDIT if 'half' in (course_length or '').lower() else 1.0
+
+def evaluate(students, letters, credits, values, honors, num_students):
+    """
+    Summary:
+        Evaluates the A-G progress of a cohort of students from their grades, given as arrays with one entry per
+        grade. Courses passed with a C or better earn their credit towards their letter, and credit beyond the
+        requirement of letters A to F counts towards G (the elective). The A-G GPA is averaged over every attempted
+        course, weighted by credit, with an extra grade point for passed honors courses.
+
+    Args:
+        students (array): The index of the student of each grade, from 0 to num_students - 1.
+        letters (array): The index of the A-G letter of each grade, from 0 to 6.
+        credits (array): The years of credit of the course of each grade.
+        values (array): The value of each grade, from 0 to 4.
+        honors (array): Whether the course of each grade is honors.
+        num_students (int): The number of students in the cohort.
+
+    Returns:
+        dict: Arrays of the credits earned ('credits', students by letters), credits still missing ('missing',
+              students by letters), A-G GPA ('gpa', NaN without grades), and eligibility ('eligible') of each student.
+    """
+    students = np.asarray(students, dtype=np.int64)
+    letters = np.asarray(letters, dtype=np.int64)
+    credits = np.asarray(credits, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    honors = np.asarray(honors, dtype=bool)
+    num_letters = len(LETTERS)
+
+    passed = values >= float(PASSING_GRADE)
+    cells = students * num_letters + letters
+    # Without any grades, bincount returns integers
+    earned = np.bincount(cells[passed], weights=credits[passed],
+                         minlength=num_students * num_letters).reshape(num_students, num_letters).astype(np.float64)
+    counted = earned.copy()
+    counted[:, -1] += np.maximum(earned[:, :-1] - REQUIRED_YEARS[:-1], 0).sum(axis=1)
+    missing = np.maximum(REQUIRED_YEARS - counted, 0)
+
+    weighted_values = values + float(HONORS_BONUS) * (honors & passed)
+    points = np.bincount(students, weights=weighted_values * credits, minlength=num_students)
+    attempted = np.bincount(students, weights=credits, minlength=num_students)
+    gpa = np.divide(points, attempted, out=np.full(num_students, np.nan), where=attempted > 0)
+    eligible = (missing.sum(axis=1) == 0) & (gpa >= MIN_GPA)
+    return {'credits': earned, 'missing': missing, 'gpa': gpa, 'eligible': eligible}
+
+def evaluate_rows(rows, num_students):
+    """
+    Summary:
+        Evaluates the A-G progress of a cohort of students from grade rows, skipping grades of courses without an A-G
+        designation.
+
+    Args:
+        rows (iterable): Tuples of the index of the student and the GRADE_FIELDS of each grade.
+        num_students (int): The number of students in the cohort.
+
+    Returns:
+        dict: The arrays returned by evaluate.
+    """
+    columns = ([], [], [], [], [])
+    for student, ag_designation, course_length, value, is_honors in rows:
+        letter = LETTERS.find((ag_designation or '').lower())
+        if not ag_designation or letter < 0:
+            continue
+        for column, item in zip(columns, (student, letter, get_course_credit(course_length), value, is_honors)):
+            column.append(item)
+    return evaluate(*columns, num_students)
+
+def get_progress(results, index):
+    """
+    Summary:
+        Returns the A-G progress of one student of an evaluated cohort.
+
+    Args:
+        results (dict): The arrays returned by evaluate.
+        index (int): The index of the student.
+
+    Returns:
+        dict: The credits earned, required, and missing for each letter, the A-G GPA, and eligibility of the student.
+    """
+    gpa = results['gpa'][index]
+    return {
+        'credits': dict(zip(LETTERS, results['credits'][index].tolist())),
+        'required': dict(zip(LETTERS, REQUIRED_YEARS.tolist())),
+        'missing': dict(zip(LETTERS, results['missing'][index].tolist())),
+        'gpa': None if np.isnan(gpa) else round(float(gpa), 2),
+        'eligible': bool(results['eligible'][index])
+    }
+
+def get_user_progress(user_id):
+    """
+    Summary:
+        Returns the A-G progress of a user from their grades.
+
+    Args:
+        user_id (string): The ID of the CustomUser.
+
+    Returns:
+        dict: The progress of the user (see get_progress).
+    """
+    rows = Grade.objects.filter(user_id=user_id).values_list(*GRADE_FIELDS)
+    return get_progress(evaluate_rows(((0,) + row for row in rows), 1), 0)
+
+def evaluate_users(user_ids):
+    """
+    Summary:
+        Evaluates the A-G progress of a cohort of users, reading all of their grades in a single query.
+
+    Args:
+        user_ids (list): The IDs of the users of the cohort.
+
+    Returns:
+        dict: The arrays returned by evaluate, indexed in the order of user_ids.
+    """
+    indexes = {str(user_id): index for index, user_id in enumerate(user_ids)}
+    rows = Grade.objects.filter(user_id__in=list(indexes)).values_list('user_id', *GRADE_FIELDS)
+    return evaluate_rows(((indexes[str(row[0])],) + row[1:] for row in rows.iterator()), len(user_ids))
+
+def get_cohort_progress(user_ids):
+    """
+    Summary:
+        Returns the A-G progress of a cohort of users, such as every student of a school.
+
+    Args:
+        user_ids (list): The IDs of the users of the cohort.
+
+    Returns:
+        dict: The number of students, how many are eligible, the mean credits missing for each letter, and the
+              progress of each student, by user ID.
+    """
+    results = evaluate_users(user_ids)
+    user_ids = [str(user_id) for user_id in user_ids]
+    return {
+        'students': len(user_ids),
+        'eligible': int(results['eligible'].sum()),
+        'mean_missing': dict(zip(LETTERS, (results['missing'].mean(axis=0) if user_ids else
+                                           np.zeros(len(LETTERS))).round(2).tolist())),
+        'progress': {user_id: get_progress(results, index) for index, user_id in enumerate(user_ids)}
+    }
@@ -0,0 +1,386 @@
+"""
+Summary:
+    Represents the asynchronous read-only endpoints of this backend framework, which are served when the project runs as
+    an ASGI application (see thevillagemethod/asgi.py). Listing or retrieving School and Course instances then waits on
+    Salesforce without holding a worker: every Salesforce read of a process goes through one HTTP/2 connection pool,
+    whose connections each carry many reads at once, so a single process can hold hundreds of reads in flight.
+    Responses are the same bytes as those of SchoolViewSet and CourseViewSet, and share their response cache. Every
+    other request (including the browsable API, requests without a valid token, IDs that are not found, requests that
+    SecurityMiddleware would redirect to https, and reads that fail) is passed on to Django, through a handler that
+    keeps every database query in a worker thread. Responses skip the rest of the Django middleware, so the headers of
+    the middleware listed in RESPONSE_MIDDLEWARE are added by running their process_response hooks.
+"""
+import asyncio
+import concurrent.futures
+import io
+import re
+
+import httpx
+import salesforce
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import DisallowedHost
+from django.core.handlers.asgi import ASGIHandler, ASGIRequest
+from django.db import close_old_connections, connections
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from django.utils.module_loading import import_string
+from salesforce.auth import SalesforceAuth
+
+from rest_framework.exceptions import AuthenticationFailed
+
+from .authentication import JWTClaimsAuthentication
+from .caching import get_cache_digest, get_response_cache_key
+from .models import School, Course
+from .renderers import render_json
+from .serializers import SchoolSerializer, CourseSerializer
+
+# The list and retrieve endpoints of schools and courses, for Salesforce IDs (which are alphanumeric) only
+ENDPOINT_RE = re.compile(r'^/api/(?P<table>schools|courses)/(?:(?P<pk>[A-Za-z0-9]{15}|[A-Za-z0-9]{18})/)?$')
+
+# The media ranges that the Django REST framework answers with its JSON renderer
+JSON_MEDIA_RANGES = {'*/*', 'application/*', 'application/json'}
+
+# The middleware whose headers are added to the responses served here, when they are in settings.MIDDLEWARE. The
+# others do not change these responses (the paths end with a slash, and no session or CSRF token is used)
+RESPONSE_MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware'
+]
+
+TABLES = {
+    'schools': (School, SchoolSerializer),
+    'courses': (Course, CourseSerializer)
+}
+
+def accepts_json(accept):
+    """
+    Summary:
+        Returns whether a request with the given Accept header would be answered with plain (unindented) JSON.
+
+    Args:
+        accept (string): The Accept header of the request, or None if it has none.
+
+    Returns:
+        bool: True if the response would be plain JSON, and False otherwise.
+    """
+    if not accept:
+        return True
+    for media_range in accept.split(','):
+        media_type, *params = [part.strip() for part in media_range.split(';')]
+        if media_type not in JSON_MEDIA_RANGES or any(not param.startswith('q=') for param in params):
+            return False
+    return True
+
+def get_soql(model, fields, pk=None):
+    """
+    Summary:
+        Returns the SOQL query that reads the given fields of every instance of a Salesforce model, or of one instance.
+
+    Args:
+        model (class): The Salesforce model to read.
+        fields (list): The names of the fields to read, in order.
+        pk (string, optional): The Salesforce ID of the instance to read, which must be alphanumeric. Defaults to None.
+
+    Returns:
+        string: The SOQL query.
+    """
+    columns = [model._meta.get_field(name).column for name in fields]
+    soql = 'SELECT ' + ', '.join(columns) + ' FROM ' + model._meta.db_table
+    if pk is not None:
+        soql += " WHERE Id = '" + pk + "'"
+    return soql
+
+def get_row(model, fields, record):
+    """
+    Summary:
+        Converts a record returned by the Salesforce REST API into the same row as queryset.values(*fields).
+
+    Args:
+        model (class): The Salesforce model of the record.
+        fields (list): The names of the fields to convert, in order.
+        record (dict): The record, keyed by column.
+
+    Returns:
+        dict: The row, keyed by field name.
+    """
+    row = {}
+    for name in fields:
+        field = model._meta.get_field(name)
+        value = record[field.column]
+        # Salesforce returns every number as a float, which to_python turns back into an int for integer fields
+        row[name] = None if value is None else field.to_python(value)
+    return row
+
+def _call_and_release(function, *args):
+    """
+    Summary:
+        Calls function and then releases the database connections of the thread it ran in, as Django does at the end of
+        every request.
+
+    Args:
+        function (function): The function to call, which may use the database.
+
+    Returns:
+        The result of function.
+    """
+    try:
+        return function(*args)
+    finally:
+        close_old_connections()
+
+def _get_header(scope, name):
+    for header_name, value in scope['headers']:
+        if header_name == name:
+            return value
+    return None
+
+class SalesforceClient:
+    """
+    Summary:
+        Represents the non-blocking Salesforce REST client of a process, which sends every read over a shared pool of
+        at most SALESFORCE_HTTP_CONNECTIONS HTTP/2 connections. It authenticates through django-salesforce, so it shares
+        the access token of the Salesforce database connection.
+
+    Args:
+        db_alias (string, optional): The alias of the Salesforce database. Defaults to 'salesforce'.
+    """
+
+    def __init__(self, db_alias='salesforce'):
+        settings_dict = settings.DATABASES[db_alias]
+        self.api_version = settings_dict.get('API_VERSION', salesforce.API_VERSION)
+        self.auth = SalesforceAuth.create_subclass_instance(db_alias=db_alias, settings_dict=settings_dict)
+        self.auth_data = None
+        limits = httpx.Limits(max_connections=settings.SALESFORCE_HTTP_CONNECTIONS,
+                              max_keepalive_connections=settings.SALESFORCE_HTTP_CONNECTIONS)
+        self.client = httpx.AsyncClient(http2=True, limits=limits, timeout=settings.SALESFORCE_HTTP_TIMEOUT)
+
+    async def get(self, url, params=None):
+        """
+        Summary:
+            Sends a GET request to the Salesforce instance, authenticating again once if the access token has expired.
+
+        Args:
+            url (string): The URL of the request, relative to the Salesforce instance.
+            params (dict, optional): The query parameters of the request. Defaults to None.
+
+        Returns:
+            The decoded JSON response.
+        """
+        for attempt in range(2):
+            if self.auth_data is None:
+                # Authentication is blocking, but only happens when the token is first needed or has expired
+                if attempt:
+                    await sync_to_async(self.auth.reauthenticate)()
+                self.auth_data = await sync_to_async(self.auth.get_auth)()
+            response = await self.client.get(self.auth_data['instance_url'] + url, params=params,
+                                             headers={'Authorization': 'OAuth ' + self.auth_data['access_token']})
+            if response.status_code != 401:
+                break
+            self.auth_data = None
+        response.raise_for_status()
+        return response.json()
+
+    async def query(self, soql):
+        """
+        Summary:
+            Runs a SOQL query, reading every page of its results.
+
+        Args:
+            soql (string): The query to run.
+
+        Returns:
+            list: The records returned by the query.
+        """
+        result = await self.get('/services/data/v' + self.api_version + '/query/', {'q': soql})
+        records = result['records']
+        while not result['done']:
+            result = await self.get(result['nextRecordsUrl'])
+            records.extend(result['records'])
+        return records
+
+    async def aclose(self):
+        await self.client.aclose()
+
+class ThreadedASGIHandler(ASGIHandler):
+    """
+    Summary:
+        Django's ASGI handler, changed so that database connections are only used from worker threads. Django 3.0
+        closes the connections of a request, and reads streaming responses (such as exports), in the event loop thread,
+        where the connections of the worker thread that handled the request are out of reach and queries are refused.
+    """
+
+    def get_response(self, request):
+        response = super().get_response(request)
+        # Streaming responses have not read anything yet, and read in their own thread (see send_response)
+        close_old_connections()
+        return response
+
+    async def send_response(self, response, send):
+        """
+        Summary:
+            Sends a response, reading every part of a streaming response in a thread of its own, since a database
+            cursor belongs to the thread that opened it.
+        """
+        if not response.streaming:
+            return await super().send_response(response, send)
+        headers = [(header.encode('ascii'), value.encode('latin1')) for header, value in response.items()]
+        headers += [(b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+                    for cookie in response.cookies.values()]
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+        loop = asyncio.get_event_loop()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            parts = iter(response)
+            try:
+                while True:
+                    part = await loop.run_in_executor(executor, next, parts, None)
+                    if part is None:
+                        break
+                    for chunk, last in self.chunk_bytes(part):
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            finally:
+                # The thread ends with the response, so its connections are closed rather than kept
+                await loop.run_in_executor(executor, connections.close_all)
+        await send({'type': 'http.response.body'})
+        response.close()
+
+class AsyncReadApplication:
+    """
+    Summary:
+        ASGI application that serves the list and retrieve endpoints of schools and courses asynchronously, and passes
+        every other request on to the Django application it wraps.
+
+    Args:
+        application (ASGIHandler): The Django ASGI application, such as a ThreadedASGIHandler.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.authentication = JWTClaimsAuthentication()
+        self.salesforce = None
+        # Applied in the reverse order of settings.MIDDLEWARE, as Django does
+        self.middleware = [import_string(path)() for path in reversed(settings.MIDDLEWARE)
+                           if path in RESPONSE_MIDDLEWARE]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        match = ENDPOINT_RE.match(scope['path']) if scope['type'] == 'http' and scope['method'] == 'GET' else None
+        if match is not None and not scope['query_string'] and \
+                accepts_json((_get_header(scope, b'accept') or b'').decode('latin-1')) and self.is_authenticated(scope):
+            request = ASGIRequest(scope, io.BytesIO())
+            if self.is_allowed(request) and await self.respond(request, send, match.group('table'), match.group('pk')):
+                return
+        await self.application(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        """
+        Summary:
+            Handles the startup and shutdown of the server, closing the Salesforce connections on shutdown.
+        """
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.salesforce is not None:
+                    await self.salesforce.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def is_authenticated(self, scope):
+        """
+        Summary:
+            Returns whether a request carries a valid access token. Tokens are checked from their claims alone, so no
+            database is needed (see authentication.py).
+        """
+        header = _get_header(scope, b'authorization')
+        try:
+            raw_token = header and self.authentication.get_raw_token(header)
+            if not raw_token:
+                return False
+            self.authentication.get_user(self.authentication.get_validated_token(raw_token))
+        except AuthenticationFailed:
+            return False
+        return True
+
+    def is_allowed(self, request):
+        """
+        Summary:
+            Returns whether a request can be served here: its host must be in ALLOWED_HOSTS, and no middleware (such as
+            SecurityMiddleware with SECURE_SSL_REDIRECT) may answer it before it reaches a view. Requests that are not
+            allowed are passed on to Django, which answers them as usual.
+        """
+        try:
+            request.get_host()
+        except DisallowedHost:
+            return False
+        return not any(hasattr(middleware, 'process_request') and middleware.process_request(request) is not None
+                       for middleware in reversed(self.middleware))
+
+    async def respond(self, request, send, table, pk):
+        """
+        Summary:
+            Responds to a list or retrieve request with a 304 Not Modified if the client's ETag is current, with the
+            cached response if there is one, or otherwise with the rows read from Salesforce, which are then cached.
+
+        Args:
+            request (ASGIRequest): The request.
+            send (function): Sends a message of the response.
+            table (string): Either 'schools' or 'courses'.
+            pk (string): The Salesforce ID of the instance to retrieve, or None to list every instance.
+
+        Returns:
+            bool: True if the request was answered, or False if it must be passed on to Django (such as when the
+                  instance to retrieve was not found, or Salesforce could not be read).
+        """
+        digest = await sync_to_async(_call_and_release)(get_cache_digest, 'application/json', request.path)
+        etag = '"' + digest + '"'
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+            await self.send_response(request, send, HttpResponseNotModified(), etag)
+            return True
+
+        cached = await sync_to_async(_call_and_release)(cache.get, get_response_cache_key(digest))
+        if cached is not None:
+            content_type, content = cached
+        else:
+            model, serializer_class = TABLES[table]
+            fields = serializer_class.Meta.fields
+            if self.salesforce is None:
+                # The client is created in the event loop that it is used in
+                self.salesforce = SalesforceClient()
+            try:
+                records = await self.salesforce.query(get_soql(model, fields, pk))
+            except httpx.HTTPError:
+                # Django reads Salesforce again, and reports the error as it does for any other request
+                return False
+            rows = [get_row(model, fields, record) for record in records]
+            if pk is not None and not rows:
+                return False
+            content_type, content = 'application/json', render_json(rows[0] if pk is not None else rows)
+            await sync_to_async(_call_and_release)(cache.set, get_response_cache_key(digest), (content_type, content),
+                                                   settings.API_CACHE_TIMEOUT)
+        await self.send_response(request, send, HttpResponse(content, content_type=content_type), etag)
+        return True
+
+    async def send_response(self, request, send, response, etag):
+        """
+        Summary:
+            Sends a response with the headers that CachedResponseMixin, the Django REST framework, and the
+            RESPONSE_MIDDLEWARE would have added.
+        """
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Accept'])
+        if response.status_code == 200:
+            response['Content-Length'] = str(len(response.content))
+        for middleware in self.middleware:
+            response = middleware.process_response(request, response)
+        headers = [(header.lower().encode('ascii'), value.encode('latin1')) for header, value in response.items()]
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': response.content})
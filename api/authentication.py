@@ -0,0 +1,48 @@
+"""
+Summary:
+    Represents the authentication classes of this backend framework. Access tokens carry the claims that the read-only
+    school and course endpoints need (see ClaimsTokenObtainPairSerializer), so their requests are authenticated from
+    the signed token alone, without loading the user from Postgres. Every other endpoint loads the user with the default
+    JWTAuthentication, since claims such as is_staff stay in a token for its whole lifetime.
+"""
+from django.utils.functional import cached_property
+
+from rest_framework_simplejwt.authentication import JWTTokenUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+class ClaimsTokenUser(TokenUser):
+    """
+    Summary:
+        Represents the user of an authenticated request, backed only by the claims of its access token. Tokens issued
+        before these claims were added are still accepted, with empty values for the missing claims.
+    """
+
+    @cached_property
+    def email(self):
+        return self.token.get('email', '')
+
+    @cached_property
+    def name(self):
+        return self.token.get('name', '')
+
+    @cached_property
+    def school(self):
+        return self.token.get('school', '')
+
+    def get_username(self):
+        return self.email
+
+class JWTClaimsAuthentication(JWTTokenUserAuthentication):
+    """
+    Summary:
+        Authenticates requests from the claims of their access token, without a database query. Since users are not
+        loaded, a user who is deactivated keeps access until their token expires, so this is only used by the read-only
+        school and course viewsets, which serve the same data to every user.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        return ClaimsTokenUser(validated_token)
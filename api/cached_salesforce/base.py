@@ -0,0 +1,106 @@
+"""
+Summary:
+    Represents the cached Salesforce database backend of this backend framework, which is the django-salesforce backend
+    with the rows of every SELECT query on a model listed in SALESFORCE_QUERY_CACHE_TIMEOUTS kept in the query cache
+    (see api/salesforce_cache.py), and with every insert, update, and delete invalidating the cached queries of the
+    object it writes.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db.models.sql import Query, subqueries
+from django.utils.asyncio import async_unsafe
+from salesforce.backend import base
+from salesforce.backend.utils import CursorWrapper
+from salesforce.dbapi.driver import arg_to_soql
+
+from api.salesforce_cache import count, get_query_cache, get_query_cache_key, get_query_timeout, invalidate_objects
+
+class CachingCursorWrapper(CursorWrapper):
+    """
+    Summary:
+        Represents a Salesforce cursor that serves repeated queries from the query cache. The rows of a query are only
+        cached once they have all been read, and queries returning more than SALESFORCE_QUERY_CACHE_MAX_ROWS rows (such
+        as streamed exports) are read as usual without being cached.
+    """
+
+    def __init__(self, db):
+        super().__init__(db)
+        self.cached_rows = None
+        self.cached_description = None
+
+    def execute(self, q, args=()):
+        self.cached_rows = None
+        self.cached_description = None
+        query = self.query
+        if isinstance(query, (subqueries.InsertQuery, subqueries.UpdateQuery, subqueries.DeleteQuery)):
+            try:
+                return super().execute(q, args)
+            finally:
+                # A write that failed part way may still have changed some records
+                invalidate_objects([query.model._meta.db_table])
+                count(query.model, 'invalidations')
+        timeout = get_query_timeout(query.model) if isinstance(query, Query) else None
+        if timeout is None or query.sf_params.query_all:
+            return super().execute(q, args)
+
+        soql = str(q) % tuple(arg_to_soql(arg) for arg in args)
+        tables = {query.model._meta.db_table} | {join.table_name for join in query.alias_map.values()}
+        key = get_query_cache_key(self.db.alias, soql, tables)
+        cached = get_query_cache().get(key)
+        if cached is not None:
+            count(query.model, 'hits')
+            self.rowcount, self.cached_description, rows = cached
+            self.cached_rows = iter(rows)
+            return
+        count(query.model, 'misses')
+        super().execute(q, args)
+        self.cached_rows = self._read_and_cache(key, timeout, query.model)
+
+    def _read_and_cache(self, key, timeout, model):
+        """
+        Summary:
+            Reads the rows of the query that was just executed, caching them once the last row has been read.
+        """
+        rows = []
+        for row in self.cursor:
+            if rows is not None:
+                rows.append(row)
+                if len(rows) > settings.SALESFORCE_QUERY_CACHE_MAX_ROWS:
+                    rows = None
+                    count(model, 'skipped')
+            yield row
+        if rows is not None:
+            get_query_cache().set(key, (self.rowcount, self.cursor.description, rows), timeout)
+
+    def __iter__(self):
+        return self.cached_rows if self.cached_rows is not None else super().__iter__()
+
+    def fetchone(self):
+        if self.cached_rows is None:
+            return super().fetchone()
+        return next(self.cached_rows, None)
+
+    def fetchmany(self, size=None):
+        if self.cached_rows is None:
+            return super().fetchmany(size)
+        return list(islice(self.cached_rows, size or self.cursor.arraysize))
+
+    def fetchall(self):
+        if self.cached_rows is None:
+            return super().fetchall()
+        return list(self.cached_rows)
+
+    @property
+    def description(self):
+        return self.cached_description if self.cached_description is not None else self.cursor.description
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Summary:
+        Represents the Salesforce database, with its queries served through the query cache.
+    """
+
+    @async_unsafe
+    def cursor(self):
+        return CachingCursorWrapper(self)
@@ -0,0 +1,141 @@
+"""
+Summary:
+    Represents the response cache shared by the read-only endpoints of this backend framework. School and course data
+    only changes when the scraper (or a sync) finishes, so each response is rendered once per version of the data and
+    served from the cache until the data version changes, with a strong ETag that lets clients revalidate for free.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, urlencode
+
+# The cache key of the current data version, which every cached response and ETag is derived from
+DATA_VERSION_KEY = 'api:data_version'
+
+def get_data_version():
+    """
+    Summary:
+        Returns the current data version, starting a new version if there is none (or it has expired).
+
+    Returns:
+        string: The current data version.
+    """
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        # Only one process can add the new version, and every other process uses the version it added
+        cache.add(DATA_VERSION_KEY, uuid.uuid4().hex, settings.API_CACHE_TIMEOUT)
+        version = cache.get(DATA_VERSION_KEY)
+    return version
+
+def invalidate_api_cache():
+    """
+    Summary:
+        Starts a new data version, which invalidates every cached response and ETag at once. Called whenever the
+        school and course data changes, such as through the invalidate_api_cache management command.
+
+    Returns:
+        string: The new data version.
+    """
+    version = uuid.uuid4().hex
+    cache.set(DATA_VERSION_KEY, version, settings.API_CACHE_TIMEOUT)
+    return version
+
+def get_cache_digest(media_type, path, query=''):
+    """
+    Summary:
+        Returns the digest identifying the response to a request under the current data version, which is used as both
+        its cache key and its ETag. Each media type (such as JSON or the browsable API) is cached separately.
+
+    Args:
+        media_type (string): The media type the response is rendered in.
+        path (string): The path of the request.
+        query (string, optional): The query string of the request, with its parameters sorted. Defaults to ''.
+
+    Returns:
+        string: The hexadecimal digest of the request.
+    """
+    key = get_data_version() + ':' + str(media_type) + ':' + path + '?' + query
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def get_response_cache_key(digest):
+    return 'api:response:' + digest
+
+class CachedResponseMixin:
+    """
+    Summary:
+        Mixin for read-only viewsets that caches the rendered response of every list and retrieve request, keyed on
+        the data version, the URL, and the query parameters. Responses carry a strong ETag derived from the same key, so
+        a client sending a matching If-None-Match header receives a 304 Not Modified without any data being read.
+    """
+
+    def _get_cache_digest(self, request):
+        """
+        Summary:
+            Returns the digest identifying the response to a request (see get_cache_digest). Query parameters are
+            sorted so that their order does not matter.
+
+        Args:
+            request (Request): The request being handled.
+
+        Returns:
+            string: The hexadecimal digest of the request.
+        """
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        return get_cache_digest(request.accepted_media_type, request.path, query)
+
+    def _get_cached_response(self, request, handler, *args, **kwargs):
+        """
+        Summary:
+            Responds to a request with a 304 Not Modified if the client's ETag is current, with the cached response if
+            there is one, or otherwise with the response of handler, which is cached once it is rendered.
+
+        Args:
+            request (Request): The request being handled.
+            handler (function): The list or retrieve method of the viewset.
+
+        Returns:
+            HttpResponse: The response to the request.
+        """
+        digest = self._get_cache_digest(request)
+        etag = '"' + digest + '"'
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+            response = HttpResponseNotModified()
+        else:
+            cached = cache.get(get_response_cache_key(digest))
+            if cached is not None:
+                content_type, content = cached
+                response = HttpResponse(content, content_type=content_type)
+            else:
+                response = handler(request, *args, **kwargs)
+                # The response is only cached once it has been rendered (see finalize_response)
+                response.cache_digest = digest
+        response['ETag'] = etag
+        # Clients may keep responses, but must revalidate them with their ETag before every use
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._get_cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._get_cached_response(request, super().retrieve, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """
+        Summary:
+            Renders and caches any successful response that was not already served from the cache.
+        """
+        response = super().finalize_response(request, response, *args, **kwargs)
+        digest = getattr(response, 'cache_digest', None)
+        if digest and response.status_code == 200:
+            # Responses rendered ahead of time (see renderers.py) are plain HttpResponse instances
+            if hasattr(response, 'render'):
+                response.render()
+            cache.set(get_response_cache_key(digest), (response['Content-Type'], response.content),
+                      settings.API_CACHE_TIMEOUT)
+        return response
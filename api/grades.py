@@ -0,0 +1,133 @@
+"""
+Summary:
+    Represents the grade writes of this backend framework. A whole transcript is written in one transaction with a
+    single bulk insert and a single bulk update, and the UserStatistics row of the user is updated in the same
+    transaction by adding the contribution of every new or changed grade and subtracting that of every replaced or
+    deleted grade, so that it never has to be recomputed from all of their grades.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import Grade, UserStatistics
+
+# A-G courses completed with at least this grade (a C) count towards the A-G requirements
+PASSING_GRADE = Decimal('2.00')
+# Passed honors courses are weighted by an extra grade point
+HONORS_BONUS = Decimal('1.00')
+AG_DESIGNATIONS = 'abcdefg'
+GPA_PRECISION = Decimal('0.01')
+
+def get_contribution(grade):
+    """
+    Summary:
+        Returns what a grade adds to the statistics of its user.
+
+    Args:
+        grade (Grade): The grade.
+
+    Returns:
+        dict: The amount added to each field of UserStatistics.
+    """
+    value = Decimal(grade.value)
+    passed = value >= PASSING_GRADE
+    contribution = {
+        'grade_count': 1,
+        'grade_points': value,
+        'weighted_grade_points': value + HONORS_BONUS if grade.is_honors and passed else value
+    }
+    designation = (grade.ag_designation or '').lower()
+    if passed and designation and designation in AG_DESIGNATIONS:
+        contribution[designation + '_completed'] = 1
+    return contribution
+
+def _apply(statistics, grade, sign):
+    for field, amount in get_contribution(grade).items():
+        setattr(statistics, field, getattr(statistics, field) + sign * amount)
+
+def _update_gpas(statistics):
+    if statistics.grade_count:
+        statistics.unweighted_gpa = (statistics.grade_points / statistics.grade_count).quantize(GPA_PRECISION)
+        statistics.weighted_gpa = (statistics.weighted_grade_points / statistics.grade_count).quantize(GPA_PRECISION)
+    else:
+        statistics.unweighted_gpa = statistics.weighted_gpa = None
+
+def _lock_statistics(user_id):
+    # Locking the row serializes concurrent writes of the same user, which would otherwise lose each other's updates
+    statistics, created = UserStatistics.objects.select_for_update().get_or_create(user_id=user_id)
+    return statistics
+
+def save_transcript(user_id, rows):
+    """
+    Summary:
+        Creates or updates the grades of a user in bulk, one grade per course, and updates their statistics.
+
+    Args:
+        user_id (string): The ID of the CustomUser.
+        rows (list): The grades, as dicts with a course, value, ag_designation, is_honors, and course_length.
+
+    Returns:
+        list: The saved Grade instances, in the order of rows.
+    """
+    with transaction.atomic():
+        statistics = _lock_statistics(user_id)
+        existing = {grade.course: grade for grade in Grade.objects.filter(user_id=user_id,
+                                                                          course__in=[row['course'] for row in rows])}
+        created, updated, grades = [], [], []
+        for row in rows:
+            grade = existing.get(row['course'])
+            if grade is None:
+                grade = Grade(user_id=user_id, **row)
+                created.append(grade)
+            else:
+                _apply(statistics, grade, -1)
+                for field, value in row.items():
+                    setattr(grade, field, value)
+                updated.append(grade)
+            _apply(statistics, grade, 1)
+            grades.append(grade)
+        Grade.objects.bulk_create(created)
+        Grade.objects.bulk_update(updated, ['value', 'ag_designation', 'is_honors', 'course_length'])
+        _update_gpas(statistics)
+        statistics.save()
+    return grades
+
+def delete_grades(user_id, grades):
+    """
+    Summary:
+        Deletes grades of a user and updates their statistics.
+
+    Args:
+        user_id (string): The ID of the CustomUser.
+        grades (list): The Grade instances to delete.
+    """
+    with transaction.atomic():
+        statistics = _lock_statistics(user_id)
+        # Only grades that still exist are subtracted, in case another request deleted them first
+        grades = list(Grade.objects.filter(user_id=user_id, pk__in=[grade.pk for grade in grades]))
+        for grade in grades:
+            _apply(statistics, grade, -1)
+        Grade.objects.filter(pk__in=[grade.pk for grade in grades]).delete()
+        _update_gpas(statistics)
+        statistics.save()
+
+def rebuild_statistics(user_id):
+    """
+    Summary:
+        Recomputes the statistics of a user from all of their grades, such as after grades were changed without going
+        through this module.
+
+    Args:
+        user_id (string): The ID of the CustomUser.
+
+    Returns:
+        UserStatistics: The rebuilt statistics.
+    """
+    with transaction.atomic():
+        _lock_statistics(user_id)
+        statistics = UserStatistics(user_id=user_id)
+        for grade in Grade.objects.filter(user_id=user_id):
+            _apply(statistics, grade, 1)
+        _update_gpas(statistics)
+        statistics.save()
+    return statistics
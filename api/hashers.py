@@ -0,0 +1,84 @@
+"""
+Summary:
+    Represents the password hashers of this backend framework. Hashing a password is deliberately expensive, so every
+    hash (on signup, on login, and when a legacy hash is upgraded) runs in a single thread pool per process, bounded to
+    PASSWORD_HASHING_WORKERS threads. A spike of signups or logins then queues for the pool rather than running
+    unboundedly many hashes at once and starving every other request of CPU.
+"""
+import concurrent.futures
+import threading
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+_pool = None
+_pool_lock = threading.Lock()
+# Marks the threads of the pool, which must hash inline rather than wait on the pool they belong to
+_pool_local = threading.local()
+
+def get_hashing_pool():
+    """
+    Summary:
+        Returns the thread pool that runs every password hash of this process, creating it if necessary.
+
+    Returns:
+        ThreadPoolExecutor: The password hashing pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = concurrent.futures.ThreadPoolExecutor(max_workers=settings.PASSWORD_HASHING_WORKERS,
+                                                          thread_name_prefix='password-hashing')
+    return _pool
+
+def _run_in_pool(function, *args):
+    """
+    Summary:
+        Calls function in the password hashing pool and waits for its result. Calls made from a thread of the pool
+        (such as PBKDF2PasswordHasher.verify calling encode) run inline, so that the pool never waits on itself.
+
+    Args:
+        function (function): The hashing function to call.
+
+    Returns:
+        The result of function.
+    """
+    if getattr(_pool_local, 'in_pool', False):
+        return function(*args)
+
+    def run():
+        _pool_local.in_pool = True
+        try:
+            return function(*args)
+        finally:
+            _pool_local.in_pool = False
+
+    return get_hashing_pool().submit(run).result()
+
+class BoundedHasherMixin:
+    """
+    Summary:
+        Mixin for password hashers that runs encode and verify in the password hashing pool. Both the Argon2 library
+        and hashlib release the GIL while hashing, so hashes in the pool run in parallel with each other and with the
+        threads serving other requests.
+    """
+
+    def encode(self, password, salt, *args):
+        return _run_in_pool(super().encode, password, salt, *args)
+
+    def verify(self, password, encoded):
+        return _run_in_pool(super().verify, password, encoded)
+
+class BoundedArgon2PasswordHasher(BoundedHasherMixin, Argon2PasswordHasher):
+    """
+    Summary:
+        Argon2 password hasher that runs in the password hashing pool.
+    """
+    pass
+
+class BoundedPBKDF2PasswordHasher(BoundedHasherMixin, PBKDF2PasswordHasher):
+    """
+    Summary:
+        PBKDF2 password hasher that runs in the password hashing pool.
+    """
+    pass
@@ -0,0 +1,103 @@
+"""
+Summary:
+    Management command that compares evaluating the A-G progress of a cohort of synthetic students with numpy arrays
+    (see api/ag_progress.py) against evaluating each student in a plain Python loop, and checks that both produce the
+    same results. Grades are generated locally, so no database is needed.
+"""
+import json
+import random
+import time
+
+import numpy as np
+
+from django.core.management.base import BaseCommand
+
+from api.ag_progress import LETTERS, MIN_GPA, REQUIRED_YEARS, evaluate
+from api.grades import HONORS_BONUS, PASSING_GRADE
+
+def _create_grades(num_students, grades_per_student):
+    """
+    Summary:
+        Generates the grades of num_students students as the arrays taken by evaluate.
+
+    Returns:
+        tuple: The student, letter index, credit, value, and honors flag of each grade.
+    """
+    generator = np.random.default_rng(0)
+    size = num_students * grades_per_student
+    students = np.repeat(np.arange(num_students), grades_per_student)
+    letters = generator.choice(len(LETTERS), size=size, p=[0.15, 0.25, 0.2, 0.15, 0.12, 0.08, 0.05])
+    credits = np.where(generator.random(size) < 0.2, 0.5, 1.0)
+    values = generator.choice([0.0, 1.0, 2.0, 3.0, 4.0], size=size, p=[0.03, 0.05, 0.17, 0.35, 0.4])
+    honors = generator.choice([False, True], size=size, p=[0.85, 0.15])
+    return (students, letters, credits, values, honors)
+
+def _evaluate_loop(students, letters, credits, values, honors, num_students):
+    """
+    Summary:
+        Evaluates the same progress as evaluate, one student at a time in plain Python.
+
+    Returns:
+        list: The credits earned, credits missing, A-G GPA, and eligibility of each student.
+    """
+    grades = [[] for i in range(num_students)]
+    for grade in zip(students.tolist(), letters.tolist(), credits.tolist(), values.tolist(), honors.tolist()):
+        grades[grade[0]].append(grade[1:])
+    required = REQUIRED_YEARS.tolist()
+    results = []
+    for student_grades in grades:
+        earned = [0.0] * len(LETTERS)
+        points = attempted = 0.0
+        for letter, credit, value, is_honors in student_grades:
+            passed = value >= float(PASSING_GRADE)
+            if passed:
+                earned[letter] += credit
+            points += (value + (float(HONORS_BONUS) if is_honors and passed else 0.0)) * credit
+            attempted += credit
+        counted = list(earned)
+        counted[-1] += sum(max(earned[i] - required[i], 0.0) for i in range(len(LETTERS) - 1))
+        missing = [max(required[i] - counted[i], 0.0) for i in range(len(LETTERS))]
+        gpa = points / attempted if attempted else float('nan')
+        results.append((earned, missing, gpa, sum(missing) == 0 and gpa >= MIN_GPA))
+    return results
+
+class Command(BaseCommand):
+    help = "Compares the array and loop evaluation of the A-G progress of a cohort of synthetic students."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=100000, help="number of students in the cohort")
+        parser.add_argument('--grades', type=int, default=30, help="number of grades of each student")
+        parser.add_argument('--json', help="path of a JSON file to export the results to")
+
+    def handle(self, *args, **options):
+        num_students = options['students']
+        grades = _create_grades(num_students, options['grades'])
+
+        start_time = time.perf_counter()
+        results = evaluate(*grades, num_students)
+        array_seconds = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        loop_results = _evaluate_loop(*grades, num_students)
+        loop_seconds = time.perf_counter() - start_time
+
+        # Both evaluations must agree on every student (sampled, to keep the check fast)
+        for index in random.Random(0).sample(range(num_students), min(num_students, 1000)):
+            earned, missing, gpa, eligible = loop_results[index]
+            if not (np.allclose(results['credits'][index], earned) and np.allclose(results['missing'][index], missing)
+                    and np.allclose(results['gpa'][index], gpa, equal_nan=True)
+                    and bool(results['eligible'][index]) == eligible):
+                raise AssertionError("The array evaluation of student " + str(index) + " differs from the loop")
+
+        eligible = int(results['eligible'].sum())
+        self.stdout.write("{} students, {} grades: arrays {:.4f}s, loop {:.4f}s ({:.1f}x faster), {} eligible".format(
+            num_students, len(grades[0]), array_seconds, loop_seconds, loop_seconds / array_seconds, eligible))
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump({
+                    'students': num_students,
+                    'grades': len(grades[0]),
+                    'array_seconds': round(array_seconds, 4),
+                    'loop_seconds': round(loop_seconds, 4),
+                    'speedup': round(loop_seconds / array_seconds, 1),
+                    'eligible': eligible
+                }, f, indent=2)
@@ -0,0 +1,86 @@
+"""
+Summary:
+    Management command that measures the course search index (see api/search.py): how long it takes to build, and the
+    latency of searches across every course and within a single school. Rows are generated locally, so no database is
+    needed.
+"""
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.search import CourseIndex
+from api.serializers import CourseSerializer
+
+SUBJECTS = ['Algebra', 'Geometry', 'Calculus', 'Statistics', 'Biology', 'Chemistry', 'Physics', 'English', 'Spanish',
+            'French', 'History', 'Government', 'Economics', 'Art', 'Music', 'Drama', 'Computer Science', 'Ceramics']
+QUALIFIERS = ['', ' 1', ' 2', ' 3', ' Honors', ' AP', ' IB', ' Intro to', ' Advanced', ' Literature', ' Lab']
+QUERIES = ['alg', 'algebra 1', 'geo', 'calc ab', 'bio', 'chem h', 'eng 2', 'spanish 3', 'us hist', 'ap', 'comp sci',
+           'physics lab', 'ma', 'art', 'econ']
+
+def _create_course_rows(num_rows, num_schools):
+    """
+    Summary:
+        Generates the values() rows of num_rows courses spread over num_schools schools, with names and transcript
+        abbreviations drawn from common subjects.
+
+    Returns:
+        list: The rows, with the fields of CourseSerializer.
+    """
+    generator = random.Random(0)
+    rows = []
+    for i in range(num_rows):
+        name = generator.choice(SUBJECTS) + generator.choice(QUALIFIERS)
+        row = dict.fromkeys(CourseSerializer.Meta.fields)
+        row.update({
+            'id': 'a0C' + str(i).zfill(15),
+            'name': name,
+            'school': 'a0B' + str(i % num_schools).zfill(15),
+            'transcript_abbs': name[:3].upper() + ' ' + str(i % 4 + 1) + ';' + name.upper()[:12]
+        })
+        rows.append(row)
+    return rows
+
+def _get_percentile(seconds, percentile):
+    return sorted(seconds)[min(len(seconds) - 1, int(len(seconds) * percentile / 100))]
+
+class Command(BaseCommand):
+    help = "Measures the build time of the course search index and the latency of searches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=200000, help="number of courses in the index")
+        parser.add_argument('--schools', type=int, default=2000, help="number of schools the courses belong to")
+        parser.add_argument('--searches', type=int, default=2000, help="number of searches of each kind")
+        parser.add_argument('--json', help="path of a JSON file to export the results to")
+
+    def handle(self, *args, **options):
+        rows = _create_course_rows(options['courses'], options['schools'])
+        start_time = time.perf_counter()
+        index = CourseIndex(rows)
+        build_seconds = time.perf_counter() - start_time
+        self.stdout.write("Built the index of {} courses in {:.2f}s".format(len(rows), build_seconds))
+        results = {'courses': options['courses'], 'schools': options['schools'],
+                   'build_seconds': round(build_seconds, 3)}
+
+        generator = random.Random(1)
+        for name, get_school in (('all', lambda: None),
+                                 ('school', lambda: 'a0B' + str(generator.randrange(options['schools'])).zfill(15))):
+            seconds = []
+            for i in range(options['searches']):
+                query, school = generator.choice(QUERIES), get_school()
+                start_time = time.perf_counter()
+                index.search(query, school)
+                seconds.append(time.perf_counter() - start_time)
+            results[name] = {
+                'p50_ms': round(statistics.median(seconds) * 1000, 3),
+                'p95_ms': round(_get_percentile(seconds, 95) * 1000, 3),
+                'max_ms': round(max(seconds) * 1000, 3)
+            }
+            self.stdout.write("{:>8}: p50 {p50_ms:.3f}ms, p95 {p95_ms:.3f}ms, max {max_ms:.3f}ms".format(
+                name, **results[name]))
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(results, f, indent=2)
@@ -0,0 +1,121 @@
+"""
+Summary:
+    Management command that compares rendering list responses through CourseSerializer and SchoolSerializer with
+    rendering the same rows straight from queryset.values() (see api/renderers.py), and checks that both produce the
+    same bytes. Rows are generated locally, so no database is needed.
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from rest_framework.renderers import JSONRenderer
+
+from api.models import School, Course
+from api.renderers import orjson, render_json
+from api.serializers import CourseSerializer, SchoolSerializer
+
+def _create_course_rows(num_rows):
+    """
+    Summary:
+        Generates the values() rows of num_rows courses, including characters that need escaping in JSON.
+
+    Args:
+        num_rows (int): The number of rows to generate.
+
+    Returns:
+        list: The rows, with the fields of CourseSerializer in order.
+    """
+    return [{
+        'id': 'a0C' + str(i).zfill(15),
+        'name': 'Algebra ' + str(i) + (' – Honors "H"' if i % 7 == 0 else ''),
+        'school': 'a0B' + str(i % 300).zfill(15),
+        'is_honors': i % 7 == 0,
+        'provider': 'Provided by the school' if i % 3 else 'UC Scout Online',
+        'academic_years': '2017-18;2018-19;2019-20',
+        'grade_levels': '9;10;11;12',
+        'course_length': 'Full year',
+        'transcript_abbs': 'ALG ' + str(i) + ';ALGEBRA\\' + str(i),
+        'subject': 'Mathematics',
+        'ag_designation': 'c',
+        'external_id': '75d5149b-fda1-53fc-9bf9-' + str(i).zfill(12)
+    } for i in range(num_rows)]
+
+def _create_school_rows(num_rows):
+    """
+    Summary:
+        Generates the values() rows of num_rows schools.
+
+    Args:
+        num_rows (int): The number of rows to generate.
+
+    Returns:
+        list: The rows, with the fields of SchoolSerializer in order.
+    """
+    return [{
+        'id': 'a0B' + str(i).zfill(15),
+        'name': 'Escuela Secundaria Número ' + str(i),
+        'institution_type': 'Public',
+        'school_id': str(100000 + i),
+        'city': 'San José',
+        'state': 'CA',
+        'website_id': 320 + i
+    } for i in range(num_rows)]
+
+def _time(function, repeat):
+    """
+    Summary:
+        Calls function repeat times, returning its last result and the fastest time taken.
+
+    Args:
+        function (function): The function to time.
+        repeat (int): The number of times to call function.
+
+    Returns:
+        tuple: The result of function, and the fastest time taken in seconds.
+    """
+    best_seconds = None
+    for i in range(repeat):
+        start_time = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start_time
+        best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+    return (result, best_seconds)
+
+class Command(BaseCommand):
+    help = "Compares the serializer and values() rendering paths for course and school list responses."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="number of rows in each list")
+        parser.add_argument('--repeat', type=int, default=5, help="number of times to render each list")
+        parser.add_argument('--json', help="path of a JSON file to export the results to")
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        results = {'rows': options['rows'], 'encoder': 'orjson' if orjson is not None else 'json'}
+        for name, model, serializer_class, rows in (
+                ('courses', Course, CourseSerializer, _create_course_rows(options['rows'])),
+                ('schools', School, SchoolSerializer, _create_school_rows(options['rows']))):
+            # The serializer path also pays for creating a model instance from every row
+            def render_serializer():
+                instances = [model(**{(key + '_id' if key == 'school' else key): value for key, value in row.items()})
+                             for row in rows]
+                return renderer.render(serializer_class(instances, many=True).data)
+
+            serializer_content, serializer_seconds = _time(render_serializer, options['repeat'])
+            values_content, values_seconds = _time(lambda: render_json(rows), options['repeat'])
+            if values_content != serializer_content:
+                raise AssertionError("The values() rendering of " + name + " differs from " +
+                                     serializer_class.__name__)
+            results[name] = {
+                'serializer_seconds': round(serializer_seconds, 4),
+                'values_seconds': round(values_seconds, 4),
+                'speedup': round(serializer_seconds / values_seconds, 1),
+                'bytes': len(values_content)
+            }
+            self.stdout.write("{:>8}: serializer {:.4f}s, values() {:.4f}s ({:.1f}x faster, identical {} bytes)".format(
+                name, serializer_seconds, values_seconds, serializer_seconds / values_seconds, len(values_content)))
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(results, f, indent=2)
@@ -0,0 +1,28 @@
+"""
+Summary:
+    Management command that invalidates every cached API response and Salesforce query, to be run whenever the school
+    and course data changes (such as after a scraper run or a staged load finishes). The course statistics of the
+    school summaries are refreshed at the same time, unless --skip-summaries is given.
+"""
+from django.core.management.base import BaseCommand
+
+from api.caching import invalidate_api_cache
+from api.salesforce_cache import invalidate_all_objects
+from api.summaries import refresh_course_summaries
+
+class Command(BaseCommand):
+    help = "Invalidates every cached API response and ETag by starting a new data version, and every cached query."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skip-summaries', action='store_true',
+                            help="do not refresh the course statistics of the school summaries")
+
+    def handle(self, *args, **options):
+        # The scraper writes to Salesforce directly, so the query cache never saw its writes
+        invalidate_all_objects()
+        if options['skip_summaries']:
+            version = invalidate_api_cache()
+        else:
+            # Starts the new data version once the statistics are refreshed, so no response caches the old ones
+            version = refresh_course_summaries(invalidate=True)
+        self.stdout.write(self.style.SUCCESS("Started data version " + version + "."))
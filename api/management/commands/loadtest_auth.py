@@ -0,0 +1,200 @@
+"""
+Summary:
+    Management command that measures the cost of authentication: how many passwords each configured hasher can hash
+    per second on one core, and, given the URL of a running server, how many logins (and optionally signups) per second
+    per core the server sustains under concurrent load, along with how saturated its database connection pool became.
+"""
+import concurrent.futures
+import json
+import os
+import threading
+import time
+import uuid
+from statistics import median
+
+import requests
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import UserAccount
+
+# The account used to log in during the load test, which is created (or reset) by this command
+LOADTEST_EMAIL = 'loadtest@thevillagemethod.invalid'
+LOADTEST_PASSWORD = 'loadtest-password'
+# The domain of the accounts created through the createuser endpoint, which are deleted once the load test ends
+LOADTEST_DOMAIN = '@thevillagemethod.invalid'
+
+def _percentile(values, percent):
+    """
+    Summary:
+        Returns the given percentile of a list of values, using the nearest rank.
+
+    Args:
+        values (list): The values, which must not be empty.
+        percent (float): The percentile, from 0 to 100.
+
+    Returns:
+        float: The value at the given percentile.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100.0))]
+
+class Command(BaseCommand):
+    help = "Benchmarks password hashing and, with --url, logins and signups per second per core on a running server."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help="base URL of a running server, such as http://127.0.0.1:8000")
+        parser.add_argument('--requests', type=int, default=200, help="number of logins to send")
+        parser.add_argument('--concurrency', type=int, default=8, help="number of logins in flight at once")
+        parser.add_argument('--server-cores', type=int, default=os.cpu_count(),
+                            help="number of CPU cores available to the server (defaults to the cores of this machine)")
+        parser.add_argument('--hashes', type=int, default=20, help="number of passwords to hash with each hasher")
+        parser.add_argument('--signups', type=int, default=0,
+                            help="number of accounts to create through the createuser endpoint (requires --school)")
+        parser.add_argument('--school', help="Salesforce ID of the school of the accounts created by --signups")
+        parser.add_argument('--stats-token',
+                            help="access token of a staff user, to report the connection pool of the server after each "
+                                 "load test (as seen by the worker process that answers)")
+        parser.add_argument('--json', help="path of a JSON file to export the results to")
+
+    def benchmark_hashers(self, num_hashes):
+        """
+        Summary:
+            Times num_hashes hashes with every configured password hasher, one at a time.
+
+        Args:
+            num_hashes (int): The number of passwords to hash with each hasher.
+
+        Returns:
+            dict: The milliseconds per hash and hashes per second on one core of each hasher, by algorithm.
+        """
+        results = {}
+        for hasher in get_hashers():
+            start_time = time.perf_counter()
+            for i in range(num_hashes):
+                hasher.encode(LOADTEST_PASSWORD, hasher.salt())
+            seconds = (time.perf_counter() - start_time) / num_hashes
+            results[hasher.algorithm] = {'ms_per_hash': round(seconds * 1000, 2),
+                                         'hashes_per_second_per_core': round(1 / seconds, 1)}
+            self.stdout.write("{:>15}: {:8.2f} ms per hash, {:8.1f} hashes per second per core".format(
+                hasher.algorithm, seconds * 1000, 1 / seconds))
+        return results
+
+    def send_requests(self, url, payload, num_requests, concurrency):
+        """
+        Summary:
+            Sends num_requests POST requests with the given JSON payload, concurrency at a time.
+
+        Args:
+            url (string): The URL to send the requests to.
+            payload (function): Returns the JSON payload of the request with the given index.
+            num_requests (int): The number of requests to send.
+            concurrency (int): The number of requests in flight at once.
+
+        Returns:
+            tuple: The latency of every successful request in seconds, the number of failed requests, and the total
+                   time taken in seconds.
+        """
+        local = threading.local()
+
+        def send(index):
+            session = getattr(local, 'session', None)
+            if session is None:
+                session = local.session = requests.Session()
+            start_time = time.perf_counter()
+            try:
+                response = session.post(url, json=payload(index), timeout=60)
+            except requests.RequestException:
+                return None
+            return time.perf_counter() - start_time if response.status_code < 300 else None
+
+        start_time = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(send, range(num_requests)))
+        seconds = time.perf_counter() - start_time
+        latencies = [latency for latency in results if latency is not None]
+        return (latencies, len(results) - len(latencies), seconds)
+
+    def get_pool_stats(self, base_url, token):
+        """
+        Summary:
+            Writes and returns the connection pool statistics reported by the database health endpoint of a server.
+
+        Args:
+            base_url (string): The base URL of the server.
+            token (string): The access token of a staff user.
+
+        Returns:
+            dict: The statistics of each connection pool, by database alias.
+        """
+        response = requests.get(base_url + '/api/health/db/', headers={'Authorization': 'Bearer ' + token}, timeout=10)
+        response.raise_for_status()
+        pools = response.json()['pools']
+        for alias, stats in pools.items():
+            self.stdout.write("  {} pool: {} of {} connections in use, {} waits ({} s in total, at most {} s), "
+                              "{} timeouts, {} failed health checks".format(
+                                  alias, stats['in_use'], stats['max_size'], stats['waits'], stats['wait_seconds'],
+                                  stats['max_wait_seconds'], stats['timeouts'], stats['failed_health_checks']))
+        return pools
+
+    def report(self, name, latencies, num_failed, seconds, server_cores):
+        """
+        Summary:
+            Writes and returns the throughput and latencies of a load test.
+
+        Returns:
+            dict: The results of the load test.
+        """
+        results = {
+            'requests_per_second': round(len(latencies) / seconds, 1),
+            'requests_per_second_per_core': round(len(latencies) / seconds / server_cores, 1),
+            'failed': num_failed
+        }
+        if latencies:
+            results['p50_ms'] = round(median(latencies) * 1000, 1)
+            results['p95_ms'] = round(_percentile(latencies, 95) * 1000, 1)
+        self.stdout.write("{}: {} per second ({} per second per core), p50 {} ms, p95 {} ms, {} failed".format(
+            name, results['requests_per_second'], results['requests_per_second_per_core'], results.get('p50_ms'),
+            results.get('p95_ms'), num_failed))
+        return results
+
+    def handle(self, *args, **options):
+        results = {'hashers': self.benchmark_hashers(options['hashes'])}
+        if options['signups'] and not options['school']:
+            raise CommandError("--signups requires --school, since every account is also created on Salesforce")
+        if options['url']:
+            base_url = options['url'].rstrip('/')
+            # The account is reset so that its password is hashed with the preferred hasher
+            User = get_user_model()
+            user = User.objects.filter(email=LOADTEST_EMAIL).first() or User(email=LOADTEST_EMAIL)
+            user.set_password(LOADTEST_PASSWORD)
+            user.save()
+
+            latencies, num_failed, seconds = self.send_requests(
+                base_url + '/api/token/',
+                lambda index: {'email': LOADTEST_EMAIL, 'password': LOADTEST_PASSWORD},
+                options['requests'], options['concurrency'])
+            results['token'] = self.report("Logins", latencies, num_failed, seconds, options['server_cores'])
+            if options['stats_token']:
+                results['token']['pools'] = self.get_pool_stats(base_url, options['stats_token'])
+
+            if options['signups']:
+                prefix = 'loadtest+' + uuid.uuid4().hex[:8] + '-'
+                try:
+                    latencies, num_failed, seconds = self.send_requests(
+                        base_url + '/api/createuser/',
+                        lambda index: {'email': prefix + str(index) + LOADTEST_DOMAIN, 'password': LOADTEST_PASSWORD,
+                                       'name': 'Load Test', 'school': options['school']},
+                        options['signups'], options['concurrency'])
+                finally:
+                    User.objects.filter(email__startswith=prefix).delete()
+                    UserAccount.objects.filter(email__startswith=prefix).delete()
+                results['createuser'] = self.report("Signups", latencies, num_failed, seconds, options['server_cores'])
+                if options['stats_token']:
+                    results['createuser']['pools'] = self.get_pool_stats(base_url, options['stats_token'])
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(results, f, indent=2)
@@ -0,0 +1,34 @@
+"""
+Summary:
+    Management command that refreshes the school summaries (see api/summaries.py), either once (such as from the Heroku
+    Scheduler) or every few seconds in a background process.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.summaries import refresh_school_summaries
+
+class Command(BaseCommand):
+    help = "Refreshes the school summaries whose students, grades, or courses have changed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="refresh every school, whether or not it changed")
+        parser.add_argument('--interval', type=int, default=0,
+                            help="keep refreshing every this many seconds, instead of refreshing once")
+
+    def handle(self, *args, **options):
+        full = options['full']
+        while True:
+            start_time = time.monotonic()
+            num_schools, courses_refreshed = refresh_school_summaries(full)
+            self.stdout.write(self.style.SUCCESS("Refreshed the students of {} schools{} in {:.2f}s.".format(
+                num_schools, " and the courses of every school" if courses_refreshed else "",
+                time.monotonic() - start_time)))
+            if not options['interval']:
+                break
+            # Only the first refresh of a background process is full
+            full = False
+            close_old_connections()
+            time.sleep(options['interval'])
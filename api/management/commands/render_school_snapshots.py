@@ -0,0 +1,70 @@
+"""
+Summary:
+    Management command that pre-renders the course list of every school (the response of /api/schoolcourses/<id>/) into
+    a static JSON file, which is then collected, compressed, and served by WhiteNoise. Files written at runtime never
+    reach other dynos, so in production this runs during the build (see bin/post_compile). The snapshots record the
+    data version they were rendered for, and stop being served once the data changes.
+"""
+import os
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from rest_framework.renderers import JSONRenderer
+
+from api.models import School, Course
+from api.salesforce_cache import invalidate_all_objects
+from api.serializers import CourseSerializer
+from api.summaries import refresh_course_summaries
+
+class Command(BaseCommand):
+    help = "Renders the course list of every school into a static JSON snapshot and collects the static files."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-collectstatic', action='store_true',
+                            help="Only render the snapshots, without running collectstatic afterwards.")
+
+    def write_snapshot(self, school_id, content):
+        """
+        Summary:
+            Writes the snapshot of a school, replacing any previous snapshot only once the new one is complete.
+
+        Args:
+            school_id (string): The Salesforce ID of the school.
+            content (bytes): The rendered course list of the school.
+        """
+        filepath = os.path.join(settings.SCHOOL_SNAPSHOTS_DIR, 'schoolcourses', school_id + '.json')
+        with open(filepath + '.tmp', 'wb') as f:
+            f.write(content)
+        os.replace(filepath + '.tmp', filepath)
+
+    def handle(self, *args, **options):
+        os.makedirs(os.path.join(settings.SCHOOL_SNAPSHOTS_DIR, 'schoolcourses'), exist_ok=True)
+        # Snapshots are rendered after the scraper writes to Salesforce, which the query cache never saw
+        invalidate_all_objects()
+        # Every course is read with a single query and grouped by school, rather than with one query per school
+        courses_by_school = defaultdict(list)
+        for course in Course.objects.all():
+            courses_by_school[course.school_id].append(course)
+
+        renderer = JSONRenderer()
+        school_ids = list(School.objects.values_list('id', flat=True))
+        for school_id in school_ids:
+            # Matches the output of SchoolCoursesSerializer
+            data = {'course_set': CourseSerializer(courses_by_school[school_id], many=True).data}
+            self.write_snapshot(school_id, renderer.render(data))
+        self.stdout.write("Rendered the course lists of " + str(len(school_ids)) + " schools.")
+        # The snapshots are served until the next data version, which cached responses rendered earlier do not share.
+        # The course statistics are refreshed for the same version, so the next refresh does not start another one
+        version = refresh_course_summaries(invalidate=True)
+        # Collected as snapshots/version.txt (see get_snapshot_version in views.py)
+        with open(os.path.join(settings.SCHOOL_SNAPSHOTS_DIR, 'version.txt'), 'w') as f:
+            f.write(version)
+
+        if not options['no_collectstatic']:
+            # The production storage writes a hashed, gzip and brotli compressed copy of every snapshot
+            call_command('collectstatic', interactive=False, verbosity=0)
+        self.stdout.write(self.style.SUCCESS("Rendered snapshots of data version " + version + " are served by web "
+                                             "processes started from this build."))
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.8 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_auto_20200729_0215'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='external_id',
+            field=models.CharField(blank=True, default='', max_length=36),
+        ),
+    ]
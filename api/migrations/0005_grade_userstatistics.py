@@ -0,0 +1,55 @@
+# Generated by Django 3.0.8 on 2026-10-19 04:00
+
+from decimal import Decimal
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0004_course_external_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Grade',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('course', models.CharField(max_length=18)),
+                ('value', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=3, validators=[django.core.validators.MinValueValidator(Decimal('0.00')), django.core.validators.MaxValueValidator(Decimal('4.00'))])),
+                ('ag_designation', models.CharField(blank=True, default='', max_length=1)),
+                ('is_honors', models.BooleanField(default=False)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grades', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'course')},
+            },
+        ),
+        migrations.CreateModel(
+            name='UserStatistics',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('grade_count', models.PositiveIntegerField(default=0)),
+                ('grade_points', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=8)),
+                ('weighted_grade_points', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=8)),
+                ('unweighted_gpa', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True)),
+                ('weighted_gpa', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True)),
+                ('a_completed', models.PositiveIntegerField(default=0)),
+                ('b_completed', models.PositiveIntegerField(default=0)),
+                ('c_completed', models.PositiveIntegerField(default=0)),
+                ('d_completed', models.PositiveIntegerField(default=0)),
+                ('e_completed', models.PositiveIntegerField(default=0)),
+                ('f_completed', models.PositiveIntegerField(default=0)),
+                ('g_completed', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'user statistics',
+            },
+        ),
+    ]
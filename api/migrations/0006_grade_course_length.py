@@ -0,0 +1,18 @@
+# Generated by Django 3.0.8 on 2026-10-19 06:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_grade_userstatistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grade',
+            name='course_length',
+            field=models.CharField(blank=True, default='', max_length=15),
+        ),
+    ]
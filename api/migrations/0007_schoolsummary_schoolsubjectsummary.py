@@ -0,0 +1,54 @@
+# Generated by Django 3.0.8 on 2026-10-19 08:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_grade_course_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchoolSummary',
+            fields=[
+                ('school', models.CharField(max_length=18, primary_key=True, serialize=False)),
+                ('student_count', models.PositiveIntegerField(default=0)),
+                ('graded_student_count', models.PositiveIntegerField(default=0)),
+                ('eligible_student_count', models.PositiveIntegerField(default=0)),
+                ('mean_gpa', models.FloatField(blank=True, null=True)),
+                ('a_completion', models.FloatField(default=0)),
+                ('b_completion', models.FloatField(default=0)),
+                ('c_completion', models.FloatField(default=0)),
+                ('d_completion', models.FloatField(default=0)),
+                ('e_completion', models.FloatField(default=0)),
+                ('f_completion', models.FloatField(default=0)),
+                ('g_completion', models.FloatField(default=0)),
+                ('grade_count', models.PositiveIntegerField(default=0)),
+                ('honors_grade_count', models.PositiveIntegerField(default=0)),
+                ('students_refreshed_at', models.DateTimeField(blank=True, null=True)),
+                ('course_count', models.PositiveIntegerField(default=0)),
+                ('honors_course_count', models.PositiveIntegerField(default=0)),
+                ('courses_version', models.CharField(blank=True, default='', max_length=64)),
+                ('courses_refreshed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'school summaries',
+            },
+        ),
+        migrations.CreateModel(
+            name='SchoolSubjectSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(blank=True, default='', max_length=50)),
+                ('course_count', models.PositiveIntegerField(default=0)),
+                ('honors_course_count', models.PositiveIntegerField(default=0)),
+                ('summary', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subjects', to='api.SchoolSummary')),
+            ],
+            options={
+                'unique_together': {('summary', 'subject')},
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.0.8 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_schoolsummary_schoolsubjectsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schoolsummary',
+            name='a_course_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='schoolsummary',
+            name='b_course_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='schoolsummary',
+            name='c_course_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='schoolsummary',
+            name='d_course_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='schoolsummary',
+            name='e_course_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='schoolsummary',
+            name='f_course_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='schoolsummary',
+            name='g_course_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='schoolsummary',
+            name='latest_academic_year',
+            field=models.CharField(blank=True, default='', max_length=7),
+        ),
+    ]
@@ -6,10 +6,10 @@ Summary:
 """
 import uuid
 import salesforce
-# TODO: Add the below dependency when ready to create the Grade model
-# from decimal import Decimal
+from decimal import Decimal
 
 from django.db import models
+from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import AbstractUser
 from django.contrib.postgres.fields import ArrayField
 from django.conf import settings
@@ -41,9 +41,8 @@ class CustomUser(AbstractUser):
     """ 
     Summary: 
         Model that represents a custom User for our system. This extends the AbstractUser class from
-        django.contrib.auth.models.
-
-    TODO: Link users to their statistics (GPA, Course completion stats, etc)
+        django.contrib.auth.models. The grades of a user are found through user.grades, and their GPA and A-G
+        completion through user.statistics (see UserStatistics).
     """
     # Utilizes a random UUID through the UUIDField from django.db.models
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -103,6 +102,8 @@ class Course(salesforce.models.SalesforceModel):
                                                   blank=True)
     subject = salesforce.models.CharField(default='', db_column='Subject__c', max_length=50, blank=True)
     ag_designation = models.CharField(default='', db_column='AG_Designation__c', max_length=1, blank=True)
+    # Deterministic ID issued by the scraper (see scraper/external_ids.py), used to upsert the course
+    external_id = salesforce.models.CharField(default='', db_column='External_ID__c', max_length=36, blank=True)
 
     def __str__(self):
         return self.name
@@ -110,19 +111,119 @@ class Course(salesforce.models.SalesforceModel):
     class Meta:
         db_table = "Course__c"
         
-"""
-TODO: Implement a Grade model, similar to this format, on Salesforce and link on Django through 
-      salesforce.models.SalesforceModel
-
 class Grade(models.Model):
+    """
+    Summary:
+        Model that represents the grade a CustomUser earned in a Course, on a 4.00 scale. Grades are kept in Postgres,
+        so the course is stored by its Salesforce ID, and its A-G designation, honors flag, and length are copied onto
+        the grade when it is written, so that statistics and A-G progress are computed without going back to
+        Salesforce (see api/grades.py and api/ag_progress.py).
+    """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    value = models.DecimalField(max_digits=3, decimal_places=2, default=Decimal(0.00))
-    course = models.ForeignKey(Course, on_delete=models.CASCADE)
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='grades')
+    # Salesforce ID of the Course, as a foreign key cannot span the Postgres and Salesforce databases
+    course = models.CharField(max_length=18)
+    value = models.DecimalField(max_digits=3, decimal_places=2, default=Decimal('0.00'),
+                                validators=[MinValueValidator(Decimal('0.00')), MaxValueValidator(Decimal('4.00'))])
+    ag_designation = models.CharField(default='', max_length=1, blank=True)
+    is_honors = models.BooleanField(default=False)
+    course_length = models.CharField(default='', max_length=15, blank=True)
 
     class Meta:
-        unique_together = ("course", "user")
+        unique_together = ("user", "course")
 
     def __str__(self):
-        return self.value
-"""
+        return str(self.value) + " (" + self.course + ")"
+
+class UserStatistics(models.Model):
+    """
+    Summary:
+        Model that represents the statistics of a CustomUser, kept up to date every time their grades are written
+        (see api/grades.py), so that progress dashboards read a single row instead of every grade. The grade point
+        totals are kept alongside the GPAs, so that each write only adds or subtracts the grades it changes.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True, on_delete=models.CASCADE,
+                                related_name='statistics')
+    grade_count = models.PositiveIntegerField(default=0)
+    grade_points = models.DecimalField(max_digits=8, decimal_places=2, default=Decimal('0.00'))
+    weighted_grade_points = models.DecimalField(max_digits=8, decimal_places=2, default=Decimal('0.00'))
+    unweighted_gpa = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
+    weighted_gpa = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
+    # The number of courses of each A-G subject completed with a C or better
+    a_completed = models.PositiveIntegerField(default=0)
+    b_completed = models.PositiveIntegerField(default=0)
+    c_completed = models.PositiveIntegerField(default=0)
+    d_completed = models.PositiveIntegerField(default=0)
+    e_completed = models.PositiveIntegerField(default=0)
+    f_completed = models.PositiveIntegerField(default=0)
+    g_completed = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "user statistics"
+
+    def __str__(self):
+        return "Statistics of " + str(self.user_id)
+
+class SchoolSummary(models.Model):
+    """
+    Summary:
+        Model that represents the precomputed statistics of a school, from the grades of its students in Postgres and
+        its courses in Salesforce, so that they are read as a single row (see api/summaries.py). The student and course
+        statistics are refreshed separately by the refresh_school_summaries management command, when they change.
+    """
+    # Salesforce ID of the School, as a foreign key cannot span the Postgres and Salesforce databases
+    school = models.CharField(max_length=18, primary_key=True)
+    student_count = models.PositiveIntegerField(default=0)
+    graded_student_count = models.PositiveIntegerField(default=0)
+    eligible_student_count = models.PositiveIntegerField(default=0)
+    mean_gpa = models.FloatField(null=True, blank=True)
+    # The mean share of each A-G requirement met by the students with grades, from 0 to 1
+    a_completion = models.FloatField(default=0)
+    b_completion = models.FloatField(default=0)
+    c_completion = models.FloatField(default=0)
+    d_completion = models.FloatField(default=0)
+    e_completion = models.FloatField(default=0)
+    f_completion = models.FloatField(default=0)
+    g_completion = models.FloatField(default=0)
+    grade_count = models.PositiveIntegerField(default=0)
+    honors_grade_count = models.PositiveIntegerField(default=0)
+    students_refreshed_at = models.DateTimeField(null=True, blank=True)
+    course_count = models.PositiveIntegerField(default=0)
+    honors_course_count = models.PositiveIntegerField(default=0)
+    # The number of courses the school offers with each A-G designation
+    a_course_count = models.PositiveIntegerField(default=0)
+    b_course_count = models.PositiveIntegerField(default=0)
+    c_course_count = models.PositiveIntegerField(default=0)
+    d_course_count = models.PositiveIntegerField(default=0)
+    e_course_count = models.PositiveIntegerField(default=0)
+    f_course_count = models.PositiveIntegerField(default=0)
+    g_course_count = models.PositiveIntegerField(default=0)
+    # The latest academic year any course of the school is offered in, such as "2019-20"
+    latest_academic_year = models.CharField(default='', max_length=7, blank=True)
+    # The data version (see api/caching.py) that the course statistics were computed under
+    courses_version = models.CharField(default='', max_length=64, blank=True)
+    courses_refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "school summaries"
+
+    def __str__(self):
+        return "Summary of " + self.school
+
+class SchoolSubjectSummary(models.Model):
+    """
+    Summary:
+        Model that represents the number of courses a school offers in a subject, refreshed along with the course
+        statistics of its SchoolSummary.
+    """
+    summary = models.ForeignKey(SchoolSummary, on_delete=models.CASCADE, related_name='subjects')
+    subject = models.CharField(default='', max_length=50, blank=True)
+    course_count = models.PositiveIntegerField(default=0)
+    honors_course_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("summary", "subject")
+
+    def __str__(self):
+        return self.subject + " (" + self.summary_id + ")"
@@ -0,0 +1,29 @@
+"""
+Summary:
+    Represents the pooled Postgres database backend of this backend framework, which is the Django Postgres backend with
+    its connections borrowed from the connection pool of the process (see api/pooling.py) instead of opened and closed
+    for each thread. Use it with CONN_MAX_AGE set to 0, so that every request gives its connection back to the pool.
+"""
+from django.db.backends.postgresql import base
+
+from api.pooling import get_pool
+
+from .creation import DatabaseCreation
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Summary:
+        Represents a Postgres connection of one thread, borrowed from the pool of its database while it is open.
+    """
+    creation_class = DatabaseCreation
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(self.alias, conn_params, self.settings_dict.get('POOL'))
+        connection = self.pool.getconn(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        # Connections taken from the pool were set up by another wrapper, so the isolation level is read back
+        self.isolation_level = self.settings_dict['OPTIONS'].get('isolation_level', connection.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            self.pool.putconn(self.connection)
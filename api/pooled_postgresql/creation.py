@@ -0,0 +1,18 @@
+"""
+Summary:
+    Represents the test database creation of the pooled Postgres database backend. Postgres refuses to drop or copy a
+    database that other sessions are connected to, so the pool of the database is closed first.
+"""
+from django.db.backends.postgresql import creation
+
+from api.pooling import close_pool
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        close_pool(self.connection.alias)
+        super()._clone_test_db(suffix, verbosity, keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pool(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
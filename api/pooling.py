@@ -0,0 +1,279 @@
+"""
+Summary:
+    Represents the Postgres connection pool of this backend framework, used by the api.pooled_postgresql database
+    backend. Each process keeps at most MAX_SIZE connections per database, which every thread (including the worker
+    threads of the ASGI server) borrows for the length of a request instead of holding one of its own. Connections that
+    have sat idle are checked before they are handed out, so a connection dropped by the server is replaced rather than
+    failing a request, and every pool counts how often requests had to wait for a connection.
+"""
+import collections
+import os
+import threading
+import time
+
+from psycopg2 import Error, OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS, TRANSACTION_STATUS_INERROR
+
+# The options of a pool, which can be changed through the POOL dict of a database in settings.DATABASES
+DEFAULT_POOL_OPTIONS = {
+    # The most connections the pool of a process opens
+    'MAX_SIZE': 10,
+    # The seconds a request waits for a connection before failing
+    'TIMEOUT': 10,
+    # The seconds after which a connection is closed and replaced, as with CONN_MAX_AGE
+    'MAX_LIFETIME': 600,
+    # Connections idle for longer than this many seconds are pinged before they are handed out (0 pings every time)
+    'HEALTH_CHECK_INTERVAL': 10
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+class ConnectionPool:
+    """
+    Summary:
+        Represents a bounded pool of psycopg2 connections, shared by every thread of a process. Connections are handed
+        out last in, first out, so that connections beyond those needed for the current load go idle and expire.
+
+    Args:
+        options (dict, optional): The options of the pool, as in DEFAULT_POOL_OPTIONS. Defaults to None.
+    """
+
+    def __init__(self, options=None):
+        self.options = dict(DEFAULT_POOL_OPTIONS, **(options or {}))
+        self.pid = os.getpid()
+        self.condition = threading.Condition()
+        # Idle connections, with the time each was returned to the pool
+        self.idle = collections.deque()
+        # The time each open connection was created, by connection
+        self.created_at = {}
+        self.size = 0
+        self.waiting = 0
+        self.closed = False
+        self.counters = collections.Counter()
+        self.max_wait_seconds = 0.0
+
+    def getconn(self, connect):
+        """
+        Summary:
+            Borrows a connection from the pool, waiting up to TIMEOUT seconds for one if MAX_SIZE connections are in
+            use. An idle connection that has expired or fails its health check is replaced by a new one.
+
+        Args:
+            connect (function): Opens a new connection, when the pool has room for one.
+
+        Returns:
+            connection: The borrowed connection, which must be given back with putconn.
+        """
+        start_time = time.monotonic()
+        deadline = start_time + self.options['TIMEOUT']
+        with self.condition:
+            self.counters['checkouts'] += 1
+        while True:
+            with self.condition:
+                connection, returned_at = self._take(deadline, start_time)
+            if connection is None:
+                return self._open(connect)
+            if self._is_healthy(connection, returned_at):
+                return connection
+            self._discard(connection)
+
+    def putconn(self, connection):
+        """
+        Summary:
+            Gives a borrowed connection back to the pool, rolling back any transaction it left open. Connections that
+            are broken or have expired are closed instead.
+
+        Args:
+            connection (connection): The connection to give back.
+        """
+        try:
+            status = connection.get_transaction_status() if not connection.closed else None
+            if status in (TRANSACTION_STATUS_INTRANS, TRANSACTION_STATUS_INERROR):
+                connection.rollback()
+                status = connection.get_transaction_status()
+        except Error:
+            status = None
+        if status != TRANSACTION_STATUS_IDLE or self._has_expired(connection) or self.closed:
+            self._discard(connection)
+            return
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def get_stats(self):
+        """
+        Summary:
+            Returns the current use of the pool and its counters since the process started. A pool is saturated when
+            in_use reaches max_size, at which point requests start to wait (see waits and wait_seconds).
+
+        Returns:
+            dict: The statistics of the pool.
+        """
+        with self.condition:
+            return {
+                'max_size': self.options['MAX_SIZE'],
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                'waiting': self.waiting,
+                'checkouts': self.counters['checkouts'],
+                'waits': self.counters['waits'],
+                'wait_seconds': round(self.counters['wait_seconds'], 3),
+                'max_wait_seconds': round(self.max_wait_seconds, 3),
+                'timeouts': self.counters['timeouts'],
+                'opened': self.counters['opened'],
+                'failed_health_checks': self.counters['failed_health_checks'],
+                'discarded': self.counters['discarded']
+            }
+
+    def close_idle(self):
+        """
+        Summary:
+            Closes every idle connection of the pool.
+        """
+        with self.condition:
+            idle = [connection for connection, returned_at in self.idle]
+            self.idle.clear()
+        for connection in idle:
+            self._discard(connection)
+
+    def close(self):
+        """
+        Summary:
+            Closes every idle connection of the pool, and every connection in use once it is given back, so that the
+            pool holds no connection to the server (such as before a test database is dropped).
+        """
+        self.closed = True
+        self.close_idle()
+
+    def _take(self, deadline, start_time):
+        """
+        Summary:
+            Takes an idle connection, or reserves room for a new one (returning None), waiting until the deadline if
+            neither is possible. Must be called with the condition held.
+
+        Returns:
+            tuple: The connection (or None) and the time it was returned to the pool.
+        """
+        waited = False
+        while not self.idle and self.size >= self.options['MAX_SIZE']:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.counters['timeouts'] += 1
+                raise OperationalError("Timed out after {} seconds waiting for a database connection (all {} in use)"
+                                       .format(self.options['TIMEOUT'], self.options['MAX_SIZE']))
+            waited = True
+            self.waiting += 1
+            try:
+                self.condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+        if waited:
+            wait_seconds = time.monotonic() - start_time
+            self.counters['waits'] += 1
+            self.counters['wait_seconds'] += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        if self.idle:
+            return self.idle.pop()
+        self.size += 1
+        return (None, None)
+
+    def _open(self, connect):
+        try:
+            connection = connect()
+        except BaseException:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.created_at[connection] = time.monotonic()
+            self.counters['opened'] += 1
+        return connection
+
+    def _has_expired(self, connection):
+        return time.monotonic() - self.created_at.get(connection, 0) >= self.options['MAX_LIFETIME']
+
+    def _is_healthy(self, connection, returned_at):
+        """
+        Summary:
+            Returns whether an idle connection can be handed out: it must not have expired, and if it has been idle
+            for longer than HEALTH_CHECK_INTERVAL seconds, it must answer a ping.
+        """
+        if connection.closed or self._has_expired(connection):
+            return False
+        if time.monotonic() - returned_at < self.options['HEALTH_CHECK_INTERVAL']:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except Error:
+            with self.condition:
+                self.counters['failed_health_checks'] += 1
+            return False
+        return True
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Error:
+            pass
+        with self.condition:
+            self.created_at.pop(connection, None)
+            self.size -= 1
+            self.counters['discarded'] += 1
+            self.condition.notify()
+
+def get_pool(alias, conn_params, options=None):
+    """
+    Summary:
+        Returns the connection pool of a database in this process, creating it if necessary. A new pool is created
+        when the connection parameters change (such as for a test database) or in a forked process, which must not
+        share the connections of its parent.
+
+    Args:
+        alias (string): The alias of the database.
+        conn_params (dict): The parameters that connections are opened with.
+        options (dict, optional): The options of the pool, as in DEFAULT_POOL_OPTIONS. Defaults to None.
+
+    Returns:
+        ConnectionPool: The pool of the database.
+    """
+    key = repr(sorted(conn_params.items()))
+    with _pools_lock:
+        current_key, pool = _pools.get(alias, (None, None))
+        if pool is None or current_key != key or pool.pid != os.getpid():
+            if pool is not None and pool.pid == os.getpid():
+                pool.close()
+            pool = ConnectionPool(options)
+            _pools[alias] = (key, pool)
+    return pool
+
+def close_pool(alias):
+    """
+    Summary:
+        Closes the connection pool of a database in this process, if it has one (see ConnectionPool.close). The next
+        connection to the database creates a new pool.
+
+    Args:
+        alias (string): The alias of the database.
+    """
+    with _pools_lock:
+        key, pool = _pools.pop(alias, (None, None))
+    if pool is not None and pool.pid == os.getpid():
+        pool.close()
+
+def get_pool_stats():
+    """
+    Summary:
+        Returns the statistics of every connection pool of this process (see ConnectionPool.get_stats).
+
+    Returns:
+        dict: The statistics of each pool, by database alias.
+    """
+    with _pools_lock:
+        pools = {alias: pool for alias, (key, pool) in _pools.items() if pool.pid == os.getpid()}
+    return {alias: pool.get_stats() for alias, pool in pools.items()}
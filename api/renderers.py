@@ -0,0 +1,121 @@
+"""
+Summary:
+    Represents the read-optimized rendering path of this backend framework. List responses of plain model serializers
+    (such as CourseSerializer and SchoolSerializer) are rendered straight from queryset.values() rows with a fast JSON
+    encoder, skipping model instances and serializer fields entirely, while producing exactly the same bytes as the
+    Django REST framework JSONRenderer.
+"""
+import json
+from itertools import islice
+
+from django.http import HttpResponse
+
+from rest_framework.renderers import JSONRenderer
+
+# orjson is an optional dependency; without it, rows are encoded with the standard library
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def render_json(data):
+    """
+    Summary:
+        Renders data (made of dicts, lists, strings, numbers, booleans, and None) into the same JSON as the Django REST
+        framework JSONRenderer with its default settings: compact, UTF-8 encoded, and with U+2028 and U+2029 escaped.
+
+    Args:
+        data: The data to render.
+
+    Returns:
+        bytes: The rendered JSON.
+    """
+    if orjson is not None:
+        content = orjson.dumps(data)
+        # orjson already writes compact, unescaped UTF-8, but leaves the JavaScript line separators unescaped
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    content = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+    return content.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+
+def _iter_chunks(rows, chunk_size):
+    """
+    Summary:
+        Splits an iterable of rows into lists of at most chunk_size rows, without reading more than one chunk at a time.
+
+    Args:
+        rows (iterable): The rows to split.
+        chunk_size (int): The maximum number of rows per chunk.
+
+    Returns:
+        generator: The chunks of rows.
+    """
+    rows = iter(rows)
+    chunk = list(islice(rows, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(rows, chunk_size))
+
+def stream_ndjson(rows, chunk_size=2000):
+    """
+    Summary:
+        Renders rows as newline-delimited JSON (one row per line), one chunk of rows at a time.
+
+    Args:
+        rows (iterable): The rows to render.
+        chunk_size (int, optional): The number of rows rendered into each piece of output. Defaults to 2000.
+
+    Returns:
+        generator: The rendered output, in pieces.
+    """
+    for chunk in _iter_chunks(rows, chunk_size):
+        yield b''.join(render_json(row) + b'\n' for row in chunk)
+
+def stream_json_array(rows, chunk_size=2000):
+    """
+    Summary:
+        Renders rows as a JSON array, one chunk of rows at a time. The output is the same as render_json(list(rows)).
+
+    Args:
+        rows (iterable): The rows to render.
+        chunk_size (int, optional): The number of rows rendered into each piece of output. Defaults to 2000.
+
+    Returns:
+        generator: The rendered output, in pieces.
+    """
+    yield b'['
+    separator = b''
+    for chunk in _iter_chunks(rows, chunk_size):
+        yield separator + b','.join(render_json(row) for row in chunk)
+        separator = b','
+    yield b']'
+
+class ValuesListMixin:
+    """
+    Summary:
+        Mixin for read-only viewsets whose serializer only lists plain model fields, which renders list responses
+        straight from the rows of queryset.values(). Foreign keys are rendered as the primary key of the related
+        instance, as by a PrimaryKeyRelatedField. Requests for any other format (such as the browsable API or indented
+        JSON) and paginated lists are handled by the serializer as usual.
+    """
+
+    def get_values(self, queryset):
+        """
+        Summary:
+            Returns the rows of a list response, with the fields of the serializer in order. Viewsets may override
+            this to add precomputed values to each row.
+
+        Args:
+            queryset (QuerySet): The rows to list.
+
+        Returns:
+            list: The rows, as dicts.
+        """
+        return list(queryset.values(*self.get_serializer_class().Meta.fields))
+
+    def list(self, request, *args, **kwargs):
+        renderer = getattr(request, 'accepted_renderer', None)
+        if not isinstance(renderer, JSONRenderer) or self.paginator is not None or \
+            renderer.get_indent(request.accepted_media_type, {}) is not None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return HttpResponse(render_json(self.get_values(queryset)), content_type=renderer.media_type)
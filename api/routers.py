@@ -0,0 +1,16 @@
+"""
+Summary:
+    Represents the database routers of this backend framework, which are consulted before the django-salesforce router.
+"""
+
+class CacheRouter:
+    """
+    Summary:
+        Routes the table of the database cache (see CACHES in settings) to the default Postgres database. The
+        django-salesforce router cannot route it, as the cache table does not belong to an installed app.
+    """
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == 'django_cache':
+            return db == 'default'
+        return None
@@ -0,0 +1,141 @@
+"""
+Summary:
+    Represents the Salesforce query cache of this backend framework, used by the api.cached_salesforce database backend.
+    The rows returned by each SOQL query are cached (in the cache named by SALESFORCE_QUERY_CACHE) for the number of
+    seconds given for its model in SALESFORCE_QUERY_CACHE_TIMEOUTS, so identical queries (such as
+    School.objects.all()) only go to Salesforce once. Every cached query is keyed on the version of each Salesforce
+    object it reads, and a write through the salesforce alias starts a new version of the object it writes, so later
+    reads of that object go back to Salesforce.
+"""
+import collections
+import hashlib
+import threading
+import uuid
+
+import salesforce
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+
+# The hit, miss, skip, and invalidation counts of this process, by model label
+_counters = collections.defaultdict(collections.Counter)
+_counters_lock = threading.Lock()
+
+def get_query_cache():
+    """
+    Summary:
+        Returns the cache that Salesforce query results are kept in, which is shared between processes (such as a
+        database or Redis cache), so that invalidating queries in one process reaches every other.
+
+    Returns:
+        BaseCache: The query cache.
+    """
+    return caches[settings.SALESFORCE_QUERY_CACHE]
+
+def get_query_timeout(model):
+    """
+    Summary:
+        Returns the number of seconds that the results of queries on a model are cached for.
+
+    Args:
+        model (class): The Salesforce model that is queried.
+
+    Returns:
+        int: The timeout of the model, or None if its queries are not cached.
+    """
+    return settings.SALESFORCE_QUERY_CACHE_TIMEOUTS.get(model._meta.label)
+
+def count(model, event):
+    """
+    Summary:
+        Counts an event of the query cache (such as 'hits' or 'misses') for a model.
+    """
+    with _counters_lock:
+        _counters[model._meta.label][event] += 1
+
+def _get_version_key(table):
+    return 'sf:version:' + table
+
+def get_object_versions(tables):
+    """
+    Summary:
+        Returns the current version of each given Salesforce object, starting a version for any object without one.
+
+    Args:
+        tables (list): The names of the Salesforce objects, such as 'Course__c'.
+
+    Returns:
+        dict: The version of each object, by name.
+    """
+    cache = get_query_cache()
+    keys = {table: _get_version_key(table) for table in tables}
+    versions = cache.get_many(list(keys.values()))
+    result = {}
+    for table, key in keys.items():
+        version = versions.get(key)
+        if version is None:
+            # Only one process can add the new version, and every other process uses the version it added
+            cache.add(key, uuid.uuid4().hex, None)
+            version = cache.get(key)
+        result[table] = version
+    return result
+
+def invalidate_objects(tables):
+    """
+    Summary:
+        Starts a new version of each given Salesforce object, which invalidates every cached query that reads it.
+
+    Args:
+        tables (list): The names of the Salesforce objects, such as 'Course__c'.
+    """
+    get_query_cache().set_many({_get_version_key(table): uuid.uuid4().hex for table in tables}, None)
+
+def invalidate_all_objects():
+    """
+    Summary:
+        Invalidates every cached query, such as after the scraper has written to Salesforce directly.
+    """
+    invalidate_objects([model._meta.db_table for model in apps.get_models()
+                        if issubclass(model, salesforce.models.SalesforceModel)])
+
+def get_query_cache_key(alias, soql, tables):
+    """
+    Summary:
+        Returns the cache key of the results of a SOQL query under the current versions of the objects it reads.
+
+    Args:
+        alias (string): The alias of the Salesforce database.
+        soql (string): The query, with its parameters filled in.
+        tables (set): The names of the Salesforce objects that the query reads.
+
+    Returns:
+        string: The cache key of the query.
+    """
+    versions = get_object_versions(sorted(tables))
+    key = alias + ':' + soql + ':' + ','.join(table + '=' + versions[table] for table in sorted(tables))
+    return 'sf:query:' + hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def get_query_cache_stats():
+    """
+    Summary:
+        Returns the query cache counters of this process: how many queries were served from the cache ('hits'),
+        sent to Salesforce ('misses'), returned too many rows to be cached ('skipped'), and how many writes
+        invalidated the cache ('invalidations').
+
+    Returns:
+        dict: The counters and hit rate of each model, by model label.
+    """
+    with _counters_lock:
+        counters = {label: dict(counter) for label, counter in _counters.items()}
+    stats = {}
+    for label, counter in counters.items():
+        hits, misses = counter.get('hits', 0), counter.get('misses', 0)
+        stats[label] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+            'skipped': counter.get('skipped', 0),
+            'invalidations': counter.get('invalidations', 0)
+        }
+    return stats
@@ -0,0 +1,237 @@
+"""
+Summary:
+    Represents the course search of this backend framework: an in-process inverted index over the name and transcript
+    abbreviations of every course, which is built with a single Salesforce query per data version (see caching.py) and
+    answers every search without going back to Salesforce. Every word of a search matches the words of a course that
+    start with it, and results are ranked by how closely each word matched.
+"""
+import heapq
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.db import connections
+
+from .caching import get_data_version
+from .models import Course
+from .renderers import render_json
+from .serializers import CourseSerializer
+
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+# Search words shorter than this only match whole words, since a single letter starts too many words to be useful
+MIN_PREFIX_LENGTH = 2
+
+# The score of a search word matching a whole word, or the start of a word, of the name or transcript abbreviations
+EXACT_NAME_SCORE = 4
+PREFIX_NAME_SCORE = 2
+EXACT_ABBREVIATION_SCORE = 3
+PREFIX_ABBREVIATION_SCORE = 1
+
+_index = None
+_index_lock = threading.Lock()
+# Held while the first index of this process is built, since there is no previous index to answer searches with
+_first_index_lock = threading.Lock()
+# The data version whose index is being built on a background thread, if any
+_rebuilding_version = None
+
+def get_words(text):
+    """
+    Summary:
+        Splits text into lowercase words of letters and digits, without accents, such that "Álgebra I-A" is split
+        into "algebra", "i", and "a".
+
+    Args:
+        text (string): The text to split, which may be None.
+
+    Returns:
+        list: The words of the text.
+    """
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', text.lower())
+    return WORD_RE.findall(''.join(char for char in text if not unicodedata.combining(char)))
+
+def get_abbreviation_words(transcript_abbs):
+    """
+    Summary:
+        Returns the words of the transcript abbreviations of a course, which are separated by semicolons. Each
+        abbreviation is also included as a single word, so that "ALG 1" is found by both "alg 1" and "alg1".
+
+    Args:
+        transcript_abbs (string): The transcript abbreviations of a course, which may be None.
+
+    Returns:
+        set: The words of the transcript abbreviations.
+    """
+    words = set()
+    for abbreviation in (transcript_abbs or '').split(';'):
+        abbreviation_words = get_words(abbreviation)
+        words.update(abbreviation_words)
+        if len(abbreviation_words) > 1:
+            words.add(''.join(abbreviation_words))
+    return words
+
+class CourseIndex:
+    """
+    Summary:
+        Represents an inverted index of courses. Courses are numbered in order of school, so the courses of a school
+        are a contiguous range of numbers, and a search scoped to a school only reads that range of every posting list.
+
+    Args:
+        rows (iterable): The rows of the courses, with the fields of CourseSerializer.
+        version (string, optional): The data version that the rows were read under. Defaults to None.
+    """
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        rows = sorted(rows, key=lambda row: (row['school'] or '', row['name'] or '', row['id']))
+        # Every course is rendered once, as in the response of /api/courses/
+        self.documents = [render_json(row) for row in rows]
+        self.name_lengths = array('I', (len(row['name'] or '') for row in rows))
+        self.school_ranges = {}
+        name_postings = defaultdict(list)
+        abbreviation_postings = defaultdict(list)
+        for number, row in enumerate(rows):
+            start, end = self.school_ranges.get(row['school'], (number, number))
+            self.school_ranges[row['school']] = (start, number + 1)
+            for word in set(get_words(row['name'])):
+                name_postings[word].append(number)
+            for word in get_abbreviation_words(row['transcript_abbs']):
+                abbreviation_postings[word].append(number)
+        # Posting lists are sorted, since courses are added in order
+        self.fields = [
+            self._create_field(name_postings, EXACT_NAME_SCORE, PREFIX_NAME_SCORE),
+            self._create_field(abbreviation_postings, EXACT_ABBREVIATION_SCORE, PREFIX_ABBREVIATION_SCORE)
+        ]
+
+    @staticmethod
+    def _create_field(postings, exact_score, prefix_score):
+        words = sorted(postings)
+        return (words, [array('I', postings[word]) for word in words], exact_score, prefix_score)
+
+    def _get_matches(self, search_word, start, end):
+        """
+        Summary:
+            Returns the courses numbered from start to end that match a search word in each field, along with the
+            score of the match.
+
+        Returns:
+            list: The score and sorted numbers of the courses of each matching word, lowest score first.
+        """
+        matches = []
+        for words, postings, exact_score, prefix_score in self.fields:
+            position = bisect_left(words, search_word)
+            while position < len(words) and words[position].startswith(search_word):
+                word = words[position]
+                if word != search_word and len(search_word) < MIN_PREFIX_LENGTH:
+                    break
+                posting = postings[position]
+                matches.append((exact_score if word == search_word else prefix_score,
+                                posting[bisect_left(posting, start):bisect_left(posting, end)]))
+                position += 1
+        return sorted(matches, key=lambda match: match[0])
+
+    def search(self, query, school=None, limit=20):
+        """
+        Summary:
+            Returns the courses matching every word of a search, best match first. Ties are broken by the shortest
+            name, so that "Algebra 1" comes before "Algebra 1 Honors".
+
+        Args:
+            query (string): The search, such as "alg 1".
+            school (string, optional): The Salesforce ID of a school, to only search its courses. Defaults to None.
+            limit (int, optional): The most courses to return. Defaults to 20.
+
+        Returns:
+            list: The rendered JSON of each matching course.
+        """
+        start, end = (0, len(self.documents)) if school is None else self.school_ranges.get(school, (0, 0))
+        word_matches = [self._get_matches(search_word, start, end) for search_word in set(get_words(query))]
+        if not word_matches:
+            return []
+        # The word matching the fewest courses is scored first, and every other word only against its courses
+        word_matches.sort(key=lambda matches: sum(len(numbers) for score, numbers in matches))
+        scores = None
+        for matches in word_matches:
+            # Lower scores are overwritten by higher ones, leaving the best score of each course for the word
+            word_scores = {}
+            for score, numbers in matches:
+                word_scores.update(dict.fromkeys(numbers if scores is None else scores.keys() & numbers, score))
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {number: scores[number] + score for number, score in word_scores.items()}
+            if not scores:
+                return []
+        best = heapq.nsmallest(limit, scores.items(),
+                               key=lambda item: (-item[1], self.name_lengths[item[0]], item[0]))
+        return [self.documents[number] for number, score in best]
+
+def build_course_index(version):
+    """
+    Summary:
+        Builds the course index of a data version with a single Salesforce query, and makes it the index of this
+        process unless an index of the same version was built first.
+
+    Args:
+        version (string): The data version the index is built for.
+
+    Returns:
+        CourseIndex: The course index of this process.
+    """
+    global _index
+    rows = Course.objects.values(*CourseSerializer.Meta.fields).iterator(chunk_size=2000)
+    index = CourseIndex(rows, version)
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = index
+        return _index
+
+def _rebuild_course_index(version):
+    """
+    Summary:
+        Builds the course index of a data version on a background thread, closing the database connections of the
+        thread once it is done.
+
+    Args:
+        version (string): The data version the index is built for.
+    """
+    global _rebuilding_version
+    try:
+        build_course_index(version)
+    finally:
+        connections.close_all()
+        with _index_lock:
+            _rebuilding_version = None
+
+def get_course_index():
+    """
+    Summary:
+        Returns the course index of this process. The first index is built on request, and requests that arrive while
+        it is being built wait for it. Once the data version changes, the next index is built on a background thread,
+        and the previous index keeps answering searches until it is ready.
+
+    Returns:
+        CourseIndex: The course index.
+    """
+    global _rebuilding_version
+    version = get_data_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    if index is None:
+        with _first_index_lock:
+            if _index is None:
+                return build_course_index(version)
+        index = _index
+        if index.version == version:
+            return index
+    with _index_lock:
+        if _rebuilding_version is None:
+            _rebuilding_version = version
+            threading.Thread(target=_rebuild_course_index, args=(version,), daemon=True).start()
+    return index
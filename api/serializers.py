@@ -9,8 +9,10 @@ from django.contrib.auth import get_user_model
 
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
-from .models import School, Course, UserAccount
+from .grades import save_transcript
+from .models import School, Course, UserAccount, Grade, UserStatistics, SchoolSummary, SchoolSubjectSummary
 
 # Get the appropriate custom user model
 User = get_user_model()
@@ -64,10 +66,9 @@ class UserSerializer(serializers.ModelSerializer):
 
         TODO: Thoroughly test this method to ensure it works properly.
         """
-        # user = User.objects.create(**validated_data)
-        user = super().create(validated_data)
+        # Hashes the password (see hashers.py) rather than saving it as given
+        user = User.objects.create_user(**validated_data)
         # Save into Salesforce database
-        print(validated_data)
         UserAccount.objects.create(**self.format_validated_data_for_sf(validated_data))
         return user
 
@@ -130,6 +131,24 @@ class SchoolSerializer(serializers.ModelSerializer):
         model = School
         fields = ['id', 'name', 'institution_type', 'school_id', 'city', 'state', 'website_id']
 
+class SchoolCourseStatsSerializer(SchoolSerializer):
+    """
+    Summary:
+        Represents a serializer class for the School model along with its precomputed course statistics (see
+        api/summaries.py), which the viewset reads ahead of time into the 'course_stats' context.
+    """
+    course_stats = serializers.SerializerMethodField()
+
+    class Meta(SchoolSerializer.Meta):
+        """
+        Summary: 
+            Meta subclass that specifies relevant fields to serialize from the appropriate model.
+        """
+        fields = SchoolSerializer.Meta.fields + ['course_stats']
+
+    def get_course_stats(self, obj):
+        return self.context['course_stats'].get(obj.id)
+
 class CourseSerializer(serializers.ModelSerializer):
     """
     Summary:
@@ -143,7 +162,7 @@ class CourseSerializer(serializers.ModelSerializer):
         """
         model = Course
         fields = ['id', 'name', 'school', 'is_honors', 'provider', 'academic_years', 'grade_levels', 'course_length',
-            'transcript_abbs', 'subject', 'ag_designation']
+            'transcript_abbs', 'subject', 'ag_designation', 'external_id']
 
 class SchoolCoursesSerializer(serializers.ModelSerializer):
     """
@@ -161,17 +180,123 @@ class SchoolCoursesSerializer(serializers.ModelSerializer):
         model = School
         fields = ['course_set']
 
-"""
-TODO: Write a serializer class for the Grade model, such that each Grade is serialized and linked properly to a Course
-      and a CustomUser instance, similar to the example shown below.
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Summary:
+        Represents a serializer class for obtaining a pair of tokens, which embeds the claims used to authenticate
+        requests without loading the user (see authentication.py). Refreshed access tokens keep these claims.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['email'] = user.email
+        token['name'] = user.name
+        token['school'] = user.school
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
+        return token
+
+class GradeListSerializer(serializers.ListSerializer):
+    """
+    Summary:
+        Represents a serializer class for a whole transcript of Grade instances, which are validated together and
+        written in bulk (see api/grades.py).
+    """
+
+    def validate(self, attrs):
+        """
+        Summary:
+            Checks that every course of the transcript is listed once and exists, looking up every course in a single
+            Salesforce query, and copies the A-G designation, honors flag, and length of each course onto its grade.
+        """
+        course_ids = [row['course'] for row in attrs]
+        if len(set(course_ids)) != len(course_ids):
+            raise serializers.ValidationError("Each course can only be graded once.")
+        courses = {course['id']: course for course in
+                   Course.objects.filter(pk__in=course_ids).values('id', 'ag_designation', 'is_honors',
+                                                                   'course_length')}
+        missing = [course_id for course_id in course_ids if course_id not in courses]
+        if missing:
+            raise serializers.ValidationError("Courses do not exist: " + ", ".join(missing))
+        return [dict(row, ag_designation=courses[row['course']]['ag_designation'] or '',
+                     is_honors=courses[row['course']]['is_honors'],
+                     course_length=courses[row['course']]['course_length'] or '') for row in attrs]
+
+    def create(self, validated_data):
+        return save_transcript(self.context['request'].user.id, validated_data)
 
 class GradeSerializer(serializers.ModelSerializer):
-    user = serializers.SerializerMethodField('get_user')
+    """
+    Summary:
+        Represents a serializer class for the Grade model, where the course is given by its Salesforce ID. Grades are
+        only written as a list (see GradeListSerializer).
+    """
 
     class Meta:
+        """
+        Summary: 
+            Meta subclass that specifies relevant fields to serialize from the appropriate model.
+        """
         model = Grade
-        fields = ['id', 'value', 'course', 'user']
+        fields = ['id', 'course', 'value', 'ag_designation', 'is_honors', 'course_length']
+        read_only_fields = ['ag_designation', 'is_honors', 'course_length']
+        list_serializer_class = GradeListSerializer
 
-    def get_user(self, obj):
-        return obj.user.id
-"""
+class UserStatisticsSerializer(serializers.ModelSerializer):
+    """
+    Summary:
+        Represents a serializer class for the UserStatistics model. Extends serializers.ModelSerializer from the Django
+        REST framework.
+    """
+
+    class Meta:
+        """
+        Summary: 
+            Meta subclass that specifies relevant fields to serialize from the appropriate model.
+        """
+        model = UserStatistics
+        fields = ['grade_count', 'unweighted_gpa', 'weighted_gpa', 'a_completed', 'b_completed', 'c_completed',
+                  'd_completed', 'e_completed', 'f_completed', 'g_completed', 'updated_at']
+
+class SchoolSubjectSummarySerializer(serializers.ModelSerializer):
+    """
+    Summary:
+        Represents a serializer class for the SchoolSubjectSummary model. Extends serializers.ModelSerializer from the
+        Django REST framework.
+    """
+
+    class Meta:
+        """
+        Summary: 
+            Meta subclass that specifies relevant fields to serialize from the appropriate model.
+        """
+        model = SchoolSubjectSummary
+        fields = ['subject', 'course_count', 'honors_course_count']
+
+class SchoolSummarySerializer(serializers.ModelSerializer):
+    """
+    Summary:
+        Represents a serializer class for the SchoolSummary model, along with the courses the school offers in each
+        subject and its share of honors grades and courses.
+    """
+    subjects = SchoolSubjectSummarySerializer(many=True, read_only=True)
+    honors_grade_share = serializers.SerializerMethodField()
+    honors_course_share = serializers.SerializerMethodField()
+
+    class Meta:
+        """
+        Summary: 
+            Meta subclass that specifies relevant fields to serialize from the appropriate model.
+        """
+        model = SchoolSummary
+        fields = ['school', 'student_count', 'graded_student_count', 'eligible_student_count', 'mean_gpa',
+                  'a_completion', 'b_completion', 'c_completion', 'd_completion', 'e_completion', 'f_completion',
+                  'g_completion', 'grade_count', 'honors_grade_count', 'honors_grade_share', 'students_refreshed_at',
+                  'course_count', 'honors_course_count', 'honors_course_share', 'courses_refreshed_at', 'subjects']
+
+    def get_honors_grade_share(self, obj):
+        return round(obj.honors_grade_count / obj.grade_count, 4) if obj.grade_count else None
+
+    def get_honors_course_share(self, obj):
+        return round(obj.honors_course_count / obj.course_count, 4) if obj.course_count else None
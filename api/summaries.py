@@ -0,0 +1,225 @@
+"""
+Summary:
+    Represents the school summaries of this backend framework, which materialize the statistics of every school into
+    the SchoolSummary and SchoolSubjectSummary tables, so that they are read in constant time instead of being computed
+    across Postgres and Salesforce on request. Summaries are refreshed incrementally by the refresh_school_summaries
+    management command: student statistics only for the schools whose students signed up or saved grades since the
+    last refresh, and course statistics only when the data version (see caching.py) has changed, which the
+    invalidate_api_cache command also refreshes right after every load.
+"""
+import collections
+
+import numpy as np
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .ag_progress import LETTERS, REQUIRED_YEARS, evaluate_users
+from .caching import get_data_version, invalidate_api_cache
+from .models import Course, Grade, SchoolSummary, SchoolSubjectSummary
+
+COMPLETION_FIELDS = [letter + '_completion' for letter in LETTERS]
+STUDENT_FIELDS = ['student_count', 'graded_student_count', 'eligible_student_count', 'mean_gpa'] + \
+    COMPLETION_FIELDS + ['grade_count', 'honors_grade_count', 'students_refreshed_at']
+COUNT_FIELDS = ['course_count', 'honors_course_count'] + [letter + '_course_count' for letter in LETTERS]
+COURSE_FIELDS = COUNT_FIELDS + ['latest_academic_year', 'courses_refreshed_at']
+# The cache key of the data version that the course statistics were last refreshed for, which is kept next to the data
+# version itself (see caching.py) so that it is recorded even when there are no summaries to store it in
+COURSES_VERSION_KEY = 'api:summaries:courses_version'
+
+def get_changed_schools(since):
+    """
+    Summary:
+        Returns the schools whose students signed up or saved grades (which updates their UserStatistics) after a
+        given time. Users who are deleted or move to another school are only picked up by a full refresh.
+
+    Args:
+        since (datetime): The time of the last refresh, or None to return every school with students.
+
+    Returns:
+        set: The Salesforce IDs of the schools.
+    """
+    users = get_user_model().objects.all()
+    if since is not None:
+        users = users.filter(Q(date_joined__gt=since) | Q(statistics__updated_at__gt=since))
+    return set(users.values_list('school', flat=True).distinct()) - {''}
+
+def refresh_student_summaries(schools, refreshed_at):
+    """
+    Summary:
+        Recomputes the student statistics of schools from the grades of their students. The A-G progress of every
+        student of every school is evaluated as a single cohort (see ag_progress.py), and summed up per school.
+
+    Args:
+        schools (iterable): The Salesforce IDs of the schools.
+        refreshed_at (datetime): The time the refresh started, which later refreshes look for changes since.
+    """
+    schools = sorted(schools)
+    if not schools:
+        return
+    positions = {school: position for position, school in enumerate(schools)}
+    users = list(get_user_model().objects.filter(school__in=schools).values_list('id', 'school'))
+    results = evaluate_users([user_id for user_id, school in users])
+    school_positions = np.array([positions[school] for user_id, school in users], dtype=np.int64)
+
+    def total(weights=None):
+        return np.bincount(school_positions, weights=weights, minlength=len(schools)).astype(np.float64)
+
+    graded = ~np.isnan(results['gpa'])
+    student_counts, graded_counts, eligible_counts = total(), total(graded), total(results['eligible'])
+    gpa_totals = total(np.where(graded, results['gpa'], 0))
+    # Only students with grades count towards the completion of their school
+    completion = (1 - results['missing'] / REQUIRED_YEARS) * graded[:, np.newaxis]
+    completion_totals = [total(completion[:, letter]) for letter in range(len(LETTERS))]
+    grade_counts = {row['user__school']: row for row in Grade.objects.filter(user__school__in=schools)
+                    .values('user__school').annotate(grades=Count('id'), honors=Count('id', filter=Q(is_honors=True)))}
+
+    existing = SchoolSummary.objects.in_bulk(schools)
+    created, updated = [], []
+    for school, position in positions.items():
+        summary = existing.get(school)
+        if summary is None:
+            summary = SchoolSummary(school=school)
+            created.append(summary)
+        else:
+            updated.append(summary)
+        graded_count = graded_counts[position]
+        summary.student_count = int(student_counts[position])
+        summary.graded_student_count = int(graded_count)
+        summary.eligible_student_count = int(eligible_counts[position])
+        summary.mean_gpa = round(gpa_totals[position] / graded_count, 2) if graded_count else None
+        for field, totals in zip(COMPLETION_FIELDS, completion_totals):
+            setattr(summary, field, round(totals[position] / graded_count, 4) if graded_count else 0)
+        counts = grade_counts.get(school, {})
+        summary.grade_count = counts.get('grades', 0)
+        summary.honors_grade_count = counts.get('honors', 0)
+        summary.students_refreshed_at = refreshed_at
+    with transaction.atomic():
+        SchoolSummary.objects.bulk_create(created)
+        SchoolSummary.objects.bulk_update(updated, STUDENT_FIELDS)
+
+def refresh_course_summaries(refreshed_at=None, invalidate=False):
+    """
+    Summary:
+        Recomputes the course statistics of every school from a single read of every course in Salesforce. Only if
+        they changed are the school summaries and every SchoolSubjectSummary replaced and a new data version started,
+        so that no cached response (see caching.py) keeps the previous statistics. Otherwise the current data version
+        is kept, and recorded as refreshed. Called by the invalidate_api_cache management command after every load.
+
+    Args:
+        refreshed_at (datetime, optional): The time the refresh started. Defaults to now.
+        invalidate (bool, optional): Whether to start a new data version even if the statistics did not change, for
+                                     data that changed without changing them. Defaults to False.
+
+    Returns:
+        string: The data version the statistics were refreshed for.
+    """
+    refreshed_at = refreshed_at or timezone.now()
+    subject_counts, subject_honors_counts = collections.Counter(), collections.Counter()
+    school_counts = collections.defaultdict(collections.Counter)
+    latest_academic_years = {}
+    for school, subject, is_honors, ag_designation, academic_years in Course.objects.values_list(
+            'school', 'subject', 'is_honors', 'ag_designation', 'academic_years').iterator(chunk_size=2000):
+        subject_counts[school, subject or ''] += 1
+        subject_honors_counts[school, subject or ''] += bool(is_honors)
+        counts = school_counts[school]
+        counts['course_count'] += 1
+        counts['honors_course_count'] += bool(is_honors)
+        designation = (ag_designation or '').lower()
+        if designation and designation in LETTERS:
+            counts[designation + '_course_count'] += 1
+        # Academic years such as "2019-20" sort in order as strings
+        latest_academic_year = max((academic_years or '').split(';'))
+        if latest_academic_year > latest_academic_years.get(school, ''):
+            latest_academic_years[school] = latest_academic_year
+
+    with transaction.atomic():
+        existing = SchoolSummary.objects.select_for_update().in_bulk()
+        created = [SchoolSummary(school=school) for school in school_counts if school not in existing]
+        changed = bool(created)
+        for summary in list(existing.values()) + created:
+            counts = school_counts.get(summary.school, {})
+            for field in COUNT_FIELDS:
+                changed = changed or getattr(summary, field) != counts.get(field, 0)
+                setattr(summary, field, counts.get(field, 0))
+            changed = changed or summary.latest_academic_year != latest_academic_years.get(summary.school, '')
+            summary.latest_academic_year = latest_academic_years.get(summary.school, '')
+            summary.courses_refreshed_at = refreshed_at
+        subjects = {(school, subject): (count, subject_honors_counts[school, subject])
+                    for (school, subject), count in subject_counts.items()}
+        existing_subjects = {(school, subject): (count, honors_count) for school, subject, count, honors_count in
+                             SchoolSubjectSummary.objects.values_list('summary', 'subject', 'course_count',
+                                                                      'honors_course_count')}
+        changed = changed or subjects != existing_subjects
+        if changed:
+            SchoolSummary.objects.bulk_create(created)
+            SchoolSummary.objects.bulk_update(list(existing.values()), COURSE_FIELDS, batch_size=1000)
+            SchoolSubjectSummary.objects.all().delete()
+            SchoolSubjectSummary.objects.bulk_create([
+                SchoolSubjectSummary(summary_id=school, subject=subject, course_count=count,
+                                     honors_course_count=honors_count)
+                for (school, subject), (count, honors_count) in subjects.items()], batch_size=1000)
+        else:
+            SchoolSummary.objects.update(courses_refreshed_at=refreshed_at)
+    # Unchanged statistics keep the data version, so a full or expired refresh does not invalidate every response
+    version = invalidate_api_cache() if changed or invalidate else get_data_version()
+    SchoolSummary.objects.update(courses_version=version)
+    cache.set(COURSES_VERSION_KEY, version, None)
+    return version
+
+def get_course_stats(schools=None):
+    """
+    Summary:
+        Returns the precomputed course statistics of schools, read from the school summaries with two queries.
+
+    Args:
+        schools (list, optional): The Salesforce IDs of the schools. Defaults to None, for every school.
+
+    Returns:
+        dict: The number of courses, honors courses, courses with each A-G designation, and courses in each subject,
+              and the latest academic year of each school, by Salesforce ID.
+    """
+    summaries = SchoolSummary.objects.exclude(courses_refreshed_at=None)
+    subjects = SchoolSubjectSummary.objects.order_by('summary', 'subject')
+    if schools is not None:
+        summaries = summaries.filter(school__in=schools)
+        subjects = subjects.filter(summary__in=schools)
+    stats = {}
+    for row in summaries.values('school', 'latest_academic_year', *COUNT_FIELDS):
+        stats[row['school']] = {
+            'course_count': row['course_count'],
+            'honors_course_count': row['honors_course_count'],
+            'ag_designations': {letter: row[letter + '_course_count'] for letter in LETTERS},
+            'subjects': {},
+            'latest_academic_year': row['latest_academic_year']
+        }
+    for school, subject, course_count in subjects.values_list('summary', 'subject', 'course_count'):
+        if school in stats:
+            stats[school]['subjects'][subject] = course_count
+    return stats
+
+def refresh_school_summaries(full=False):
+    """
+    Summary:
+        Refreshes the student statistics of the schools that changed since the last refresh, and the course
+        statistics of every school if the data version has changed.
+
+    Args:
+        full (bool, optional): Whether to refresh every school, whether or not it changed. Defaults to False.
+
+    Returns:
+        tuple: The number of schools whose student statistics were refreshed, and whether the course statistics were.
+    """
+    refreshed_at = timezone.now()
+    if full:
+        schools = get_changed_schools(None) | set(SchoolSummary.objects.values_list('school', flat=True))
+    else:
+        schools = get_changed_schools(SchoolSummary.objects.aggregate(since=Max('students_refreshed_at'))['since'])
+    refresh_student_summaries(schools, refreshed_at)
+    refresh_courses = full or cache.get(COURSES_VERSION_KEY) != get_data_version()
+    if refresh_courses:
+        refresh_course_summaries(refreshed_at)
+    return (len(schools), refresh_courses)
@@ -1,5 +1,51 @@
-from django.test import TestCase
+import asyncio
+import json
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from unittest import mock
+from uuid import NAMESPACE_URL, uuid5
+
+import httpx
+from psycopg2 import OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INERROR
+
+from django.db import connections
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from rest_framework import viewsets
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from salesforce.dbapi.driver import Connection
+
+from scraper.external_ids import ExternalIdService, get_course_external_id
+from scraper.lease_queue import LeaseQueue
+from scraper.progress import get_time_per_page_str
+from scraper.rate_limiter import AdaptiveRateLimiter
+from scraper.scheduler import CostScheduler
+
+from .ag_progress import LETTERS, evaluate, get_cohort_progress, get_user_progress
+from .async_views import AsyncReadApplication, accepts_json
+from .authentication import JWTClaimsAuthentication
+from .cached_salesforce.base import CachingCursorWrapper
+from .caching import CachedResponseMixin, get_data_version, invalidate_api_cache
+from .grades import delete_grades, rebuild_statistics, save_transcript
+from .models import School, Course, Grade, SchoolSummary, SchoolSubjectSummary, UserStatistics
+from .pooling import ConnectionPool, close_pool, get_pool
+from .renderers import render_json, stream_ndjson, stream_json_array
+from .salesforce_cache import get_query_cache, get_query_cache_stats, invalidate_objects
+from .search import CourseIndex, get_course_index
+from .serializers import ClaimsTokenObtainPairSerializer, SchoolSerializer, CourseSerializer, \
+    UserStatisticsSerializer
+from .summaries import get_course_stats, refresh_course_summaries, refresh_school_summaries
+from .views import SchoolViewSet, get_school_snapshot_url
 
 
 class UsersManagersTests(TestCase):
@@ -39,4 +85,806 @@ class UsersManagersTests(TestCase):
             pass
         with self.assertRaises(ValueError):
             User.objects.create_superuser(
-                email='super@user.com', password='foo', is_superuser=False)
\ No newline at end of file
+                email='super@user.com', password='foo', is_superuser=False)
+
+class CourseExternalIdTests(TestCase):
+
+    def test_matches_legacy_ids(self):
+        # IDs issued before the external ID service existed were derived from the school page URL
+        namespace = uuid5(NAMESPACE_URL, 'https://hs-articulation.ucop.edu/agcourselist/institution/1234')
+        self.assertEqual(get_course_external_id(1234, 'Algebra 1'), str(uuid5(namespace, 'Algebra 1')))
+
+    def test_service_keeps_issued_ids(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, 'external-ids.sqlite3')
+            service = ExternalIdService(filepath)
+            external_id = service.get(1234, 'Algebra 1')
+            self.assertEqual(service.get(1234, 'Algebra 1'), external_id)
+            service.close()
+            service = ExternalIdService(filepath, cache_size=1)
+            self.assertEqual(service.get_school_external_ids(1234), {'Algebra 1': external_id})
+            self.assertEqual(service.get_school_external_ids(4321), {})
+            service.close()
+
+    def test_service_closes_every_connection(self):
+        with tempfile.TemporaryDirectory() as directory:
+            service = ExternalIdService(os.path.join(directory, 'external-ids.sqlite3'), cache_size=1)
+            first = service.get(1234, 'Algebra 1')
+            service.get(1234, 'Geometry')
+            # Algebra 1 was evicted from the cache, but is still waiting to be written
+            self.assertEqual(service.get(1234, 'Algebra 1'), first)
+            thread = threading.Thread(target=service.get, args=(4321, 'Biology'))
+            thread.start()
+            thread.join()
+            connections = list(service._connections)
+            self.assertEqual(len(connections), 2)
+            service.close()
+            for connection in connections:
+                with self.assertRaises(sqlite3.ProgrammingError):
+                    connection.execute('SELECT 1')
+
+
+class ScraperProgressTests(TestCase):
+
+    def test_formats_time_per_page(self):
+        self.assertEqual(get_time_per_page_str(20, 4, total_pages=10),
+                         "Average time to scrape one school course page: 00:00:05.00\n"
+                         "Estimated time to run scraper fully (~10 school course pages): 00:00:50.00\n")
+        # A node of a distributed run may find the queue already drained by the other nodes
+        self.assertEqual(get_time_per_page_str(20, 0),
+                         "Average time to scrape one school course page: None (no school course pages were scraped)\n")
+
+
+class LeaseQueueTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.filepath = os.path.join(directory.name, 'queue.sqlite3')
+        self.now = 1000.0
+        patcher = mock.patch('scraper.lease_queue.time')
+        patcher.start().time.side_effect = lambda: self.now
+        self.addCleanup(patcher.stop)
+        self.queue = LeaseQueue(self.filepath, lease_seconds=60, max_attempts=2, base_delay=10)
+        self.addCleanup(self.queue.close)
+
+    def test_leases_most_expensive_first(self):
+        self.assertEqual(self.queue.seed([1, 2, 3], {2: 5.0}), 3)
+        # Seeding again keeps the progress of IDs already in the queue
+        self.assertEqual(self.queue.seed([3, 4]), 1)
+        self.assertEqual(self.queue.lease('a', count=2), [(2, 1), (1, 1)])
+        self.assertEqual(self.queue.get_counts(), {'pending': 2, 'leased': 2, 'done': 0, 'failed': 0})
+        self.assertTrue(self.queue.complete('a', 2, {'num_courses': 3}))
+        self.assertFalse(self.queue.complete('a', 2, {'num_courses': 3}))
+        self.assertEqual(self.queue.get_results(), {2: {'num_courses': 3}})
+        self.assertEqual(self.queue.get_id_range(), (1, 4))
+
+    def test_reclaims_expired_leases(self):
+        self.queue.seed([1, 2])
+        self.assertEqual(self.queue.lease('a'), [(1, 1)])
+        self.now += 30
+        self.assertEqual(self.queue.renew('a'), 1)
+        # The renewed lease outlives its original expiry
+        self.now += 45
+        self.assertEqual(self.queue.lease('b'), [(2, 1)])
+        self.now += 30
+        self.assertEqual(self.queue.reclaim_expired(), 1)
+        self.assertEqual(self.queue.lease('b'), [(1, 2)])
+        # A result reported after the lease was lost is still recorded, but only once
+        self.assertTrue(self.queue.complete('a', 1, {'node': 'a'}))
+        self.assertFalse(self.queue.complete('b', 1, {'node': 'b'}))
+        self.assertEqual(self.queue.get_results(), {1: {'node': 'a'}})
+
+    def test_backs_off_failures(self):
+        self.queue.seed([1])
+        self.assertEqual(self.queue.lease('a'), [(1, 1)])
+        self.assertTrue(self.queue.complete('a', 1, {}, failed=True))
+        self.assertEqual(self.queue.lease('a'), [])
+        self.now += 10
+        self.assertEqual(self.queue.lease('a'), [(1, 2)])
+        # The last attempt fails for good
+        self.assertTrue(self.queue.complete('a', 1, {}, failed=True))
+        self.now += 1000
+        self.assertEqual(self.queue.lease('a'), [])
+        self.assertEqual(self.queue.get_counts(), {'pending': 0, 'leased': 0, 'done': 0, 'failed': 1})
+
+    def test_nodes_never_lease_the_same_id(self):
+        self.queue.seed(range(200))
+        leased, errors = [], []
+        barrier = threading.Barrier(8)
+
+        def run_node(node_id):
+            # Each node opens its own queue, with its own connection to the database
+            queue = LeaseQueue(self.filepath)
+            barrier.wait()
+            try:
+                while True:
+                    leases = queue.lease(node_id)
+                    if not leases:
+                        return
+                    leased.extend(website_id for website_id, attempts in leases)
+            except sqlite3.Error as e:
+                errors.append(e)
+            finally:
+                queue.close()
+
+        threads = [threading.Thread(target=run_node, args=(str(node),)) for node in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Concurrent leases wait for each other, rather than failing or handing out the same ID twice
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(leased), list(range(200)))
+
+
+class AdaptiveRateLimiterTests(TestCase):
+
+    def test_adjusts_rate(self):
+        self.now = 100.0
+        with mock.patch('scraper.rate_limiter.time') as time_mock:
+            time_mock.monotonic.side_effect = lambda: self.now
+            limiter = AdaptiveRateLimiter(rate=2.0, min_rate=0.5, max_rate=2.2, target_latency=5.0)
+            for attempt in range(3):
+                limiter.record(1.0)
+            self.assertTrue(limiter.get_stats_str().startswith('2.20 requests/second'))
+            limiter.record(6.0)
+            # Failures during the same congestion event only decrease the rate once
+            limiter.record(0.1, success=False)
+            self.assertTrue(limiter.get_stats_str().startswith('1.10 requests/second'))
+            self.now += 5
+            limiter.record(6.0)
+            self.now += 5
+            limiter.record(6.0)
+            with self.assertRaises(ValueError):
+                with limiter.limit():
+                    raise ValueError
+            self.assertEqual(limiter.get_stats_str(), '0.50 requests/second (8 requests, 2 errors)')
+
+
+class CostSchedulerTests(TestCase):
+
+    def test_orders_by_expected_cost(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, 'cost-history.json')
+            scheduler = CostScheduler(filepath)
+            scheduler.record(1, 'ok', 10, 30.0)
+            scheduler.record(2, 'ok', 5, 10.0)
+            scheduler.record(3, 'invalid', 0, 0.5)
+            # IDs without history cost the median of every school with courses
+            self.assertEqual(scheduler.get_expected_costs([1, 2, 3, 4]), {1: 30.0, 2: 10.0, 3: 0.5, 4: 20.0})
+            self.assertEqual(scheduler.order([5, 4, 3, 2, 1]), [1, 4, 5, 2, 3])
+            # Neither an error nor a skipped school replaces a full scrape
+            scheduler.record(1, 'error', 2, 2.0)
+            scheduler.record(1, 'ok', 0, 1.0)
+            scheduler.save()
+            self.assertEqual(CostScheduler(filepath).get_expected_costs([1]), {1: 30.0})
+
+
+class CountingViewSet(viewsets.ViewSet):
+    authentication_classes = []
+    permission_classes = []
+    num_calls = 0
+
+    def list(self, request):
+        CountingViewSet.num_calls += 1
+        return Response({'calls': CountingViewSet.num_calls})
+
+
+class CachedCountingViewSet(CachedResponseMixin, CountingViewSet):
+    pass
+
+
+class CachedResponseTests(TestCase):
+
+    def setUp(self):
+        invalidate_api_cache()
+        CountingViewSet.num_calls = 0
+        self.view = CachedCountingViewSet.as_view({'get': 'list'})
+        self.factory = APIRequestFactory()
+
+    def test_caches_until_invalidated(self):
+        first = self.view(self.factory.get('/api/counting/?b=2&a=1'))
+        self.assertEqual(first.status_code, 200)
+        # The same query parameters in a different order share a cached response
+        second = self.view(self.factory.get('/api/counting/?a=1&b=2'))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(CountingViewSet.num_calls, 1)
+
+        invalidate_api_cache()
+        third = self.view(self.factory.get('/api/counting/?a=1&b=2'))
+        self.assertNotEqual(third['ETag'], first['ETag'])
+        self.assertEqual(CountingViewSet.num_calls, 2)
+
+    def test_not_modified(self):
+        etag = self.view(self.factory.get('/api/counting/'))['ETag']
+        response = self.view(self.factory.get('/api/counting/', HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(CountingViewSet.num_calls, 1)
+
+
+class SchoolSnapshotTests(TestCase):
+
+    def test_snapshot_url(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(STATIC_ROOT=directory,
+                                   STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage'):
+                self.assertIsNone(get_school_snapshot_url('a0B000000000001AAA'))
+                os.makedirs(os.path.join(directory, 'snapshots', 'schoolcourses'))
+                open(os.path.join(directory, 'snapshots', 'schoolcourses', 'a0B000000000001AAA.json'), 'w').close()
+                # Snapshots without a data version, or rendered for an earlier one, are not served
+                self.assertIsNone(get_school_snapshot_url('a0B000000000001AAA'))
+                with open(os.path.join(directory, 'snapshots', 'version.txt'), 'w') as f:
+                    f.write(get_data_version())
+                self.assertEqual(get_school_snapshot_url('a0B000000000001AAA'),
+                                 '/static/snapshots/schoolcourses/a0B000000000001AAA.json')
+                self.assertIsNone(get_school_snapshot_url('..'))
+                invalidate_api_cache()
+                self.assertIsNone(get_school_snapshot_url('a0B000000000001AAA'))
+
+
+class RenderJsonTests(TestCase):
+
+    def test_matches_json_renderer(self):
+        data = [{'id': 'a0C000000000001AAA', 'name': 'Calculus \u2013 "AB"\u2028\u2029\n\x00\\', 'is_honors': True,
+                 'provider': None, 'website_id': 320}, {}]
+        self.assertEqual(render_json(data), JSONRenderer().render(data))
+
+    def test_streams_match_render_json(self):
+        rows = [{'id': str(i), 'name': 'Course ' + str(i)} for i in range(5)]
+        for chunk_size in (1, 2, 5, 10):
+            self.assertEqual(b''.join(stream_json_array(iter(rows), chunk_size)), render_json(rows))
+            self.assertEqual(b''.join(stream_ndjson(iter(rows), chunk_size)),
+                             b''.join(render_json(row) + b'\n' for row in rows))
+        self.assertEqual(b''.join(stream_json_array(iter([]))), render_json([]))
+
+
+class CourseSearchTests(TestCase):
+
+    def setUp(self):
+        fields = CourseSerializer.Meta.fields
+        self.rows = [dict(dict.fromkeys(fields), id=id, name=name, school=school, transcript_abbs=abbs)
+                     for id, name, school, abbs in [
+                         ('c1', 'Algebra 1 Honors', 'a0B1', 'ALG 1 H'),
+                         ('c2', 'Algebra 1', 'a0B1', 'ALG 1;ALGEBRA\\1'),
+                         ('c3', 'Álgebra 1', 'a0B2', 'ALG1'),
+                         ('c4', 'Geometry', 'a0B1', 'GEOM'),
+                         ('c5', 'Biology', 'a0B2', 'BIO;ALGAE STUDY')]]
+        self.index = CourseIndex(self.rows)
+
+    def search(self, *args, **kwargs):
+        return [json.loads(result)['id'] for result in self.index.search(*args, **kwargs)]
+
+    def test_matches_prefixes_of_every_word(self):
+        self.assertEqual(self.search('alg 1'), ['c2', 'c1', 'c3'])
+        self.assertEqual(self.search('ALGEBRA 1 hon'), ['c1'])
+        self.assertEqual(self.search('alg1'), ['c2', 'c3', 'c1'])
+        self.assertEqual(self.search('geo'), ['c4'])
+        self.assertEqual(self.search('chemistry'), [])
+        self.assertEqual(self.search(' - '), [])
+        # Single letters only match whole words
+        self.assertEqual(self.search('g'), [])
+
+    def test_ranks_names_above_abbreviations(self):
+        self.assertEqual(self.search('alga'), ['c5'])
+        self.assertEqual(self.search('alg'), ['c2', 'c1', 'c3', 'c5'])
+
+    def test_scoped_by_school(self):
+        self.assertEqual(self.search('alg', school='a0B1'), ['c2', 'c1'])
+        self.assertEqual(self.search('alg', school='a0B2'), ['c3', 'c5'])
+        self.assertEqual(self.search('alg', school='a0B3'), [])
+        self.assertEqual(self.search('alg', limit=1), ['c2'])
+
+    def test_renders_like_serializer(self):
+        self.assertEqual(self.index.search('geometry'), [render_json(self.rows[3])])
+
+    @mock.patch('api.search._index', None)
+    def test_rebuilds_in_background(self):
+        with mock.patch.object(Course.objects, 'values') as values:
+            values.return_value.iterator.side_effect = lambda **kwargs: iter(self.rows)
+            first = get_course_index()
+            self.assertIs(get_course_index(), first)
+            invalidate_api_cache()
+            values.return_value.iterator.side_effect = lambda **kwargs: iter(self.rows[:1])
+            # The previous index keeps answering searches until the next one is built
+            self.assertIs(get_course_index(), first)
+            for attempt in range(500):
+                index = get_course_index()
+                if index is not first:
+                    break
+                time.sleep(0.01)
+        self.assertEqual(index.version, get_data_version())
+        self.assertEqual(index.search('alg'), [render_json(self.rows[0])])
+        self.assertEqual(values.call_count, 2)
+
+
+class ClaimsAuthenticationTests(TestCase):
+
+    def test_authenticates_from_claims(self):
+        User = get_user_model()
+        user = User.objects.create_user(email='normal@user.com', password='foo', school='a0B000000000001AAA')
+        token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+        request = APIRequestFactory().get('/api/courses/', HTTP_AUTHORIZATION='Bearer ' + str(token))
+        with self.assertNumQueries(0):
+            token_user, validated_token = JWTClaimsAuthentication().authenticate(request)
+        self.assertEqual(token_user.id, str(user.id))
+        self.assertEqual(token_user.email, 'normal@user.com')
+        self.assertEqual(token_user.school, 'a0B000000000001AAA')
+        self.assertFalse(token_user.is_staff)
+
+
+class PasswordHashingTests(TestCase):
+
+    def test_rehashes_legacy_passwords(self):
+        User = get_user_model()
+        user = User.objects.create(email='legacy@user.com', password=make_password('foo', hasher='pbkdf2_sha256'))
+        self.assertTrue(user.check_password('foo'))
+        self.assertTrue(User.objects.get(pk=user.pk).password.startswith('argon2$'))
+        self.assertFalse(user.check_password('bar'))
+
+
+class GradeTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='student@user.com', password='foo')
+
+    def assertStatisticsMatchGrades(self):
+        statistics = UserStatistics.objects.get(user=self.user)
+        rebuilt = rebuild_statistics(self.user.id)
+        for field in UserStatisticsSerializer.Meta.fields[:-1]:
+            self.assertEqual(getattr(statistics, field), getattr(rebuilt, field), field)
+        return rebuilt
+
+    def test_updates_statistics_incrementally(self):
+        save_transcript(self.user.id, [
+            {'course': 'c1', 'value': Decimal('4.00'), 'ag_designation': 'c', 'is_honors': True},
+            {'course': 'c2', 'value': Decimal('3.00'), 'ag_designation': 'b', 'is_honors': False},
+            {'course': 'c3', 'value': Decimal('1.00'), 'ag_designation': 'c', 'is_honors': True}])
+        statistics = self.assertStatisticsMatchGrades()
+        self.assertEqual(statistics.grade_count, 3)
+        self.assertEqual(statistics.unweighted_gpa, Decimal('2.67'))
+        # Only the passed honors course is weighted
+        self.assertEqual(statistics.weighted_gpa, Decimal('3.00'))
+        self.assertEqual((statistics.b_completed, statistics.c_completed), (1, 1))
+
+        # Resubmitting a transcript updates the grades it lists and leaves the rest alone
+        grades = save_transcript(self.user.id, [
+            {'course': 'c3', 'value': Decimal('2.50'), 'ag_designation': 'c', 'is_honors': True},
+            {'course': 'c4', 'value': Decimal('3.50'), 'ag_designation': '', 'is_honors': False}])
+        self.assertEqual(Grade.objects.filter(user=self.user).count(), 4)
+        statistics = self.assertStatisticsMatchGrades()
+        self.assertEqual(statistics.c_completed, 2)
+        self.assertEqual(statistics.unweighted_gpa, Decimal('3.25'))
+
+        delete_grades(self.user.id, [grades[0], Grade.objects.get(course='c1')])
+        statistics = self.assertStatisticsMatchGrades()
+        self.assertEqual(statistics.grade_count, 2)
+        self.assertEqual(statistics.c_completed, 0)
+        delete_grades(self.user.id, list(Grade.objects.filter(user=self.user)))
+        self.assertIsNone(self.assertStatisticsMatchGrades().unweighted_gpa)
+
+    def test_posts_transcript(self):
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        client = APIClient(HTTP_AUTHORIZATION='Bearer ' + str(token))
+        courses = [{'id': 'c1', 'ag_designation': 'a', 'is_honors': False, 'course_length': 'Half Year'}]
+        with mock.patch.object(Course.objects, 'filter') as filter:
+            filter.return_value.values.return_value = courses
+            response = client.post('/api/grades/', [{'course': 'c1', 'value': '3.50'}], format='json')
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.json()[0]['ag_designation'], 'a')
+            response = client.post('/api/grades/', [{'course': 'c1', 'value': '3'}, {'course': 'c2', 'value': '3'}],
+                                   format='json')
+            self.assertEqual(response.status_code, 400)
+            response = client.post('/api/grades/', [{'course': 'c1', 'value': '3'}, {'course': 'c1', 'value': '3'}],
+                                   format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(client.get('/api/grades/').json()[0]['value'], '3.50')
+        statistics = client.get('/api/grades/statistics/').json()
+        self.assertEqual((statistics['unweighted_gpa'], statistics['a_completed']), ('3.50', 1))
+
+        # Deleted users are refused, rather than writing grades for a user that no longer exists
+        self.user.delete()
+        self.assertEqual(client.post('/api/grades/', [{'course': 'c1', 'value': '3'}], format='json').status_code, 401)
+
+
+class AGProgressTests(TestCase):
+
+    def test_evaluates_cohort(self):
+        # Student 0 meets every requirement, with extra math counting as an elective; student 1 fails and
+        # takes half-year courses; student 2 has no grades
+        grades = [(0, 'a', 2, 4.0, False), (0, 'b', 4, 3.0, False), (0, 'c', 4, 3.0, True), (0, 'd', 2, 3.0, False),
+                  (0, 'e', 2, 3.0, False), (0, 'f', 1, 4.0, False),
+                  (1, 'a', 1, 1.0, False), (1, 'c', 0.5, 3.0, True), (1, 'c', 0.5, 4.0, False)]
+        results = evaluate(*zip(*((student, LETTERS.index(letter), credit, value, honors)
+                                  for student, letter, credit, value, honors in grades)), 3)
+        self.assertEqual(results['eligible'].tolist(), [True, False, False])
+        self.assertEqual(results['missing'][0].tolist(), [0] * 7)
+        self.assertEqual(results['credits'][1].tolist(), [0, 0, 1, 0, 0, 0, 0])
+        self.assertEqual(results['missing'][1].tolist(), [2, 4, 2, 2, 2, 1, 1])
+        self.assertAlmostEqual(results['gpa'][0], (4 * 2 + 3 * 4 + 4 * 4 + 3 * 2 + 3 * 2 + 4) / 15)
+        self.assertAlmostEqual(results['gpa'][1], (1 + 4 * 0.5 + 4 * 0.5) / 2)
+        self.assertTrue(math.isnan(results['gpa'][2]))
+
+    def test_progress_from_grades(self):
+        User = get_user_model()
+        first = User.objects.create_user(email='first@user.com', password='foo', school='a0B1')
+        second = User.objects.create_user(email='second@user.com', password='foo', school='a0B1')
+        save_transcript(first.id, [
+            {'course': 'c1', 'value': Decimal('3.00'), 'ag_designation': 'A', 'is_honors': False,
+             'course_length': 'Full Year'},
+            {'course': 'c2', 'value': Decimal('4.00'), 'ag_designation': 'b', 'is_honors': True,
+             'course_length': 'Half Year'},
+            {'course': 'c3', 'value': Decimal('4.00'), 'ag_designation': '', 'is_honors': False,
+             'course_length': 'Full Year'}])
+        progress = get_user_progress(first.id)
+        self.assertEqual((progress['credits']['a'], progress['credits']['b']), (1.0, 0.5))
+        self.assertEqual((progress['missing']['a'], progress['missing']['b']), (1.0, 3.5))
+        self.assertEqual(progress['gpa'], 3.67)
+        self.assertFalse(progress['eligible'])
+        self.assertIsNone(get_user_progress(second.id)['gpa'])
+
+        cohort = get_cohort_progress([first.id, second.id])
+        self.assertEqual((cohort['students'], cohort['eligible']), (2, 0))
+        self.assertEqual(cohort['mean_missing']['a'], 1.5)
+        self.assertEqual(cohort['progress'][str(first.id)], progress)
+
+
+class SchoolSummaryTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.first = User.objects.create_user(email='first@user.com', password='foo', school='a0B1')
+        self.second = User.objects.create_user(email='second@user.com', password='foo', school='a0B1')
+        User.objects.create_user(email='third@user.com', password='foo', school='a0B2')
+        save_transcript(self.first.id, [
+            {'course': 'c1', 'value': Decimal('4.00'), 'ag_designation': 'a', 'is_honors': True,
+             'course_length': 'Full Year'},
+            {'course': 'c2', 'value': Decimal('3.00'), 'ag_designation': 'b', 'is_honors': False,
+             'course_length': 'Full Year'}])
+        courses = [('a0B1', 'Mathematics', True, 'c', '2018-19;2019-20'),
+                   ('a0B1', 'Mathematics', False, 'c', '2019-20'), ('a0B1', 'English', False, 'b', '2020-21'),
+                   ('a0B3', 'Science', False, None, None)]
+        patcher = mock.patch.object(Course.objects, 'values_list')
+        self.values_list = patcher.start()
+        self.values_list.return_value.iterator.side_effect = lambda **kwargs: iter(courses)
+        self.addCleanup(patcher.stop)
+
+    def test_refreshes_incrementally(self):
+        self.assertEqual(refresh_school_summaries(), (2, True))
+        summary = SchoolSummary.objects.get(school='a0B1')
+        self.assertEqual((summary.student_count, summary.graded_student_count), (2, 1))
+        self.assertEqual((summary.a_completion, summary.b_completion, summary.c_completion), (0.5, 0.25, 0))
+        self.assertEqual((summary.mean_gpa, summary.grade_count, summary.honors_grade_count), (4.0, 2, 1))
+        self.assertEqual((summary.course_count, summary.honors_course_count), (3, 1))
+        self.assertEqual(SchoolSummary.objects.get(school='a0B2').graded_student_count, 0)
+        self.assertEqual(SchoolSummary.objects.get(school='a0B3').course_count, 1)
+
+        # Nothing changed, so nothing is refreshed
+        self.assertEqual(refresh_school_summaries(), (0, False))
+        save_transcript(self.second.id, [
+            {'course': 'c1', 'value': Decimal('2.00'), 'ag_designation': 'a', 'is_honors': False,
+             'course_length': 'Full Year'}])
+        self.assertEqual(refresh_school_summaries(), (1, False))
+        summary = SchoolSummary.objects.get(school='a0B1')
+        self.assertEqual((summary.graded_student_count, summary.mean_gpa), (2, 3.0))
+        invalidate_api_cache()
+        self.assertEqual(refresh_school_summaries(), (0, True))
+        self.assertEqual(refresh_school_summaries(full=True), (3, True))
+
+    def test_keeps_data_version_without_changes(self):
+        refresh_school_summaries()
+        version = get_data_version()
+        # Rereading the same courses keeps the data version, and with it every cached response
+        self.assertEqual(refresh_school_summaries(full=True), (3, True))
+        self.assertEqual(get_data_version(), version)
+        self.assertEqual(refresh_course_summaries(), version)
+        self.assertNotEqual(refresh_course_summaries(invalidate=True), version)
+        version = get_data_version()
+        self.values_list.return_value.iterator.side_effect = lambda **kwargs: iter([
+            ('a0B1', 'English', True, 'b', '2021-22')])
+        self.assertNotEqual(refresh_course_summaries(), version)
+        self.assertEqual(refresh_school_summaries(), (0, False))
+        self.assertEqual(SchoolSummary.objects.get(school='a0B1').latest_academic_year, '2021-22')
+        self.assertEqual(SchoolSubjectSummary.objects.get().honors_course_count, 1)
+
+    def test_refreshes_courses_once_without_summaries(self):
+        get_user_model().objects.all().delete()
+        self.values_list.return_value.iterator.side_effect = lambda **kwargs: iter([])
+        self.assertEqual(refresh_school_summaries(), (0, True))
+        # With no school to summarize, the refreshed data version is still recorded, so the courses are not reread
+        version = get_data_version()
+        self.assertEqual(refresh_school_summaries(), (0, False))
+        self.assertEqual(get_data_version(), version)
+        self.assertFalse(SchoolSummary.objects.exists())
+
+    def test_serves_summary(self):
+        refresh_school_summaries()
+        staff = get_user_model().objects.create_user(email='staff@user.com', password='foo', is_staff=True)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(
+            ClaimsTokenObtainPairSerializer.get_token(staff).access_token))
+        # The user is loaded, and the summary is read with its subjects
+        with self.assertNumQueries(3):
+            response = client.get('/api/schools/a0B1/summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['honors_course_share'], 0.3333)
+        self.assertEqual(response.json()['subjects'], [
+            {'subject': 'English', 'course_count': 1, 'honors_course_count': 0},
+            {'subject': 'Mathematics', 'course_count': 2, 'honors_course_count': 1}])
+        self.assertEqual(client.get('/api/schools/a0B9/summary/').status_code, 404)
+        # Staff status revoked after the token was issued takes effect at once
+        staff.is_staff = False
+        staff.save()
+        self.assertEqual(client.get('/api/schools/a0B1/summary/').status_code, 403)
+        client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(
+            ClaimsTokenObtainPairSerializer.get_token(self.first).access_token))
+        self.assertEqual(client.get('/api/schools/a0B1/summary/').status_code, 403)
+
+    def test_serves_course_stats(self):
+        self.assertEqual(get_course_stats(), {})
+        refresh_school_summaries()
+        stats = get_course_stats(['a0B1'])
+        self.assertEqual(stats, {'a0B1': {
+            'course_count': 3, 'honors_course_count': 1,
+            'ag_designations': {'a': 0, 'b': 1, 'c': 2, 'd': 0, 'e': 0, 'f': 0, 'g': 0},
+            'subjects': {'English': 1, 'Mathematics': 2}, 'latest_academic_year': '2020-21'}})
+        self.assertEqual(get_course_stats()['a0B3']['latest_academic_year'], '')
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(
+            ClaimsTokenObtainPairSerializer.get_token(self.first).access_token))
+        schools = [{'id': 'a0B1', 'name': 'First'}, {'id': 'a0B2', 'name': 'Second'}]
+        with mock.patch.object(SchoolViewSet, 'get_queryset') as get_queryset:
+            get_queryset.return_value.values.return_value = schools
+            self.values_list.reset_mock()
+            response = client.get('/api/schools/?include=course_stats')
+        # The statistics are read from the summaries, without reading any course
+        self.values_list.assert_not_called()
+        get_queryset.return_value.values.assert_called_once_with(*SchoolSerializer.Meta.fields)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0], dict(schools[0], course_stats=stats['a0B1']))
+        self.assertEqual(response.json()[1]['course_stats']['course_count'], 0)
+        self.assertEqual(client.get('/api/schools/?include=courses').status_code, 400)
+
+
+class FakeSalesforceClient:
+
+    def __init__(self, records):
+        self.records = records
+        self.queries = []
+
+    async def query(self, soql):
+        self.queries.append(soql)
+        return self.records
+
+
+# The async endpoints reach the cache from other threads, which cannot see the transaction of the test
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AsyncReadTests(TestCase):
+
+    def setUp(self):
+        invalidate_api_cache()
+        self.passed_on = []
+        user = get_user_model().objects.create_user(email='normal@user.com', password='foo')
+        self.authorization = b'Bearer ' + str(ClaimsTokenObtainPairSerializer.get_token(user).access_token).encode()
+
+        async def django_application(scope, receive, send):
+            self.passed_on.append(scope['path'])
+        self.application = AsyncReadApplication(django_application)
+
+    def request(self, path, headers=None):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+        headers = [(b'authorization', self.authorization)] if headers is None else headers
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'',
+                 'headers': [(b'host', b'testserver')] + headers}
+        asyncio.run(self.application(scope, None, send))
+        return messages
+
+    def test_lists_courses(self):
+        record = {'attributes': {'type': 'Course__c'}, 'Id': 'a0C000000000001AAA', 'Name': 'Calculus \u2013 "AB"',
+                  'High_School__c': 'a0B000000000001AAA', 'Is_Honors__c': True, 'Provider__c': None,
+                  'Academic_Years__c': '2019-20', 'Grade_Levels__c': '11;12', 'Course_Length__c': 'Full year',
+                  'Transcript_Abbs__c': 'CALC AB', 'Subject__c': 'Mathematics', 'AG_Designation__c': 'c',
+                  'External_ID__c': '75d5149b-fda1-53fc-9bf9-000000000001'}
+        self.application.salesforce = FakeSalesforceClient([record])
+        course = Course(id='a0C000000000001AAA', name='Calculus \u2013 "AB"', school_id='a0B000000000001AAA',
+                        is_honors=True, provider=None, academic_years='2019-20', grade_levels='11;12',
+                        course_length='Full year', transcript_abbs='CALC AB', subject='Mathematics', ag_designation='c',
+                        external_id='75d5149b-fda1-53fc-9bf9-000000000001')
+
+        start, body = self.request('/api/courses/')
+        self.assertEqual(start['status'], 200)
+        self.assertEqual(body['body'], JSONRenderer().render(CourseSerializer([course], many=True).data))
+        self.assertEqual(self.application.salesforce.queries, [
+            'SELECT Id, Name, High_School__c, Is_Honors__c, Provider__c, Academic_Years__c, Grade_Levels__c, '
+            'Course_Length__c, Transcript_Abbs__c, Subject__c, AG_Designation__c, External_ID__c FROM Course__c'])
+
+        # The response is cached, and revalidated with its ETag
+        etag = dict(start['headers'])[b'etag']
+        self.assertEqual(self.request('/api/courses/')[1]['body'], body['body'])
+        start, body = self.request('/api/courses/', [(b'authorization', self.authorization),
+                                                     (b'if-none-match', etag)])
+        self.assertEqual(start['status'], 304)
+        self.assertEqual(len(self.application.salesforce.queries), 1)
+
+    def test_retrieves_schools(self):
+        record = {'attributes': {'type': 'HighSchool__c'}, 'Id': 'a0B000000000001AAA', 'Name': 'Escuela Secundaria',
+                  'Institution_Type__c': 'Public', 'School_ID__c': '100000', 'City__c': 'San Jos\u00e9',
+                  'State__c': 'CA', 'Website_ID__c': 320.0}
+        self.application.salesforce = FakeSalesforceClient([record])
+        school = School(id='a0B000000000001AAA', name='Escuela Secundaria', institution_type='Public',
+                        school_id='100000', city='San Jos\u00e9', state='CA', website_id=320)
+        self.assertEqual(self.request('/api/schools/a0B000000000001AAA/')[1]['body'],
+                         JSONRenderer().render(SchoolSerializer(school).data))
+
+        # Schools that are not found, the browsable API, and requests without a token are all passed on to Django
+        self.application.salesforce = FakeSalesforceClient([])
+        self.request('/api/schools/a0B000000000002AAA/')
+        self.request('/api/schools/', [(b'authorization', self.authorization), (b'accept', b'text/html')])
+        self.request('/api/schools/', [])
+        self.assertEqual(self.passed_on, ['/api/schools/a0B000000000002AAA/', '/api/schools/', '/api/schools/'])
+        self.assertTrue(accepts_json('application/json, */*;q=0.8'))
+        self.assertFalse(accepts_json('application/json; indent=4'))
+
+    def test_passes_on_requests_to_redirect_or_failing(self):
+        class FailingSalesforceClient:
+            async def query(self, soql):
+                raise httpx.ConnectError("Connection refused")
+        # Reads that fail are passed on to Django, which reports the error
+        self.application.salesforce = FailingSalesforceClient()
+        self.request('/api/courses/')
+        self.assertEqual(self.passed_on, ['/api/courses/'])
+
+        record = {'attributes': {'type': 'HighSchool__c'}, 'Id': 'a0B000000000001AAA', 'Name': 'Escuela Secundaria',
+                  'Institution_Type__c': 'Public', 'School_ID__c': '100000', 'City__c': 'San Jose',
+                  'State__c': 'CA', 'Website_ID__c': 320.0}
+        with override_settings(SECURE_SSL_REDIRECT=True, SECURE_PROXY_SSL_HEADER=('HTTP_X_FORWARDED_PROTO', 'https'),
+                               SECURE_HSTS_SECONDS=3600):
+            self.application = AsyncReadApplication(self.application.application)
+            self.application.salesforce = FakeSalesforceClient([record])
+            # Requests over http are redirected to https by SecurityMiddleware in Django
+            self.request('/api/schools/')
+            self.assertEqual(self.passed_on, ['/api/courses/', '/api/schools/'])
+            start, body = self.request('/api/schools/', [(b'authorization', self.authorization),
+                                                         (b'x-forwarded-proto', b'https')])
+        self.assertEqual(start['status'], 200)
+        self.assertEqual(dict(start['headers'])[b'strict-transport-security'], b'max-age=3600')
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                pass
+
+            def execute(self, sql):
+                if connection.broken:
+                    raise OperationalError("server closed the connection unexpectedly")
+        return Cursor()
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(TestCase):
+
+    def test_pools_connections(self):
+        pool = ConnectionPool({'MAX_SIZE': 2, 'TIMEOUT': 0.05, 'HEALTH_CHECK_INTERVAL': 0})
+        first, second = pool.getconn(FakeConnection), pool.getconn(FakeConnection)
+        with self.assertRaises(OperationalError):
+            pool.getconn(FakeConnection)
+        self.assertEqual(pool.get_stats()['in_use'], 2)
+        self.assertEqual(pool.get_stats()['timeouts'], 1)
+
+        # Open transactions are rolled back, and the connection is reused
+        first.status = TRANSACTION_STATUS_INERROR
+        pool.putconn(first)
+        self.assertIs(pool.getconn(FakeConnection), first)
+        self.assertEqual(first.status, TRANSACTION_STATUS_IDLE)
+
+        # A connection dropped by the server fails its health check and is replaced
+        first.broken = True
+        pool.putconn(first)
+        replacement = pool.getconn(FakeConnection)
+        self.assertIsNot(replacement, first)
+        self.assertTrue(first.closed)
+
+        # Closed connections are not put back
+        second.close()
+        pool.putconn(second)
+        pool.putconn(replacement)
+        stats = pool.get_stats()
+        self.assertEqual((stats['size'], stats['idle'], stats['opened'], stats['discarded']), (1, 1, 3, 2))
+        self.assertEqual(stats['failed_health_checks'], 1)
+
+    def test_closes_pool(self):
+        first = get_pool('pooled', {'dbname': 'first'})
+        idle, in_use = first.getconn(FakeConnection), first.getconn(FakeConnection)
+        first.putconn(idle)
+        # Connecting to another database (such as the test database) closes the pool of the previous one
+        second = get_pool('pooled', {'dbname': 'second'})
+        self.assertIsNot(second, first)
+        self.assertTrue(idle.closed)
+        first.putconn(in_use)
+        self.assertTrue(in_use.closed)
+        self.assertEqual(first.get_stats()['size'], 0)
+
+        connection = second.getconn(FakeConnection)
+        second.putconn(connection)
+        close_pool('pooled')
+        self.assertTrue(connection.closed)
+        self.assertIsNot(get_pool('pooled', {'dbname': 'second'}), second)
+        close_pool('pooled')
+
+
+class FakeDriverCursor:
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+        self.rowcount = None
+        self.description = None
+
+    def execute(self, soql, args, query_all=False, tooling_api=False):
+        self.executed.append(soql)
+        self.rowcount = len(self.rows)
+        self.description = [('Id', None, None, None, 'Id')]
+        self.iterator = iter(self.rows)
+
+    def __iter__(self):
+        return self.iterator
+
+
+class SalesforceQueryCacheTests(TestCase):
+    databases = {'default', 'salesforce'}
+
+    def setUp(self):
+        get_query_cache().clear()
+
+    def execute(self, queryset, rows):
+        # The Salesforce session is never used, since the driver cursor is replaced before any query is sent
+        with mock.patch.object(Connection, 'sf_session', new_callable=mock.PropertyMock):
+            cursor = CachingCursorWrapper(connections['salesforce'])
+        cursor.cursor = FakeDriverCursor(rows)
+        cursor.prepare_query(queryset.query)
+        cursor.execute(*queryset.query.get_compiler('salesforce').as_sql())
+        return (cursor.fetchall(), cursor.cursor.executed)
+
+    def test_caches_until_written(self):
+        queryset = Course.objects.filter(school__city='San Jose').values_list('id', 'name')
+        rows = [['a0C000000000001AAA', 'Algebra 1'], ['a0C000000000002AAA', 'Geometry']]
+        self.assertEqual(self.execute(queryset, rows), (rows, [
+            'SELECT Course__c.Id, Course__c.Name FROM Course__c WHERE Course__c.High_School__r.City__c = %s']))
+        self.assertEqual(self.execute(queryset, rows), (rows, []))
+
+        # Writing either of the objects read by the query invalidates it
+        invalidate_objects(['HighSchool__c'])
+        self.assertEqual(len(self.execute(queryset, rows)[1]), 1)
+        self.assertEqual(get_query_cache_stats()['api.Course']['hits'], 1)
+        self.assertEqual(get_query_cache_stats()['api.Course']['misses'], 2)
+
+        with override_settings(SALESFORCE_QUERY_CACHE_MAX_ROWS=1):
+            invalidate_objects(['Course__c'])
+            self.assertEqual(self.execute(queryset, rows), (rows, mock.ANY))
+            self.assertEqual(len(self.execute(queryset, rows)[1]), 1)
@@ -3,12 +3,13 @@ Summary:
     Represents the necessary url addresses for the public endpoints of this backend framework. This is primarily
     achieved through the Django REST framework default router class.
 """
-from django.urls import path
+from django.urls import path, re_path
 
 from rest_framework import routers
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
+from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
 
-from .views import SchoolViewSet, CourseViewSet, SchoolCoursesViewSet, CreateUserViewSet
+from .views import SchoolViewSet, CourseViewSet, SchoolCoursesViewSet, CreateUserViewSet, ExportView, \
+    ClaimsTokenObtainPairView, DatabaseHealthView, GradeViewSet
 
 # Initialize and register routes through the default router
 router = routers.SimpleRouter()
@@ -16,10 +17,15 @@ router.register(r'courses', CourseViewSet)
 router.register(r'schools', SchoolViewSet)
 router.register(r'schoolcourses', SchoolCoursesViewSet)
 router.register(r'createuser', CreateUserViewSet)
+router.register(r'grades', GradeViewSet)
 
 # Add token endpoint manually
 urlpatterns = [
-    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('token/', ClaimsTokenObtainPairView.as_view(), name='token_obtain_pair'),
+    # Streams a full table, such as export/courses.ndjson or export/schools.json
+    re_path(r'^export/(?P<table>courses|schools)\.(?P<export_format>ndjson|json)$', ExportView.as_view(),
+            name='export'),
+    path('health/db/', DatabaseHealthView.as_view(), name='database_health'),
 ]
 
 # Add all router-generated urls to urlpatterns
@@ -3,18 +3,38 @@ Summary:
     Represents the necessary viewset classes for this backend framework. These classes represent the available
     endpoints for interacting with the backend.
 """
-from django.shortcuts import render
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import DatabaseError, connection
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth import get_user_model
 
 from rest_framework import viewsets
 from rest_framework import mixins
-from rest_framework.permissions import AllowAny # TODO: Add IsAdminUser when ready to create the GradeView class
-# TODO: Add the below dependencies when ready to create the GradeView class
-# from rest_framework.authentication import SessionAuthentication, BasicAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.generics import ListCreateAPIView, CreateAPIView
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.views import TokenObtainPairView
 
-from .models import School, Course
-from .serializers import SchoolSerializer, CourseSerializer, SchoolCoursesSerializer, UserSerializer
+from .ag_progress import get_cohort_progress, get_user_progress
+from .authentication import JWTClaimsAuthentication
+from .caching import CachedResponseMixin, get_data_version
+from .grades import delete_grades
+from .pooling import get_pool_stats
+from .salesforce_cache import get_query_cache_stats
+from .search import get_course_index
+from .summaries import get_course_stats
+from .renderers import ValuesListMixin, stream_ndjson, stream_json_array
+from .models import School, Course, Grade, UserStatistics, SchoolSummary, SchoolSubjectSummary
+from .serializers import SchoolSerializer, CourseSerializer, SchoolCoursesSerializer, UserSerializer, \
+    ClaimsTokenObtainPairSerializer, GradeSerializer, UserStatisticsSerializer, SchoolSummarySerializer, \
+    SchoolCourseStatsSerializer
 
 # class CreateUserViewSet(viewsets.ModelViewSet):
 class CreateUserViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
@@ -26,40 +46,243 @@ class CreateUserViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
     permission_classes = [AllowAny]
     serializer_class = UserSerializer
 
-class SchoolCoursesViewSet(viewsets.ReadOnlyModelViewSet):
+class ClaimsTokenObtainPairView(TokenObtainPairView):
+    """
+    Summary:
+        Represents the view for obtaining a pair of tokens, whose access token carries the claims of the user.
+    """
+    serializer_class = ClaimsTokenObtainPairSerializer
+
+# The file recording the data version of the snapshots, collected along with them
+SNAPSHOT_VERSION_NAME = 'snapshots/version.txt'
+
+def get_snapshot_version():
+    """
+    Summary:
+        Returns the data version that the collected snapshots were rendered for (see the render_school_snapshots
+        command).
+
+    Returns:
+        string: The data version, or None if no snapshots were collected.
+    """
+    try:
+        with staticfiles_storage.open(SNAPSHOT_VERSION_NAME) as f:
+            return f.read().decode('utf-8').strip()
+    except OSError:
+        return None
+
+def get_school_snapshot_url(school_id):
+    """
+    Summary:
+        Returns the static URL of the pre-rendered course list of a school (see the render_school_snapshots command).
+        Snapshots rendered before the data last changed are not served.
+
+    Args:
+        school_id (string): The Salesforce ID of the school.
+
+    Returns:
+        string: The URL of the snapshot, or None if the school has no snapshot that can be served.
+    """
+    if not school_id.isalnum() or get_snapshot_version() != get_data_version():
+        return None
+    name = 'snapshots/schoolcourses/' + school_id + '.json'
+    if not staticfiles_storage.exists(name):
+        return None
+    try:
+        return staticfiles_storage.url(name)
+    except ValueError:
+        # The snapshot was collected after this process started, so it is not yet in the loaded manifest
+        return None
+
+class SchoolCoursesViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """
     Summary:
         Represents a Model viewset for the School model (course list only). Provides read-only operations for school
-        course lists.
+        course lists. Responses are cached until the data changes (see caching.py).
     """
     queryset = School.objects.all()
     serializer_class = SchoolCoursesSerializer
+    authentication_classes = [JWTClaimsAuthentication]
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Summary:
+            Redirects to the static snapshot of the school's course list, which WhiteNoise serves compressed and with
+            long cache headers (and without authentication), falling back to rendering the course list if the school
+            has no snapshot of the current data version.
+        """
+        if settings.SERVE_SCHOOL_SNAPSHOTS:
+            snapshot_url = get_school_snapshot_url(kwargs['pk'])
+            if snapshot_url:
+                return redirect(snapshot_url)
+        return super().retrieve(request, *args, **kwargs)
 
-class SchoolViewSet(viewsets.ReadOnlyModelViewSet):
+class SchoolViewSet(CachedResponseMixin, ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     """
     Summary:
         Represents a Model viewset for the School model. Provides read-only operations for School instances.
+        Responses are cached until the data changes (see caching.py), and lists are rendered straight from the
+        database rows (see renderers.py). With ?include=course_stats, each school also carries the course statistics
+        precomputed in its summary (see summaries.py), which are read without aggregating any courses.
     """
     queryset = School.objects.all()
     serializer_class = SchoolSerializer
+    authentication_classes = [JWTClaimsAuthentication]
+    includes = ['course_stats']
+
+    def get_includes(self):
+        includes = set(filter(None, self.request.query_params.get('include', '').split(',')))
+        unknown = includes - set(self.includes)
+        if unknown:
+            raise ValidationError({'include': 'Unknown values: ' + ', '.join(sorted(unknown)) + '.'})
+        return includes
+
+    def _includes_course_stats(self):
+        return self.action in ('list', 'retrieve') and 'course_stats' in self.get_includes()
+
+    def get_serializer_class(self):
+        return SchoolCourseStatsSerializer if self._includes_course_stats() else super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self._includes_course_stats():
+            context['course_stats'] = get_course_stats([self.kwargs['pk']] if self.action == 'retrieve' else None)
+        return context
+
+    def get_values(self, queryset):
+        course_stats = get_course_stats() if self._includes_course_stats() else None
+        rows = list(queryset.values(*SchoolSerializer.Meta.fields))
+        if course_stats is not None:
+            for row in rows:
+                row['course_stats'] = course_stats.get(row['id'])
+        return rows
+
+    # Staff actions load the user, rather than trusting the claims of a token that may have been issued long ago
+    @action(detail=True, permission_classes=[IsAdminUser], authentication_classes=[JWTAuthentication])
+    def progress(self, request, pk=None):
+        """
+        Summary:
+            Reports the A-G progress of every student of the school (see ag_progress.py), for staff users only.
+        """
+        user_ids = get_user_model().objects.filter(school=pk).values_list('id', flat=True)
+        return Response(get_cohort_progress(list(user_ids)))
 
-class CourseViewSet(viewsets.ReadOnlyModelViewSet):
+    @action(detail=True, permission_classes=[IsAdminUser], authentication_classes=[JWTAuthentication])
+    def summary(self, request, pk=None):
+        """
+        Summary:
+            Returns the precomputed statistics of the school (see summaries.py), for staff users only. Responds with
+            404 Not Found until the school has been summarized.
+        """
+        summaries = SchoolSummary.objects.prefetch_related(
+            Prefetch('subjects', queryset=SchoolSubjectSummary.objects.order_by('subject')))
+        return Response(SchoolSummarySerializer(get_object_or_404(summaries, pk=pk)).data)
+
+class CourseViewSet(CachedResponseMixin, ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     """
     Summary:
         Represents a Model viewset for the Course model. Provides read-only operations for Course instances.
+        Responses are cached until the data changes (see caching.py), and lists are rendered straight from the
+        database rows (see renderers.py).
     """
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
+    authentication_classes = [JWTClaimsAuthentication]
+    max_search_limit = 100
 
-"""
-TODO: Implement grade class-based view that extends the ListCreateAPIView, as shown below:
+    @action(detail=False)
+    def search(self, request):
+        """
+        Summary:
+            Searches the names and transcript abbreviations of courses (see search.py), optionally within a school,
+            returning the best matches first.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This query parameter is required.'})
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+        if not 1 <= limit <= self.max_search_limit:
+            raise ValidationError({'limit': 'Must be between 1 and ' + str(self.max_search_limit) + '.'})
+        results = get_course_index().search(query, request.query_params.get('school') or None, limit)
+        return HttpResponse(b'[' + b','.join(results) + b']', content_type='application/json')
+
+class ExportView(APIView):
+    """
+    Summary:
+        Streams every Course or School instance as newline-delimited JSON or as a JSON array, for clients that need the
+        full catalogue (such as an offline cache). Rows are read from Salesforce one query page at a time and written
+        out as they arrive, so memory use stays constant however large the table is. Each row is rendered exactly as by
+        the corresponding list endpoint.
+    """
+    # Salesforce returns at most 2000 records per query page
+    chunk_size = 2000
+    tables = {
+        'courses': (Course, CourseSerializer),
+        'schools': (School, SchoolSerializer)
+    }
+
+    def get(self, request, table, export_format):
+        if table not in self.tables:
+            raise Http404
+        model, serializer_class = self.tables[table]
+        rows = model.objects.values(*serializer_class.Meta.fields).iterator(chunk_size=self.chunk_size)
+        if export_format == 'ndjson':
+            response = StreamingHttpResponse(stream_ndjson(rows, self.chunk_size), content_type='application/x-ndjson')
+        else:
+            response = StreamingHttpResponse(stream_json_array(rows, self.chunk_size), content_type='application/json')
+        response['Content-Disposition'] = 'attachment; filename="' + table + '.' + export_format + '"'
+        return response
+
+class DatabaseHealthView(APIView):
+    """
+    Summary:
+        Reports whether Postgres answers a query, along with the connection pool statistics (see pooling.py) and
+        Salesforce query cache counters (see salesforce_cache.py) of the process that served the request, for staff
+        users only. Responds with 503 Service Unavailable if Postgres is down.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            healthy = True
+        except DatabaseError:
+            healthy = False
+        return Response({'healthy': healthy, 'pools': get_pool_stats(), 'salesforce_cache': get_query_cache_stats()},
+                        status=200 if healthy else 503)
 
-class GradeView(ListCreateAPIView):
+class GradeViewSet(mixins.ListModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Summary:
+        Represents a viewset for the grades of the requesting user. A whole transcript is created or updated with a
+        single POST of a list of grades, and the statistics of the user (see UserStatistics) are kept up to date with
+        every write, so that they are read without touching the grades. The A-G progress of the user is computed from
+        their grades on request (see ag_progress.py).
+    """
     queryset = Grade.objects.all()
     serializer_class = GradeSerializer
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
-    permission_classes = [IsAdminUser]
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
-"""
+    def get_queryset(self):
+        return super().get_queryset().filter(user_id=self.request.user.id).order_by('course')
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=201)
+
+    def perform_destroy(self, instance):
+        delete_grades(self.request.user.id, [instance])
+
+    @action(detail=False)
+    def progress(self, request):
+        return Response(get_user_progress(request.user.id))
+
+    @action(detail=False)
+    def statistics(self, request):
+        statistics = UserStatistics.objects.filter(user_id=request.user.id).first()
+        return Response(UserStatisticsSerializer(statistics or UserStatistics(user_id=request.user.id)).data)
@@ -0,0 +1,268 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from html import escape
+import threading
+import json
+import os
+import re
+
+# The markup below mirrors the elements (and exact class attributes) that ScraperWorker searches for on the live A-G
+# Course List website. Clicking a year button only rewrites the URL, as on the live single-page application, so that
+# the clicked button does not become stale.
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<title>A-G Course List</title>
+<style>.expand-in {{ display: none; }} .expand-in.show {{ display: block; }}</style>
+</head>
+<body>
+{institution}
+<script>
+function selectYear(button, academicYearId) {{
+  var buttons = document.querySelectorAll("div.gridButtonMain button");
+  for (var i = 0; i < buttons.length; i++) {{
+    buttons[i].className = "btn";
+  }}
+  button.className = "btn btnActive";
+  history.replaceState(null, "", location.pathname.split(";")[0] + ";academicYearId=" + academicYearId);
+}}
+function openCourse(title) {{
+  title.parentNode.querySelector("div.expand-in").className = "expand-in show";
+}}
+function closeCourse(link) {{
+  link.parentNode.className = "expand-in";
+}}
+</script>
+</body>
+</html>
+"""
+
+INSTITUTION_TEMPLATE = """<div class="instInfo">
+<h5 class="instName">{name}</h5>
+<span class="instGovBadge">{institution_type}</span>
+<span class="instATPcodeBadge">{school_id}</span>
+<div class="subInstInfo"><div class="font-italic">{city}, {state}</div></div>
+</div>
+<div class="gridButtonMain">{buttons}</div>
+<div class="listLastUpdated">Last Updated: {last_updated}</div>
+<div id="search-results">{rows}</div>"""
+
+BUTTON_TEMPLATE = """<button class="{button_class}" onclick="selectYear(this, {academic_id})">{label}</button>"""
+
+ROW_TEMPLATE = """<div class="grid-row">
+<div class="resultsDiscipline">{subject}</div>
+<div class="resultsCourseTitle" onclick="openCourse(this)">{title}</div>
+<div class="expand-in">
+<a href="#" onclick="closeCourse(this); return false;">Close</a>
+<div class="subjectLine muted"><span>{ag_designation}</span> {subject}</div>
+{honors}
+<div class="font-italic">{provider}</div>
+<div class="academicYearOffered">{academic_years}</div>
+<div class="gradeLevel">{grade_levels}</div>
+<div class="yearLocationLine muted"><span>{course_length},</span><span>Classroom based</span></div>
+<div class="transcriptPod"><ul>{transcript_abbs}</ul></div>
+</div>
+</div>"""
+
+INSTITUTION_PATH = re.compile(r"^/agcourselist/institution/(\d+)(?:;academicYearId=(\d+))?$")
+
+def load_institutions(filepath=None):
+  """
+  Summary:
+      Loads the recorded institution data used to render school course pages.
+
+  Args:
+      filepath (string, optional): The path of the JSON file containing the recorded data. Defaults to None, which
+                                   corresponds with data/institutions.json.
+
+  Returns:
+      dict: The recorded data, of the form {"first_website_id": int, "institutions": [dict or None, ...]}.
+  """
+  if not filepath:
+    filepath = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data", "institutions.json")
+  with open(filepath) as f:
+    return json.load(f)
+
+class AGCourseListServer(ThreadingHTTPServer):
+  """
+  Summary:
+      A local HTTP server that replays recorded A-G Course List institution pages, including multiple academic years
+      per school and invalid website IDs, so that the scraper can be benchmarked without visiting the live website.
+      The recorded institutions are repeated cyclically past the end of the recording, with unique school IDs, so that
+      a benchmark can visit any number of school course pages.
+
+  Organization:
+      Tufts Code For Good: The Village Method Project
+  """
+  daemon_threads = True
+
+  def __init__(self, data, port=0):
+    """
+    Summary:
+        Initializes an AGCourseListServer object bound to localhost.
+
+    Args:
+        data (dict): The recorded data returned by load_institutions.
+        port (int, optional): The port to listen on. Defaults to 0, which picks any free port.
+
+    Fields:
+        _data (dict): The recorded data used to render school course pages.
+        _num_requests (int): The number of institution pages that have been served.
+        _lock (Lock): Guards _num_requests, as requests are handled by multiple threads.
+    """
+    super().__init__(("127.0.0.1", port), _AGCourseListHandler)
+    self._data = data
+    self._num_requests = 0
+    self._lock = threading.Lock()
+
+  def get_website_address(self):
+    """
+    Summary:
+        Returns the partially complete address of an institution page on this server, for use by ScraperWorker.
+
+    Returns:
+        string: The address, which requires a website ID to be completed.
+    """
+    return "http://127.0.0.1:" + str(self.server_address[1]) + "/agcourselist/institution/"
+
+  def get_website_ids(self, repeat=1):
+    """
+    Summary:
+        Returns the first and last website IDs covering the recorded institutions the given number of times.
+
+    Args:
+        repeat (int, optional): The number of times to cover the recorded institutions. Defaults to 1.
+
+    Returns:
+        tuple: A tuple pair of the form (first_website_id, last_website_id).
+    """
+    first_website_id = self._data['first_website_id']
+    return (first_website_id, first_website_id + len(self._data['institutions']) * repeat - 1)
+
+  def get_num_requests(self):
+    """
+    Summary:
+        Returns the number of institution pages that have been served.
+
+    Returns:
+        int: The number of institution pages that have been served.
+    """
+    with self._lock:
+      return self._num_requests
+
+  def count_request(self):
+    """
+    Summary:
+        Increments the number of institution pages that have been served.
+    """
+    with self._lock:
+      self._num_requests += 1
+
+  def get_institution(self, website_id):
+    """
+    Summary:
+        Returns the recorded institution for a website ID, giving each repetition of the recording unique school IDs.
+
+    Args:
+        website_id (int): The website ID requested.
+
+    Returns:
+        dict: The recorded institution, or None if the website ID is not a valid institution page.
+    """
+    offset = website_id - self._data['first_website_id']
+    if offset < 0:
+      return None
+    institutions = self._data['institutions']
+    cycle, index = divmod(offset, len(institutions))
+    institution = institutions[index]
+    if institution is None or cycle == 0:
+      return institution
+    institution = dict(institution)
+    institution['school_id'] = "{:06d}".format((int(institution['school_id']) + cycle * 1000) % 1000000)
+    institution['name'] = institution['name'] + " " + str(cycle + 1)
+    return institution
+
+  def render_page(self, website_id, academic_id):
+    """
+    Summary:
+        Renders the school course page for a website ID and academic year. Like the live website, an academic year
+        that the school does not have is rendered as its most recent year.
+
+    Args:
+        website_id (int): The website ID requested.
+        academic_id (int): The academic year ID requested, or None for the most recent year.
+
+    Returns:
+        string: The HTML of the school course page.
+    """
+    institution = self.get_institution(website_id)
+    if institution is None:
+      return PAGE_TEMPLATE.format(institution="")
+
+    academic_years = institution['academic_years']
+    year_ids = sorted(int(year_id) for year_id in academic_years)
+    if academic_id not in year_ids:
+      academic_id = year_ids[-1]
+
+    buttons = "".join(BUTTON_TEMPLATE.format(button_class="btn btnActive" if year_id == academic_id else "btn",
+                                             academic_id=year_id, label=academic_years[str(year_id)]['label'])
+                      for year_id in year_ids)
+    rows = "".join(self._render_row(course, academic_years) for course in institution['courses']
+                   if academic_id in course['academic_year_ids'])
+    return PAGE_TEMPLATE.format(institution=INSTITUTION_TEMPLATE.format(
+        name=escape(institution['name']),
+        institution_type=escape(institution['institution_type']),
+        school_id=escape(institution['school_id']),
+        city=escape(institution['city']),
+        state=escape(institution['state']),
+        buttons=buttons,
+        last_updated=academic_years[str(academic_id)]['last_updated'],
+        rows=rows))
+
+  def _render_row(self, course, academic_years):
+    """
+    Summary:
+        Renders the course listing (and its expandable details) for one course.
+
+    Args:
+        course (dict): The recorded course.
+        academic_years (dict): The recorded academic years of the course's school.
+
+    Returns:
+        string: The HTML of the course listing.
+    """
+    offered = "".join("<span class=\"{}\">{}</span>".format("" if int(year_id) in course['academic_year_ids']
+                                                            else "notOffered", year['label'])
+                      for year_id, year in sorted(academic_years.items()))
+    return ROW_TEMPLATE.format(
+        subject=escape(course['subject']),
+        title=escape(course['title']),
+        ag_designation=course['ag_designation'],
+        honors="<div class=\"honors\">UC Honors</div>" if course['is_honors'] else "",
+        provider=escape(course['provider']),
+        academic_years=offered,
+        grade_levels="".join("<span>" + grade + "</span>" for grade in course['grade_levels']),
+        course_length=course['course_length'],
+        transcript_abbs="".join("<li>" + escape(abb) + "</li>" for abb in course['transcript_abbs']))
+
+class _AGCourseListHandler(BaseHTTPRequestHandler):
+  """
+  Summary:
+      Handles requests for institution pages on an AGCourseListServer. Any other path returns a 404 response.
+  """
+
+  def do_GET(self):
+    match = INSTITUTION_PATH.match(self.path)
+    if not match:
+      self.send_error(404)
+      return
+    self.server.count_request()
+    academic_id = int(match.group(2)) if match.group(2) else None
+    body = self.server.render_page(int(match.group(1)), academic_id).encode("utf-8")
+    self.send_response(200)
+    self.send_header("Content-Type", "text/html; charset=utf-8")
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, format, *args):
+    pass
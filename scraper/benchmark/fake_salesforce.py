@@ -0,0 +1,347 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from datetime import datetime, timezone
+import itertools
+import threading
+import json
+import re
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+QUERY_PATH = re.compile(r"^/services/data/v[\d.]+/query/?$")
+UPSERT_PATH = re.compile(r"^/services/data/v[\d.]+/sobjects/(\w+)/(\w+)/([^/]+)$")
+JOB_PATH = re.compile(r"^/services/async/[\d.]+/job(?:/(\w+))?$")
+BATCH_PATH = re.compile(r"^/services/async/[\d.]+/job/(\w+)/batch(?:/(\w+)(/result)?)?$")
+SOQL = re.compile(r"^SELECT (.+?) FROM (\w+)(?: WHERE (\w+) = '([^']*)')?$", re.IGNORECASE)
+
+class _HttpsToHttpAdapter(HTTPAdapter):
+  """
+  Summary:
+      Transport adapter that sends requests addressed to https://host:port over plain HTTP, since simple_salesforce
+      always builds https URLs for its instance.
+  """
+
+  def send(self, request, **kwargs):
+    request.url = "http://" + request.url[len("https://"):]
+    return super().send(request, **kwargs)
+
+class FakeSalesforceServer(ThreadingHTTPServer):
+  """
+  Summary:
+      A local, in-memory stand-in for the subset of the Salesforce REST and Bulk APIs used by the scraper: SOQL queries
+      of the form "SELECT fields FROM object [WHERE field = 'value']", upserts by external ID, and JSON bulk jobs. It
+      allows the scraper to be benchmarked without touching The Village Method's Salesforce database.
+
+  Organization:
+      Tufts Code For Good: The Village Method Project
+  """
+  daemon_threads = True
+
+  def __init__(self, port=0, latency=0.0):
+    """
+    Summary:
+        Initializes a FakeSalesforceServer object bound to localhost.
+
+    Args:
+        port (int, optional): The port to listen on. Defaults to 0, which picks any free port.
+        latency (float, optional): The number of seconds to wait before answering each request, to approximate the
+                                   round trip to Salesforce. Defaults to 0.0.
+
+    Fields:
+        _records (dict): Maps each object name to a dictionary mapping record IDs to records.
+        _external_ids (dict): Maps each (object name, external ID field, external ID) triple to a record ID.
+        _jobs (dict): Maps each bulk job ID to its job description.
+        _batches (dict): Maps each bulk batch ID to its list of results.
+        _ids (iterator): Generates unique record, job, and batch IDs.
+        _num_requests (int): The number of requests that have been served.
+        _lock (Lock): Guards every field above, as requests are handled by multiple threads.
+    """
+    super().__init__(("127.0.0.1", port), _FakeSalesforceHandler)
+    self.latency = latency
+    self._records = {}
+    self._external_ids = {}
+    self._jobs = {}
+    self._batches = {}
+    self._ids = itertools.count(1)
+    self._num_requests = 0
+    self._lock = threading.Lock()
+
+  def get_sf_options(self):
+    """
+    Summary:
+        Returns the keyword arguments used to create a simple_salesforce Salesforce instance connected to this server.
+
+    Returns:
+        dict: The keyword arguments to pass to the Salesforce constructor.
+    """
+    instance = "127.0.0.1:" + str(self.server_address[1])
+    session = Session()
+    session.mount("https://" + instance + "/", _HttpsToHttpAdapter())
+    return {'instance': instance, 'session_id': "benchmark", 'session': session}
+
+  def get_num_requests(self):
+    """
+    Summary:
+        Returns the number of requests that have been served.
+
+    Returns:
+        int: The number of requests that have been served.
+    """
+    with self._lock:
+      return self._num_requests
+
+  def get_records(self, object_name):
+    """
+    Summary:
+        Returns a copy of every record stored for an object.
+
+    Args:
+        object_name (string): The API name of the object, such as "Course__c".
+
+    Returns:
+        list: The stored records.
+    """
+    with self._lock:
+      return [dict(record) for record in self._records.get(object_name, {}).values()]
+
+  def count_request(self):
+    """
+    Summary:
+        Increments the number of requests that have been served.
+    """
+    with self._lock:
+      self._num_requests += 1
+
+  def _new_id(self, prefix):
+    """
+    Summary:
+        Generates a unique 18 character ID in the format used by Salesforce. Must be called while holding self._lock.
+
+    Args:
+        prefix (string): The key prefix of the ID, which identifies the type of object.
+
+    Returns:
+        string: The new ID.
+    """
+    return prefix + str(next(self._ids)).zfill(18 - len(prefix))
+
+  def query(self, soql):
+    """
+    Summary:
+        Answers a SOQL query of the form "SELECT fields FROM object [WHERE field = 'value']".
+
+    Args:
+        soql (string): The SOQL query.
+
+    Returns:
+        dict: The query response, in the format returned by the REST API.
+    """
+    match = SOQL.match(soql.strip())
+    if not match:
+      raise ValueError("Unsupported SOQL query: " + soql)
+    fields = [field.strip() for field in match.group(1).split(",")]
+    with self._lock:
+      records = [record for record in self._records.get(match.group(2), {}).values()
+                 if not match.group(3) or str(record.get(match.group(3))) == match.group(4)]
+      records = [{field: record.get(field) for field in fields} for record in records]
+    return {'totalSize': len(records), 'done': True, 'records': records}
+
+  def upsert(self, object_name, external_id_field, external_id, data):
+    """
+    Summary:
+        Updates the record with the given external ID, or inserts a new record if no such record is found.
+
+    Args:
+        object_name (string): The API name of the object, such as "Course__c".
+        external_id_field (string): The API name of the external ID field.
+        external_id (string): The value of the external ID.
+        data (dict): The field values of the record.
+
+    Returns:
+        tuple: A tuple pair containing the record ID and whether the record was created.
+    """
+    with self._lock:
+      records = self._records.setdefault(object_name, {})
+      key = (object_name, external_id_field, external_id)
+      created = key not in self._external_ids
+      if created:
+        record = {'Id': self._new_id("a0")}
+        records[record['Id']] = record
+        self._external_ids[key] = record['Id']
+      record = records[self._external_ids[key]]
+      record.update(data)
+      record[external_id_field] = external_id
+      record['LastModifiedDate'] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+      return (record['Id'], created)
+
+  def insert(self, object_name, data):
+    """
+    Summary:
+        Inserts a new record.
+
+    Args:
+        object_name (string): The API name of the object, such as "Course__c".
+        data (dict): The field values of the record.
+
+    Returns:
+        tuple: A tuple pair containing the record ID and whether the record was created (always True).
+    """
+    with self._lock:
+      record = dict(data, Id=self._new_id("a0"))
+      record['LastModifiedDate'] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+      self._records.setdefault(object_name, {})[record['Id']] = record
+      return (record['Id'], True)
+
+  def create_job(self, job):
+    """
+    Summary:
+        Opens a new bulk job.
+
+    Args:
+        job (dict): The job description sent by the client.
+
+    Returns:
+        dict: The job description, in the format returned by the Bulk API.
+    """
+    with self._lock:
+      job = dict(job, id=self._new_id("750"), state="Open")
+      self._jobs[job['id']] = job
+      return job
+
+  def close_job(self, job_id):
+    """
+    Summary:
+        Closes a bulk job.
+
+    Args:
+        job_id (string): The ID of the bulk job to close.
+
+    Returns:
+        dict: The job description, in the format returned by the Bulk API.
+    """
+    with self._lock:
+      self._jobs[job_id]['state'] = "Closed"
+      return self._jobs[job_id]
+
+  def add_batch(self, job_id, records):
+    """
+    Summary:
+        Processes a bulk batch immediately, upserting or inserting each record.
+
+    Args:
+        job_id (string): The ID of the bulk job the batch belongs to.
+        records (list): The records in the batch.
+
+    Returns:
+        dict: The batch description, in the format returned by the Bulk API.
+    """
+    with self._lock:
+      job = self._jobs[job_id]
+    results = []
+    for record in records:
+      external_id_field = job.get('externalIdFieldName')
+      if external_id_field:
+        data = {field: value for field, value in record.items() if field != external_id_field}
+        record_id, created = self.upsert(job['object'], external_id_field, str(record[external_id_field]), data)
+      else:
+        record_id, created = self.insert(job['object'], record)
+      results.append({'success': True, 'created': created, 'id': record_id, 'errors': []})
+    with self._lock:
+      batch_id = self._new_id("751")
+      self._batches[batch_id] = results
+    return {'id': batch_id, 'jobId': job_id, 'state': "Completed", 'numberRecordsProcessed': len(results)}
+
+  def get_batch(self, job_id, batch_id):
+    """
+    Summary:
+        Returns the status of a bulk batch, which is always completed since batches are processed immediately.
+
+    Args:
+        job_id (string): The ID of the bulk job the batch belongs to.
+        batch_id (string): The ID of the batch.
+
+    Returns:
+        dict: The batch description, in the format returned by the Bulk API.
+    """
+    with self._lock:
+      return {'id': batch_id, 'jobId': job_id, 'state': "Completed",
+              'numberRecordsProcessed': len(self._batches[batch_id])}
+
+  def get_batch_results(self, batch_id):
+    """
+    Summary:
+        Returns the result of each record in a bulk batch.
+
+    Args:
+        batch_id (string): The ID of the batch.
+
+    Returns:
+        list: The result of each record, in the format returned by the Bulk API.
+    """
+    with self._lock:
+      return self._batches[batch_id]
+
+class _FakeSalesforceHandler(BaseHTTPRequestHandler):
+  """
+  Summary:
+      Routes REST and Bulk API requests to a FakeSalesforceServer.
+  """
+
+  def _send_json(self, status, payload=None):
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    self.send_response(status)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def _read_json(self):
+    length = int(self.headers.get("Content-Length") or 0)
+    return json.loads(self.rfile.read(length) or b"null")
+
+  def _handle(self, method):
+    self.server.count_request()
+    if self.server.latency:
+      threading.Event().wait(self.server.latency)
+    url = urlparse(self.path)
+    try:
+      match = QUERY_PATH.match(url.path)
+      if method == "GET" and match:
+        return self._send_json(200, self.server.query(parse_qs(url.query)['q'][0]))
+
+      match = UPSERT_PATH.match(url.path)
+      if method == "PATCH" and match:
+        record_id, created = self.server.upsert(match.group(1), match.group(2), match.group(3), self._read_json())
+        if created:
+          return self._send_json(201, {'id': record_id, 'success': True, 'errors': []})
+        return self._send_json(204)
+
+      match = BATCH_PATH.match(url.path)
+      if match and method == "POST":
+        return self._send_json(201, self.server.add_batch(match.group(1), self._read_json()))
+      if match and method == "GET" and match.group(3):
+        return self._send_json(200, self.server.get_batch_results(match.group(2)))
+      if match and method == "GET":
+        return self._send_json(200, self.server.get_batch(match.group(1), match.group(2)))
+
+      match = JOB_PATH.match(url.path)
+      if match and method == "POST" and not match.group(1):
+        return self._send_json(201, self.server.create_job(self._read_json()))
+      if match and method == "POST":
+        return self._send_json(200, self.server.close_job(match.group(1)))
+    except (KeyError, ValueError) as e:
+      return self._send_json(400, [{'errorCode': "MALFORMED_QUERY", 'message': str(e)}])
+    return self._send_json(404, [{'errorCode': "NOT_FOUND", 'message': "The requested resource does not exist"}])
+
+  def do_GET(self):
+    self._handle("GET")
+
+  def do_POST(self):
+    self._handle("POST")
+
+  def do_PATCH(self):
+    self._handle("PATCH")
+
+  def log_message(self, format, *args):
+    pass
@@ -0,0 +1,127 @@
+from argparse import ArgumentParser
+import tracemalloc
+import json
+
+from records import Course
+from benchmark.ag_server import load_institutions
+
+def _copy(string):
+  """
+  Summary:
+      Returns a new string object equal to the given string, as Selenium returns a new string for every element read.
+
+  Args:
+      string (string): The string to copy.
+
+  Returns:
+      string: The new string object.
+  """
+  return string.encode("utf-8").decode("utf-8")
+
+def _load_scraped_values():
+  """
+  Summary:
+      Returns the field values of every course in the recorded institutions, in the form read from the page by
+      ScraperWorker.
+
+  Returns:
+      list: A tuple of field values for each recorded course.
+  """
+  values = []
+  for institution in load_institutions()['institutions']:
+    if not institution:
+      continue
+    for course in institution['courses']:
+      academic_years = [institution['academic_years'][str(academic_id)]['label']
+                        for academic_id in course['academic_year_ids']]
+      values.append((course['title'], "a0B000000000001AAA", academic_years, course['is_honors'], course['provider'],
+                     course['grade_levels'], course['course_length'], course['transcript_abbs'], course['subject'],
+                     course['ag_designation']))
+  return values
+
+def _create_dict(name, school_sf_id, academic_years, is_honors, provider, grade_levels, course_length, transcript_abbs,
+  subject, ag_designation):
+  """
+  Summary:
+      Creates the dictionary representation of a course that ScraperWorker kept before Course objects were introduced.
+      Takes the same arguments as the Course constructor.
+
+  Returns:
+      dict: The dictionary representation of the course.
+  """
+  return {
+      'Name': name,
+      'High_School__c': school_sf_id,
+      'Academic_Years__c': ";".join(academic_years),
+      'Is_Honors__c': is_honors,
+      'Provider__c': provider,
+      'Grade_Levels__c': ";".join(grade_levels),
+      'Course_Length__c': course_length,
+      'Transcript_Abbs__c': ";".join(transcript_abbs),
+      'Subject__c': subject,
+      'AG_Designation__c': ag_designation
+  }
+
+def _measure(factory, values, num_courses):
+  """
+  Summary:
+      Measures the memory allocated while creating and keeping num_courses courses with the given factory.
+
+  Args:
+      factory (function): Creates one course from its field values.
+      values (list): The field values of the recorded courses, which are cycled through.
+      num_courses (int): The number of courses to create.
+
+  Returns:
+      int: The number of bytes allocated by the courses (and every string read for them) that are still alive.
+  """
+  tracemalloc.start()
+  courses = []
+  for i in range(num_courses):
+    name, school_sf_id, academic_years, is_honors, provider, grade_levels, course_length, transcript_abbs, subject, \
+      ag_designation = values[i % len(values)]
+    # Copy every string, as each course read from a page holds its own string objects
+    courses.append(factory(_copy(name) + " " + str(i), school_sf_id, [_copy(year) for year in academic_years],
+                           is_honors, _copy(provider), [_copy(grade) for grade in grade_levels], _copy(course_length),
+                           [_copy(abb) for abb in transcript_abbs], _copy(subject), _copy(ag_designation)))
+  current_size, peak_size = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return current_size
+
+def run_benchmark(num_courses=100000):
+  """
+  Summary:
+      Compares the memory used to keep num_courses courses as dictionaries and as Course objects.
+
+  Args:
+      num_courses (int, optional): The number of courses to create. Defaults to 100000.
+
+  Returns:
+      dict: The number of bytes used by each representation, and the number of bytes per course.
+  """
+  values = _load_scraped_values()
+  dict_bytes = _measure(_create_dict, values, num_courses)
+  record_bytes = _measure(Course, values, num_courses)
+  return {
+      'num_courses': num_courses,
+      'dict_bytes': dict_bytes,
+      'record_bytes': record_bytes,
+      'dict_bytes_per_course': dict_bytes / num_courses,
+      'record_bytes_per_course': record_bytes / num_courses
+  }
+
+if __name__ == "__main__":
+  parser = ArgumentParser(description="Compares the memory used by course dictionaries and Course objects.")
+  parser.add_argument("--courses", type=int, default=100000, help="number of courses to create")
+  parser.add_argument("--json", help="path of a JSON file to export the results to")
+  args = parser.parse_args()
+
+  results = run_benchmark(args.courses)
+  print("{:>10}{:>14}{:>18}".format("", "Total (MB)", "Bytes per course"))
+  print("{:>10}{:>14.1f}{:>18.0f}".format("dict", results['dict_bytes'] / (1024 * 1024),
+                                          results['dict_bytes_per_course']))
+  print("{:>10}{:>14.1f}{:>18.0f}".format("Course", results['record_bytes'] / (1024 * 1024),
+                                          results['record_bytes_per_course']))
+  if args.json:
+    with open(args.json, 'w') as f:
+      json.dump(results, f, indent=2)
@@ -0,0 +1,194 @@
+from argparse import ArgumentParser
+import tempfile
+import threading
+import time
+import json
+
+import psutil
+
+from scraper_sf import Scraper
+from rate_limiter import AdaptiveRateLimiter
+from benchmark.ag_server import AGCourseListServer, load_institutions
+from benchmark.fake_salesforce import FakeSalesforceServer
+
+class _PeakRssSampler(threading.Thread):
+  """
+  Summary:
+      Background thread that periodically samples the combined resident set size of this process and all of its
+      children (ChromeDriver and headless Chrome), keeping track of the peak value.
+  """
+
+  def __init__(self, interval=0.25):
+    """
+    Summary:
+        Initializes a _PeakRssSampler object.
+
+    Args:
+        interval (float, optional): The number of seconds between samples. Defaults to 0.25.
+    """
+    super().__init__(daemon=True)
+    self._interval = interval
+    self._stopped = threading.Event()
+    self.peak_rss = 0
+
+  def _sample(self):
+    """
+    Summary:
+        Samples the combined resident set size once, updating the peak value.
+    """
+    process = psutil.Process()
+    rss = process.memory_info().rss
+    for child in process.children(recursive=True):
+      try:
+        rss += child.memory_info().rss
+      except psutil.Error:
+        pass
+    self.peak_rss = max(self.peak_rss, rss)
+
+  def run(self):
+    """
+    Summary:
+        Samples the combined resident set size until stop is called.
+    """
+    while not self._stopped.is_set():
+      self._sample()
+      self._stopped.wait(self._interval)
+
+  def stop(self):
+    """
+    Summary:
+        Stops sampling, blocking until the sampling thread has exited.
+    """
+    self._stopped.set()
+    self.join()
+
+def _start_server(server):
+  """
+  Summary:
+      Serves requests on the given server from a background thread.
+
+  Args:
+      server (HTTPServer): The server to start.
+  """
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+
+def _count_valid_schools(ag_server, first_website_id, last_website_id):
+  """
+  Summary:
+      Counts the website IDs in the given range that correspond with valid institution pages.
+
+  Args:
+      ag_server (AGCourseListServer): The server replaying the recorded institution pages.
+      first_website_id (int): The first website ID in the range.
+      last_website_id (int): The last website ID in the range.
+
+  Returns:
+      int: The number of valid institution pages.
+  """
+  return sum(1 for website_id in range(first_website_id, last_website_id + 1)
+             if ag_server.get_institution(website_id) is not None)
+
+def run_benchmark(pool_sizes, years=4, repeat=1, sf_latency=0.0, history_filepath=None):
+  """
+  Summary:
+      Drives Scraper.run over the recorded A-G pages and a fake Salesforce endpoint once per pool size, measuring
+      throughput, requests per school, and peak memory. Every run starts with an empty fake Salesforce database and
+      forces rescraping, so that each run performs the same amount of work.
+
+  Args:
+      pool_sizes (list): The numbers of school course pages to scrape in parallel.
+      years (int, optional): The number of years from which data should be scraped. Defaults to 4.
+      repeat (int, optional): The number of times to cover the recorded institutions. Defaults to 1.
+      sf_latency (float, optional): The number of seconds the fake Salesforce endpoint waits before answering each
+                                    request. Defaults to 0.0.
+      history_filepath (string, optional): The path of the cost history used to schedule the schools, which is updated
+                                           after every run. Defaults to None, in which case every run starts without
+                                           a history and schools are scheduled in ID order.
+
+  Returns:
+      list: A dictionary of results for each pool size.
+  """
+  ag_server = AGCourseListServer(load_institutions())
+  _start_server(ag_server)
+  first_website_id, last_website_id = ag_server.get_website_ids(repeat)
+  num_websites = last_website_id - first_website_id + 1
+  num_schools = _count_valid_schools(ag_server, first_website_id, last_website_id)
+
+  results = []
+  for pool_size in pool_sizes:
+    sf_server = FakeSalesforceServer(latency=sf_latency)
+    _start_server(sf_server)
+    # Every run starts without any saved external IDs, so that runs with different pool sizes can be compared
+    temp_dir = tempfile.TemporaryDirectory()
+    # The local servers do not need to be protected from throttling, so the rate limiters are effectively disabled
+    scraper = Scraper(website_address=ag_server.get_website_address(), sf_options=sf_server.get_sf_options(),
+                      page_rate_limiter=AdaptiveRateLimiter(rate=1000.0, max_rate=1000.0),
+                      sf_rate_limiter=AdaptiveRateLimiter(rate=1000.0, max_rate=1000.0),
+                      history_filepath=history_filepath or temp_dir.name + "/cost-history.json",
+                      external_ids_filepath=temp_dir.name + "/external-ids.sqlite3")
+
+    sampler = _PeakRssSampler()
+    sampler.start()
+    page_requests_before = ag_server.get_num_requests()
+    start_time = time.time()
+    scraper.run(first_website_id, last_website_id, years=years, force_rescraping=True, max_workers=pool_size)
+    elapsed = time.time() - start_time
+    sampler.stop()
+    sf_server.shutdown()
+    sf_server.server_close()
+    temp_dir.cleanup()
+
+    results.append({
+        'pool_size': pool_size,
+        'websites_visited': num_websites,
+        'valid_schools': num_schools,
+        'courses_loaded': len(sf_server.get_records("Course__c")),
+        'seconds': elapsed,
+        # Invalid pages are visited but hold no school, so they only count towards websites_per_second
+        'schools_per_second': num_schools / elapsed,
+        'websites_per_second': num_websites / elapsed,
+        'page_requests_per_school': (ag_server.get_num_requests() - page_requests_before) / num_websites,
+        'sf_requests_per_school': sf_server.get_num_requests() / num_websites,
+        'peak_rss_mb': sampler.peak_rss / (1024 * 1024)
+    })
+
+  ag_server.shutdown()
+  ag_server.server_close()
+  return results
+
+def format_results(results):
+  """
+  Summary:
+      Formats the results of run_benchmark as a table.
+
+  Args:
+      results (list): The results returned by run_benchmark.
+
+  Returns:
+      string: The formatted table.
+  """
+  results_str = "{:>6}{:>10}{:>10}{:>12}{:>12}{:>14}{:>14}{:>14}\n".format("Pool", "Seconds", "Courses", "Schools/s",
+    "Websites/s", "Pages/school", "SF req/school", "Peak RSS (MB)")
+  for result in results:
+    results_str += "{:>6}{:>10.1f}{:>10}{:>12.3f}{:>12.3f}{:>14.1f}{:>14.1f}{:>14.0f}\n".format(result['pool_size'],
+      result['seconds'], result['courses_loaded'], result['schools_per_second'], result['websites_per_second'],
+      result['page_requests_per_school'], result['sf_requests_per_school'], result['peak_rss_mb'])
+  return results_str
+
+if __name__ == "__main__":
+  parser = ArgumentParser(description="Benchmarks the scraper against recorded A-G pages and a fake Salesforce.")
+  parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 2, 4, 8],
+                      help="numbers of school course pages to scrape in parallel")
+  parser.add_argument("--years", type=int, default=4, help="number of years from which data should be scraped")
+  parser.add_argument("--repeat", type=int, default=1, help="number of times to cover the recorded institutions")
+  parser.add_argument("--sf-latency", type=float, default=0.0, help="seconds of latency added to each Salesforce call")
+  parser.add_argument("--json", help="path of a JSON file to export the results to")
+  parser.add_argument("--history", help="path of a cost history used to schedule the schools longest first")
+  args = parser.parse_args()
+
+  benchmark_results = run_benchmark(args.pool_sizes, args.years, args.repeat, args.sf_latency, args.history)
+  print()
+  print(format_results(benchmark_results))
+  if args.json:
+    with open(args.json, 'w') as f:
+      json.dump(benchmark_results, f, indent=2)
@@ -0,0 +1,196 @@
+# Only depends on the standard library, so that it can be imported outside of the scraper (such as by the API tests)
+from collections import OrderedDict
+from uuid import NAMESPACE_URL, uuid5
+import threading
+import sqlite3
+
+# The address of the live A-G Course List website, which external IDs are always derived from (regardless of the
+# address actually being scraped), so that a change of address never changes the IDs of existing courses
+CANONICAL_WEBSITE_ADDRESS = "https://hs-articulation.ucop.edu/agcourselist/institution/"
+
+def get_course_external_id(website_id, course_name):
+  """
+  Summary:
+      Generates the deterministic external ID of a course, which is a UUID based on the course's name and the address
+      of its school's page on the live A-G Course List website.
+      Note: This assumes that a course's name will be unique within the scope of its school - if this is not the case,
+      courses with matching names will share an external ID.
+
+  Args:
+      website_id (int): The unique 3-4 digit ID used by the A-G course list website to identify institutions.
+      course_name (string): The name of the course.
+
+  Returns:
+      string: The external ID of the course.
+  """
+  return str(uuid5(uuid5(NAMESPACE_URL, CANONICAL_WEBSITE_ADDRESS + str(website_id)), course_name))
+
+class ExternalIdService:
+  """
+  Summary:
+      Looks up the external ID of each course in an in-memory LRU cache, then in a persisted map of every external ID
+      issued so far, and only generates (and records) an ID for courses that have never been seen. Once issued, an ID
+      never changes, and the IDs of a school's courses can be listed without querying Salesforce.
+
+  Organization:
+      Tufts Code For Good: The Village Method Project
+  """
+
+  def __init__(self, filepath=None, cache_size=65536, flush_size=1000):
+    """
+    Summary:
+        Initializes an ExternalIdService object, creating the persisted map if it does not already exist.
+
+    Args:
+        filepath (string, optional): The path of the SQLite database storing the persisted map. Defaults to None, in
+                                     which case nothing is persisted.
+        cache_size (int, optional): The maximum number of external IDs kept in the LRU cache. Defaults to 65536.
+        flush_size (int, optional): The number of new external IDs collected before they are written to the persisted
+                                    map. Defaults to 1000.
+
+    Fields:
+        _filepath (string): The path of the SQLite database storing the persisted map, or None.
+        _cache_size (int): The maximum number of external IDs kept in the LRU cache.
+        _flush_size (int): The number of new external IDs collected before they are written to the persisted map.
+        _cache (OrderedDict): Maps (website ID, course name) pairs to external IDs, from least to most recently used.
+        _pending (dict): Maps (website ID, course name) pairs to external IDs that have not been written yet.
+        _lock (Lock): Guards _cache, _pending, and _connections, as external IDs are requested by multiple threads.
+        _local (local): Holds the database connection of each thread, as SQLite connections cannot be shared between
+                        threads.
+        _connections (list): The database connection of every thread, so that all of them can be closed.
+    """
+    self._filepath = filepath
+    self._cache_size = cache_size
+    self._flush_size = flush_size
+    self._cache = OrderedDict()
+    self._pending = {}
+    self._lock = threading.Lock()
+    self._local = threading.local()
+    self._connections = []
+    if self._filepath:
+      with self._get_connection() as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS course_external_ids ("
+                     "website_id INTEGER NOT NULL, "
+                     "course_name TEXT NOT NULL, "
+                     "external_id TEXT NOT NULL, "
+                     "PRIMARY KEY (website_id, course_name))")
+
+  def _get_connection(self):
+    """
+    Summary:
+        Returns the database connection of the current thread, opening it if necessary.
+
+    Returns:
+        Connection: The database connection of the current thread.
+    """
+    conn = getattr(self._local, "conn", None)
+    if conn is None:
+      # Each connection is only used by its own thread, but is closed by whichever thread calls close()
+      conn = sqlite3.connect(self._filepath, timeout=60, check_same_thread=False)
+      self._local.conn = conn
+      with self._lock:
+        self._connections.append(conn)
+    return conn
+
+  def _cache_put(self, key, external_id):
+    """
+    Summary:
+        Adds an external ID to the LRU cache, evicting the least recently used ID if the cache is full. Must be called
+        while holding self._lock.
+
+    Args:
+        key (tuple): The (website ID, course name) pair of the course.
+        external_id (string): The external ID of the course.
+    """
+    self._cache[key] = external_id
+    if len(self._cache) > self._cache_size:
+      self._cache.popitem(last=False)
+
+  def get(self, website_id, course_name):
+    """
+    Summary:
+        Returns the external ID of a course, issuing a new one if the course has never been seen. Safe to call from
+        any thread.
+
+    Args:
+        website_id (int): The unique 3-4 digit ID used by the A-G course list website to identify institutions.
+        course_name (string): The name of the course.
+
+    Returns:
+        string: The external ID of the course.
+    """
+    key = (website_id, course_name)
+    with self._lock:
+      external_id = self._cache.get(key) or self._pending.get(key)
+      if external_id:
+        # IDs waiting to be written may already have been evicted from the LRU cache
+        if key in self._cache:
+          self._cache.move_to_end(key)
+        else:
+          self._cache_put(key, external_id)
+        return external_id
+
+    external_id = None
+    if self._filepath:
+      row = self._get_connection().execute("SELECT external_id FROM course_external_ids WHERE website_id = ? AND "
+                                           "course_name = ?", key).fetchone()
+      external_id = row[0] if row else None
+    flush = False
+    with self._lock:
+      if not external_id:
+        external_id = get_course_external_id(website_id, course_name)
+        if self._filepath:
+          self._pending[key] = external_id
+          flush = len(self._pending) >= self._flush_size
+      self._cache_put(key, external_id)
+    if flush:
+      self.flush()
+    return external_id
+
+  def get_school_external_ids(self, website_id):
+    """
+    Summary:
+        Returns the external ID of every course of a school that has been issued so far, such as to find the existing
+        records of a school without querying Salesforce.
+
+    Args:
+        website_id (int): The unique 3-4 digit ID used by the A-G course list website to identify institutions.
+
+    Returns:
+        dict: Maps the name of each course to its external ID.
+    """
+    external_ids = {}
+    if self._filepath:
+      external_ids.update(self._get_connection().execute("SELECT course_name, external_id FROM course_external_ids "
+                                                         "WHERE website_id = ?", (website_id,)))
+    with self._lock:
+      external_ids.update({course_name: external_id for (pending_id, course_name), external_id
+                           in self._pending.items() if pending_id == website_id})
+    return external_ids
+
+  def flush(self):
+    """
+    Summary:
+        Writes every newly issued external ID to the persisted map.
+    """
+    if not self._filepath:
+      return
+    with self._lock:
+      pending, self._pending = self._pending, {}
+    if pending:
+      with self._get_connection() as conn:
+        conn.executemany("INSERT OR IGNORE INTO course_external_ids (website_id, course_name, external_id) "
+                         "VALUES (?, ?, ?)", [key + (external_id,) for key, external_id in pending.items()])
+
+  def close(self):
+    """
+    Summary:
+        Writes every newly issued external ID to the persisted map and closes the database connection of every thread.
+        Must only be called once no other thread is using the service.
+    """
+    self.flush()
+    with self._lock:
+      connections, self._connections = self._connections, []
+    for conn in connections:
+      conn.close()
+    self._local = threading.local()
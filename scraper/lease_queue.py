@@ -0,0 +1,267 @@
+import threading
+import sqlite3
+import time
+import json
+
+class LeaseQueue:
+  """
+  Summary:
+      A work queue of website IDs shared by every node of a distributed scraper run, backed by a lease table in a
+      SQLite database. Nodes lease IDs for a limited time and renew their leases while scraping; a lease that is not
+      renewed in time (because its node crashed or lost its connection) expires, and its ID is automatically handed to
+      the next node that asks for work. Failed IDs are re-queued with exponentially increasing delays.
+      Note: Every node must be able to open the same database file, such as on a shared network volume.
+
+  Organization:
+      Tufts Code For Good: The Village Method Project
+  """
+
+  def __init__(self, filepath, lease_seconds=600, max_attempts=4, base_delay=30):
+    """
+    Summary:
+        Initializes a LeaseQueue object, creating the lease table if it does not already exist.
+
+    Args:
+        filepath (string): The path of the SQLite database file.
+        lease_seconds (float, optional): The time, in seconds, after which a lease that has not been renewed expires.
+                                         Defaults to 600.
+        max_attempts (int, optional): The maximum number of times an ID is leased before it is marked as failed.
+                                      Defaults to 4 (the first attempt and 3 retries).
+        base_delay (float, optional): The time, in seconds, before a failed ID may be leased again. Each following
+                                      retry waits twice as long as the previous one. Defaults to 30.
+
+    Fields:
+        _filepath (string): The path of the SQLite database file.
+        _lease_seconds (float): The time, in seconds, after which a lease that has not been renewed expires.
+        _max_attempts (int): The maximum number of times an ID is leased before it is marked as failed.
+        _base_delay (float): The time, in seconds, before a failed ID may be leased again.
+        _local (local): Holds the database connection of each thread, as SQLite connections cannot be shared between
+                        threads.
+    """
+    self._filepath = filepath
+    self._lease_seconds = lease_seconds
+    self._max_attempts = max_attempts
+    self._base_delay = base_delay
+    self._local = threading.local()
+    with self._transaction() as conn:
+      conn.execute("CREATE TABLE IF NOT EXISTS leases ("
+                   "website_id INTEGER PRIMARY KEY, "
+                   "status TEXT NOT NULL DEFAULT 'pending', "
+                   "cost REAL NOT NULL DEFAULT 0, "
+                   "owner TEXT, "
+                   "expires_at REAL, "
+                   "available_at REAL NOT NULL DEFAULT 0, "
+                   "attempts INTEGER NOT NULL DEFAULT 0, "
+                   "result TEXT)")
+      conn.execute("CREATE INDEX IF NOT EXISTS leases_status ON leases (status, cost)")
+
+  #####################################################################################################################
+  ######################################### PRIVATE GENERAL PURPOSE METHODS ###########################################
+  #####################################################################################################################
+
+  def _get_connection(self):
+    """
+    Summary:
+        Returns the database connection of the current thread, opening it if necessary.
+
+    Returns:
+        Connection: The database connection of the current thread.
+    """
+    conn = getattr(self._local, "conn", None)
+    if conn is None:
+      # Autocommit mode, so that transactions are started explicitly by _transaction
+      conn = sqlite3.connect(self._filepath, timeout=60, isolation_level=None)
+      self._local.conn = conn
+    return conn
+
+  def _transaction(self):
+    """
+    Summary:
+        Returns a context manager that runs its body in a write transaction, which is committed on success and rolled
+        back on failure. The write lock is taken immediately, so that two nodes can never lease the same ID.
+
+    Returns:
+        _Transaction: The context manager, which yields the database connection.
+    """
+    return _Transaction(self._get_connection())
+
+  def _reclaim_expired(self, conn, now):
+    """
+    Summary:
+        Returns every expired lease to the queue. Must be called within a transaction.
+
+    Args:
+        conn (Connection): The database connection.
+        now (float): The current time, in seconds since the epoch.
+
+    Returns:
+        int: The number of leases that were reclaimed.
+    """
+    return conn.execute("UPDATE leases SET status = 'pending', owner = NULL, expires_at = NULL "
+                        "WHERE status = 'leased' AND expires_at < ?", (now,)).rowcount
+
+  #####################################################################################################################
+  ######################################### PUBLIC METHODS FOR USE BY CLIENT ##########################################
+  #####################################################################################################################
+
+  def seed(self, website_ids, expected_costs=None):
+    """
+    Summary:
+        Adds website IDs to the queue. IDs that are already in the queue are left untouched, so that a run can be
+        seeded again without losing the progress already made.
+
+    Args:
+        website_ids (list): The website IDs to be scraped.
+        expected_costs (dict, optional): Maps each website ID to its expected cost, so that the most expensive IDs are
+                                         leased first. Defaults to None, in which case IDs are leased in ID order.
+
+    Returns:
+        int: The number of IDs that were added.
+    """
+    if expected_costs is None:
+      expected_costs = {}
+    rows = [(website_id, expected_costs.get(website_id, 0.0)) for website_id in website_ids]
+    with self._transaction() as conn:
+      return conn.executemany("INSERT OR IGNORE INTO leases (website_id, cost) VALUES (?, ?)", rows).rowcount
+
+  def lease(self, owner, count=1):
+    """
+    Summary:
+        Leases up to count of the most expensive IDs that are ready to be scraped, reclaiming any expired leases first.
+
+    Args:
+        owner (string): The unique name of the node taking the lease.
+        count (int, optional): The maximum number of IDs to lease. Defaults to 1.
+
+    Returns:
+        list: A tuple pair for each leased ID, containing the website ID and the number of times it has been leased
+              (including this lease).
+    """
+    now = time.time()
+    with self._transaction() as conn:
+      self._reclaim_expired(conn, now)
+      rows = conn.execute("SELECT website_id, attempts FROM leases WHERE status = 'pending' AND available_at <= ? "
+                          "ORDER BY cost DESC, website_id LIMIT ?", (now, count)).fetchall()
+      conn.executemany("UPDATE leases SET status = 'leased', owner = ?, expires_at = ?, attempts = attempts + 1 "
+                       "WHERE website_id = ?", [(owner, now + self._lease_seconds, row[0]) for row in rows])
+    return [(website_id, attempts + 1) for website_id, attempts in rows]
+
+  def renew(self, owner):
+    """
+    Summary:
+        Extends every lease held by the given owner.
+
+    Args:
+        owner (string): The unique name of the node holding the leases.
+
+    Returns:
+        int: The number of leases that were renewed.
+    """
+    with self._transaction() as conn:
+      return conn.execute("UPDATE leases SET expires_at = ? WHERE status = 'leased' AND owner = ?",
+                          (time.time() + self._lease_seconds, owner)).rowcount
+
+  def complete(self, owner, website_id, result, failed=False):
+    """
+    Summary:
+        Reports the result of scraping an ID. A failed ID is re-queued after a delay unless it has already been leased
+        max_attempts times, in which case it is marked as failed. A result reported after the lease was lost to another
+        node is still recorded, unless that node has already completed the ID.
+
+    Args:
+        owner (string): The unique name of the node that held the lease.
+        website_id (int): The unique 3-4 digit ID used by the A-G course list website to identify institutions.
+        result (dict): A JSON serializable summary of the result, stored for the coordinator.
+        failed (bool, optional): Specifies whether scraping the ID experienced an error. Defaults to False.
+
+    Returns:
+        bool: True if the result was recorded.
+    """
+    now = time.time()
+    with self._transaction() as conn:
+      row = conn.execute("SELECT status, attempts FROM leases WHERE website_id = ?", (website_id,)).fetchone()
+      if row is None or row[0] in ("done", "failed"):
+        return False
+      status, available_at = "done", 0
+      if failed and row[1] < self._max_attempts:
+        status, available_at = "pending", now + self._base_delay * 2 ** (row[1] - 1)
+      elif failed:
+        status = "failed"
+      conn.execute("UPDATE leases SET status = ?, owner = NULL, expires_at = NULL, available_at = ?, result = ? "
+                   "WHERE website_id = ?", (status, available_at, json.dumps(result), website_id))
+    return True
+
+  def reclaim_expired(self):
+    """
+    Summary:
+        Returns every expired lease to the queue. This also happens automatically whenever IDs are leased.
+
+    Returns:
+        int: The number of leases that were reclaimed.
+    """
+    with self._transaction() as conn:
+      return self._reclaim_expired(conn, time.time())
+
+  def get_counts(self):
+    """
+    Summary:
+        Returns the number of IDs in each state.
+
+    Returns:
+        dict: Maps each of "pending", "leased", "done", and "failed" to the number of IDs in that state.
+    """
+    counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+    for status, count in self._get_connection().execute("SELECT status, COUNT(*) FROM leases GROUP BY status"):
+      counts[status] = count
+    return counts
+
+  def get_results(self):
+    """
+    Summary:
+        Returns the result reported for every ID that has been completed, including IDs that are waiting to be retried.
+
+    Returns:
+        dict: Maps each website ID to its result.
+    """
+    return {website_id: json.loads(result) for website_id, result in
+            self._get_connection().execute("SELECT website_id, result FROM leases WHERE result IS NOT NULL")}
+
+  def get_id_range(self):
+    """
+    Summary:
+        Returns the lowest and highest website IDs in the queue.
+
+    Returns:
+        tuple: A tuple pair containing the lowest and highest website IDs, which are None if the queue is empty.
+    """
+    return self._get_connection().execute("SELECT MIN(website_id), MAX(website_id) FROM leases").fetchone()
+
+  def close(self):
+    """
+    Summary:
+        Closes the database connection of the current thread.
+    """
+    conn = getattr(self._local, "conn", None)
+    if conn is not None:
+      conn.close()
+      self._local.conn = None
+
+class _Transaction:
+  """
+  Summary:
+      Context manager that runs its body in an immediate SQLite transaction.
+  """
+
+  def __init__(self, conn):
+    self._conn = conn
+
+  def __enter__(self):
+    self._conn.execute("BEGIN IMMEDIATE")
+    return self._conn
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    if exc_type is None:
+      self._conn.execute("COMMIT")
+    else:
+      self._conn.execute("ROLLBACK")
+    return False
@@ -0,0 +1,22 @@
+from argparse import ArgumentParser
+import logging
+
+from staging import StagingLoader
+
+if __name__ == "__main__":
+  parser = ArgumentParser(description="Bulk loads a staged scraper run into Salesforce. Loading the same run again "
+                                      "only loads the schools that have not been loaded yet.")
+  parser.add_argument("run_directory", help="directory of the staged run, such as staging/<run name>")
+  parser.add_argument("--max-workers", type=int, default=2, help="number of chunks of schools to load in parallel")
+  parser.add_argument("--files-per-chunk", type=int, default=200, help="number of schools per chunk")
+  parser.add_argument("--batch-size", type=int, default=10000, help="maximum number of records per Bulk API batch")
+  args = parser.parse_args()
+
+  logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+  results = StagingLoader(args.run_directory, max_workers=args.max_workers, files_per_chunk=args.files_per_chunk,
+                          batch_size=args.batch_size).load()
+  print("Loaded " + str(results['schools']) + " schools and " + str(results['courses']) + " courses from " + \
+    str(results['files']) + " staged files in " + str(results['seconds']) + " seconds.")
+  if results['failed_files']:
+    print(str(results['failed_files']) + " staged files failed to load; see the load log in " + args.run_directory + \
+      " and run this command again once the errors are fixed.")
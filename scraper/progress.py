@@ -0,0 +1,215 @@
+from queue import Queue, Empty
+import threading
+import time
+
+def format_time(time_diff):
+  """
+  Summary:
+      Formats a time, specified in seconds, into the form "hours:minutes:seconds.milliseconds".
+
+  Args:
+      time_diff (float): The time, in seconds, to be formatted.
+
+  Returns:
+      string: The formatted version of time_diff.
+  """
+  hours, rem = divmod(time_diff, 3600)
+  minutes, seconds = divmod(rem, 60)
+  return "{:0>2}:{:0>2}:{:05.2f}".format(int(hours),int(minutes),seconds)
+
+def get_time_per_page_str(time_to_run, num_pages, total_pages=5141):
+  """
+  Summary:
+      Formats the average time taken to scrape one school course page, and the estimated time to scrape every page at
+      that rate, as written to the header of the .txt debug file.
+
+  Args:
+      time_to_run (float): The time, in seconds, that the run took.
+      num_pages (int): The number of school course pages scraped during the run, which may be 0 (such as for a node
+                       that found the work queue already drained by other nodes).
+      total_pages (int, optional): The number of school course pages on the A-G Course List. Defaults to 5141.
+
+  Returns:
+      string: The formatted averages, one per line.
+  """
+  if not num_pages:
+    return "Average time to scrape one school course page: None (no school course pages were scraped)\n"
+  time_per_page = time_to_run / num_pages
+  return "Average time to scrape one school course page: " + format_time(time_per_page) + "\n" + \
+    "Estimated time to run scraper fully (~" + str(total_pages) + " school course pages): " + \
+    format_time(total_pages * time_per_page) + "\n"
+
+class ProgressAggregator:
+  """
+  Summary:
+      Collects the results of every ScraperWorker instance and renders the progress bar from a single dedicated
+      thread. Worker threads only put their results on a queue, so no state is shared between them, and the progress
+      bar is redrawn at most once per render interval rather than on every completed school.
+
+  Organization:
+      Tufts Code For Good: The Village Method Project
+  """
+
+  def __init__(self, num_websites, render_interval=0.5, expected_costs=None, show_progress=True):
+    """
+    Summary:
+        Initializes a ProgressAggregator object and starts its consumer thread.
+
+    Args:
+        num_websites (int): The number of websites that will be visited in the process of scraping.
+        render_interval (float, optional): The minimum time, in seconds, between redraws of the progress bar. Defaults
+                                           to 0.5.
+        expected_costs (dict, optional): Maps each website ID to its expected cost, used to weight the estimated
+                                         remaining time. Defaults to None, in which case every website is weighted
+                                         equally.
+        show_progress (bool, optional): Specifies whether the progress bar should be drawn. Defaults to True.
+
+    Fields:
+        _num_websites (int): The number of websites that will be visited in the process of scraping.
+        _render_interval (float): The minimum time, in seconds, between redraws of the progress bar.
+        _start_time (float): The time at which the aggregator was created.
+        _queue (Queue): Holds the results that have not yet been collected by the consumer thread.
+        _data_tuples_by_id (dict): Maps each website ID to the data tuple of its latest attempt. Only accessed by the
+                                   consumer thread until it has been stopped.
+        _num_completed (int): The number of websites that have been fully scraped (not including retries).
+        _latest_id (int): The website ID of the most recently completed website, or None.
+        _expected_costs (dict): Maps each website ID to its expected cost, or None.
+        _total_cost (float): The sum of the expected costs of every website.
+        _completed_cost (float): The sum of the expected costs of every website that has been fully scraped.
+        _last_render_time (float): The time at which the progress bar was last redrawn.
+        _show_progress (bool): Specifies whether the progress bar should be drawn.
+        _finished (bool): Specifies whether the final state of the progress bar has been drawn.
+        _thread (Thread): The consumer thread.
+    """
+    self._num_websites = num_websites
+    self._render_interval = render_interval
+    self._start_time = time.time()
+    self._queue = Queue()
+    self._data_tuples_by_id = {}
+    self._num_completed = 0
+    self._latest_id = None
+    self._expected_costs = expected_costs
+    self._total_cost = sum(expected_costs.values()) if expected_costs else float(num_websites)
+    self._completed_cost = 0.0
+    self._last_render_time = 0.0
+    self._show_progress = show_progress
+    self._finished = False
+    self._thread = threading.Thread(target=self._consume, name="ProgressAggregator", daemon=True)
+    self._thread.start()
+
+  def _render(self, decimals=1, length=50, fill="█", print_end=""):
+    """
+    Summary:
+        Prints a progress bar to monitor the progress and remaining time of the scraping process.
+
+    Args:
+        decimals (int, optional): The number of decimal places to display for the completion percentage. Defaults to 1.
+        length (int, optional): The length of the progress bar in characters. Defaults to 50.
+        fill (string, optional): The string to fill the progress bar with. Defaults to "█".
+        print_end (string, optional): The string to print at the end of the progress bar. Defaults to "".
+    """
+    if not self._show_progress:
+      return
+    iteration = self._num_completed
+    current_id = "none"
+    remaining_time = "unknown"
+
+    # If any website has been completed, obtain values for current_id and remaining_time
+    if iteration:
+      current_id = str(self._latest_id)
+      # Remaining time is the time taken per unit of expected cost times the expected cost left to scrape
+      if self._completed_cost:
+        remaining_time = format_time((time.time() - self._start_time) / self._completed_cost * \
+          max(self._total_cost - self._completed_cost, 0.0))
+
+    # Format the progress bar
+    fraction = iteration / float(self._num_websites) if self._num_websites else 1.0
+    percent = ("{0:." + str(decimals) + "f}").format(100 * fraction)
+    filled_length = int(length * fraction)
+    bar = fill * filled_length + '-' * (length - filled_length)
+
+    # Print the progress bar
+    print(f'\rProgress: |{bar}| {percent}% Complete, Time Remaining: {remaining_time}, Latest ID: {current_id}', \
+      end = print_end, flush=True)
+    self._last_render_time = time.time()
+
+  def _consume(self):
+    """
+    Summary:
+        Collects results from the queue until the stop sentinel is received, redrawing the progress bar whenever the
+        render interval has elapsed.
+    """
+    self._render()
+    while True:
+      try:
+        item = self._queue.get(timeout=self._render_interval)
+      except Empty:
+        item = ()
+      if item is None:
+        self._queue.task_done()
+        break
+      if item:
+        website_id, data_tuple, retrying = item
+        self._data_tuples_by_id[website_id] = data_tuple
+        if not retrying:
+          self._num_completed += 1
+          self._latest_id = website_id
+          self._completed_cost += self._expected_costs.get(website_id, 0.0) if self._expected_costs else 1.0
+        self._queue.task_done()
+      if self._finished:
+        continue
+      if self._num_completed == self._num_websites:
+        self._finish()
+      elif time.time() - self._last_render_time >= self._render_interval:
+        self._render()
+
+    if not self._finished:
+      self._finish()
+
+  def _finish(self):
+    """
+    Summary:
+        Draws the final state of the progress bar, followed by a newline, after which the bar is no longer redrawn
+        (so that messages printed while retrying are not overwritten).
+    """
+    self._render()
+    if self._show_progress:
+      print()
+    self._finished = True
+
+  def complete(self, website_id, data_tuple, retrying=False):
+    """
+    Summary:
+        Reports the result of a ScraperWorker instance. Safe to call from any thread.
+
+    Args:
+        website_id (int): The unique 3-4 digit ID used by the A-G course list website to identify institutions.
+        data_tuple (tuple): The data tuple obtained from the ScraperWorker instance.
+        retrying (bool, optional): Specifies whether this result is from a retry, in which case it replaces the
+                                   previous result without advancing the progress bar. Defaults to False.
+    """
+    self._queue.put((website_id, data_tuple, retrying))
+
+  def wait(self):
+    """
+    Summary:
+        Blocks until every result reported so far has been collected, returning a snapshot of the collected results.
+        Must not be called after stop.
+
+    Returns:
+        dict: Maps each website ID to the data tuple of its latest attempt.
+    """
+    self._queue.join()
+    return dict(self._data_tuples_by_id)
+
+  def stop(self):
+    """
+    Summary:
+        Collects any remaining results, draws the final progress bar, and stops the consumer thread.
+
+    Returns:
+        dict: Maps each website ID to the data tuple of its latest attempt.
+    """
+    self._queue.put(None)
+    self._thread.join()
+    return self._data_tuples_by_id
@@ -0,0 +1,135 @@
+from contextlib import contextmanager
+import threading
+import time
+
+class AdaptiveRateLimiter:
+  """
+  Summary:
+      A thread-safe token bucket rate limiter designed to be shared by every ScraperWorker instance in a parallel
+      processing environment. The rate at which tokens are refilled is adjusted with an additive-increase/
+      multiplicative-decrease (AIMD) policy: every fast, successful request slightly raises the rate, while an error or
+      a request slower than the target latency cuts the rate by a constant factor. This lets the scraper approach the
+      throughput limit of an upstream service (the A-G Course List website or Salesforce) without throttling it.
+
+  Organization:
+      Tufts Code For Good: The Village Method Project
+  """
+
+  def __init__(self, rate=2.0, min_rate=0.2, max_rate=10.0, capacity=None, target_latency=5.0, increase_step=0.1,
+    decrease_factor=0.5):
+    """
+    Summary:
+        Initializes an AdaptiveRateLimiter object.
+
+    Args:
+        rate (float, optional): The initial number of requests per second that the limiter allows. Defaults to 2.0.
+        min_rate (float, optional): The lower bound for the adjusted rate. Defaults to 0.2.
+        max_rate (float, optional): The upper bound for the adjusted rate. Defaults to 10.0.
+        capacity (float, optional): The maximum number of tokens the bucket can hold, which determines the size of a
+                                    burst of requests. Defaults to None, which corresponds with the initial rate (or 1,
+                                    whichever is larger).
+        target_latency (float, optional): The latency, in seconds, above which a request is treated as a congestion
+                                          signal. Defaults to 5.0.
+        increase_step (float, optional): The amount added to the rate after a fast, successful request. Defaults to
+                                         0.1.
+        decrease_factor (float, optional): The factor the rate is multiplied by after an error or a slow request.
+                                           Defaults to 0.5.
+
+    Fields:
+        _rate (float): The current number of requests per second that the limiter allows.
+        _tokens (float): The number of tokens currently available in the bucket.
+        _last_refill (float): The monotonic time at which the bucket was last refilled.
+        _last_decrease (float): The monotonic time at which the rate was last decreased. The rate is decreased at most
+                                once per target_latency seconds, so that a burst of concurrent failures caused by a
+                                single congestion event only counts once.
+        _num_requests (int): The number of requests recorded by the limiter.
+        _num_errors (int): The number of failed requests recorded by the limiter.
+        _lock (Lock): Guards every field above, as the limiter is shared between threads.
+    """
+    self._rate = rate
+    self._min_rate = min_rate
+    self._max_rate = max_rate
+    self._capacity = capacity if capacity else max(1.0, rate)
+    self._target_latency = target_latency
+    self._increase_step = increase_step
+    self._decrease_factor = decrease_factor
+    self._tokens = self._capacity
+    self._last_refill = time.monotonic()
+    self._last_decrease = float("-inf")
+    self._num_requests = 0
+    self._num_errors = 0
+    self._lock = threading.Lock()
+
+  def _refill(self, now):
+    """
+    Summary:
+        Adds the tokens accumulated since the last refill to the bucket. Must be called while holding self._lock.
+
+    Args:
+        now (float): The current monotonic time.
+    """
+    self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self._rate)
+    self._last_refill = now
+
+  def acquire(self):
+    """
+    Summary:
+        Blocks the calling thread until a token is available, then consumes that token.
+    """
+    while True:
+      with self._lock:
+        self._refill(time.monotonic())
+        if self._tokens >= 1:
+          self._tokens -= 1
+          return
+        wait_time = (1 - self._tokens) / self._rate
+      time.sleep(wait_time)
+
+  def record(self, latency, success=True):
+    """
+    Summary:
+        Records the outcome of a request, adjusting the rate of the limiter according to the AIMD policy.
+
+    Args:
+        latency (float): The time, in seconds, that the request took to complete.
+        success (bool, optional): Whether or not the request completed without an error. Defaults to True.
+    """
+    with self._lock:
+      self._num_requests += 1
+      if not success:
+        self._num_errors += 1
+      if success and latency <= self._target_latency:
+        self._rate = min(self._max_rate, self._rate + self._increase_step)
+        return
+      now = time.monotonic()
+      if now - self._last_decrease >= self._target_latency:
+        self._rate = max(self._min_rate, self._rate * self._decrease_factor)
+        self._last_decrease = now
+
+  @contextmanager
+  def limit(self):
+    """
+    Summary:
+        Context manager that acquires a token before the enclosed request and records its latency and outcome
+        afterwards. Any exception raised by the request is recorded as an error and then re-raised.
+    """
+    self.acquire()
+    start_time = time.monotonic()
+    try:
+      yield
+    except Exception:
+      self.record(time.monotonic() - start_time, success=False)
+      raise
+    self.record(time.monotonic() - start_time)
+
+  def get_stats_str(self):
+    """
+    Summary:
+        Returns a summary of the current state of the limiter for use in the .txt debug file.
+
+    Returns:
+        string: The current rate, number of requests, and number of errors recorded by the limiter.
+    """
+    with self._lock:
+      return "{:.2f} requests/second ({} requests, {} errors)".format(self._rate, self._num_requests,
+                                                                       self._num_errors)
@@ -0,0 +1,127 @@
+import sys
+
+def _intern_joined(values):
+  """
+  Summary:
+      Joins a list of strings with semicolons, as expected by Salesforce multi-select picklists, and interns the result
+      so that every record with the same values shares a single string.
+
+  Args:
+      values (list): The strings to join.
+
+  Returns:
+      string: The interned, semicolon-separated string.
+  """
+  return sys.intern(";".join(values))
+
+class School:
+  """
+  Summary:
+      A compact record of a school scraped from the A-G Course List website. Fields are stored in slots rather than a
+      per-instance dictionary, and the strings shared by many schools (city, state, and institution type) are interned.
+      The Salesforce payload is only built when the school is serialized.
+
+  Organization:
+      Tufts Code For Good: The Village Method Project
+  """
+  __slots__ = ("name", "website_id", "city", "state", "institution_type")
+
+  def __init__(self, name, website_id, city, state, institution_type):
+    """
+    Summary:
+        Initializes a School object.
+
+    Args:
+        name (string): The name of the institution.
+        website_id (int): The unique 3-4 digit ID used by the A-G course list website to identify institutions.
+        city (string): The city where the institution is located.
+        state (string): The state where the institution is located.
+        institution_type (string): The type of the institution, such as "Public".
+    """
+    self.name = name
+    self.website_id = website_id
+    self.city = sys.intern(city)
+    self.state = sys.intern(state)
+    self.institution_type = sys.intern(institution_type)
+
+  def to_sf_dict(self):
+    """
+    Summary:
+        Returns the Salesforce payload of the school.
+
+    Returns:
+        dict: The HighSchool__c fields of the school.
+    """
+    return {
+        'Name': self.name,
+        'Website_ID__c': self.website_id,
+        'City__c': self.city,
+        'State__c': self.state,
+        'Institution_Type__c': self.institution_type
+    }
+
+class Course:
+  """
+  Summary:
+      A compact record of a course scraped from the A-G Course List website. Fields are stored in slots rather than a
+      per-instance dictionary, and the strings repeated across thousands of courses (subject, provider, grade levels,
+      academic years, course length, and A-G designation) are interned. The Salesforce payload is only built when the
+      course is serialized.
+
+  Organization:
+      Tufts Code For Good: The Village Method Project
+  """
+  __slots__ = ("name", "school_sf_id", "academic_years", "is_honors", "provider", "grade_levels", "course_length",
+               "transcript_abbs", "subject", "ag_designation")
+
+  def __init__(self, name, school_sf_id, academic_years, is_honors, provider, grade_levels, course_length,
+    transcript_abbs, subject, ag_designation):
+    """
+    Summary:
+        Initializes a Course object.
+
+    Args:
+        name (string): The title of the course.
+        school_sf_id (string): The unique Salesforce ID of the school that the course belongs to, or None if the
+                               school has not been loaded into Salesforce.
+        academic_years (list): The years in which the course was available.
+        is_honors (bool): Specifies whether the course is a UC honors course.
+        provider (string): The provider of the course.
+        grade_levels (list): The grade levels that can take the course.
+        course_length (string): The length of the course, such as "Full year".
+        transcript_abbs (list): The transcript abbreviations of the course.
+        subject (string): The subject of the course.
+        ag_designation (string): The A-G designation of the course.
+    """
+    self.name = name
+    self.school_sf_id = school_sf_id
+    self.academic_years = _intern_joined(academic_years)
+    self.is_honors = is_honors
+    self.provider = sys.intern(provider)
+    self.grade_levels = _intern_joined(grade_levels)
+    self.course_length = sys.intern(course_length)
+    # Transcript abbreviations are mostly unique to each course, so they are not interned
+    self.transcript_abbs = ";".join(transcript_abbs)
+    self.subject = sys.intern(subject)
+    self.ag_designation = sys.intern(ag_designation)
+
+  def to_sf_dict(self):
+    """
+    Summary:
+        Returns the Salesforce payload of the course.
+
+    Returns:
+        dict: The Course__c fields of the course.
+    """
+    return {
+        'Name': self.name,
+        'High_School__c': self.school_sf_id,
+        'Academic_Years__c': self.academic_years,
+        'Is_Honors__c': self.is_honors,
+        'Provider__c': self.provider,
+        'Grade_Levels__c': self.grade_levels,
+        'Course_Length__c': self.course_length,
+        'Transcript_Abbs__c': self.transcript_abbs,
+        'Subject__c': self.subject,
+        'AG_Designation__c': self.ag_designation
+    }
@@ -0,0 +1,71 @@
+import threading
+import datetime
+import gzip
+import json
+
+class RunLog:
+  """
+  Summary:
+      A thread-safe JSON Lines log of a scraper run. Every error, skipped school, and per-school summary is written as
+      one JSON object per line as soon as it occurs, so that memory use stays constant regardless of the length of the
+      run, and so that runs can be searched, aggregated, and compared with standard tools.
+
+  Organization:
+      Tufts Code For Good: The Village Method Project
+  """
+
+  def __init__(self, filepath, compress=False):
+    """
+    Summary:
+        Initializes a RunLog object, creating (or truncating) the file at the given path.
+
+    Args:
+        filepath (string): The path of the .jsonl file to write. If compress is True, ".gz" is appended to the path.
+        compress (bool, optional): Specifies whether the file should be gzip compressed. Defaults to False.
+
+    Fields:
+        _filepath (string): The path of the file being written.
+        _file (file): The open file object. Uncompressed files are line buffered, so that each record is visible as
+                      soon as it is written.
+        _lock (Lock): Guards _file, as records are written by multiple threads.
+    """
+    if compress:
+      self._filepath = filepath + ".gz"
+      self._file = gzip.open(self._filepath, 'wt', encoding='utf-8')
+    else:
+      self._filepath = filepath
+      self._file = open(self._filepath, 'w', encoding='utf-8', buffering=1)
+    self._lock = threading.Lock()
+
+  def get_filepath(self):
+    """
+    Summary:
+        Returns the path of the file being written.
+
+    Returns:
+        string: The path of the file being written.
+    """
+    return self._filepath
+
+  def write(self, record_type, **fields):
+    """
+    Summary:
+        Writes one record to the log, stamped with its type and the current time.
+
+    Args:
+        record_type (string): The type of the record, such as "error", "skip", or "school".
+        **fields: The remaining fields of the record, which must be JSON serializable (dates are written as strings).
+    """
+    record = {'time': datetime.datetime.now().isoformat(), 'type': record_type}
+    record.update(fields)
+    line = json.dumps(record, default=str) + "\n"
+    with self._lock:
+      self._file.write(line)
+
+  def close(self):
+    """
+    Summary:
+        Flushes and closes the log file.
+    """
+    with self._lock:
+      self._file.close()
@@ -0,0 +1,131 @@
+from statistics import median
+import threading
+import json
+import os
+
+class CostScheduler:
+  """
+  Summary:
+      Orders website IDs by their expected cost, using the course counts and durations recorded for each ID in previous
+      runs, so that the longest schools are dispatched first. Since every worker pulls the next ID from the executor's
+      shared queue as soon as it becomes idle, the remaining short schools fill in around the long ones instead of a
+      single large school finishing long after every other thread has gone idle.
+
+  Organization:
+      Tufts Code For Good: The Village Method Project
+  """
+
+  def __init__(self, filepath, default_cost=None):
+    """
+    Summary:
+        Initializes a CostScheduler object, loading the history of previous runs if it exists.
+
+    Args:
+        filepath (string): The path of the JSON file storing the history of previous runs.
+        default_cost (float, optional): The expected cost, in seconds, of an ID with no history. Defaults to None, which
+                                        uses the median duration of every school with a recorded scrape.
+
+    Fields:
+        _filepath (string): The path of the JSON file storing the history of previous runs.
+        _default_cost (float): The expected cost, in seconds, of an ID with no history, or None.
+        _history (dict): Maps each website ID to a dictionary containing its status, number of courses, and the
+                         duration, in seconds, of its latest full scrape.
+        _lock (Lock): Guards _history, as results are recorded by multiple threads.
+    """
+    self._filepath = filepath
+    self._default_cost = default_cost
+    self._history = {}
+    self._lock = threading.Lock()
+    self._load()
+
+  def _load(self):
+    """
+    Summary:
+        Loads the history of previous runs, starting with an empty history if the file is missing or unreadable.
+    """
+    try:
+      with open(self._filepath, 'r') as f:
+        self._history = {int(website_id): entry for website_id, entry in json.load(f).items()}
+    except (OSError, ValueError):
+      self._history = {}
+
+  def _get_default_cost(self):
+    """
+    Summary:
+        Returns the expected cost of an ID with no history. Must be called while holding self._lock.
+
+    Returns:
+        float: The expected cost, in seconds.
+    """
+    if self._default_cost is not None:
+      return self._default_cost
+    durations = [entry['seconds'] for entry in self._history.values() if entry.get('num_courses')]
+    return median(durations) if durations else 1.0
+
+  def get_expected_costs(self, website_ids):
+    """
+    Summary:
+        Returns the expected cost of each of the given website IDs. Invalid pages and schools without courses cost
+        whatever they took last time, schools with courses cost the duration of their latest full scrape, and IDs with
+        no history cost the default cost.
+
+    Args:
+        website_ids (list): The website IDs to be scraped.
+
+    Returns:
+        dict: Maps each website ID to its expected cost, in seconds.
+    """
+    with self._lock:
+      default_cost = self._get_default_cost()
+      return {website_id: self._history[website_id]['seconds'] if website_id in self._history else default_cost
+              for website_id in website_ids}
+
+  def order(self, website_ids, expected_costs=None):
+    """
+    Summary:
+        Orders website IDs from the most to the least expensive, breaking ties by ID so that the order is stable.
+
+    Args:
+        website_ids (list): The website IDs to be scraped.
+        expected_costs (dict, optional): The expected cost of each website ID, as returned by get_expected_costs.
+                                         Defaults to None, in which case they are looked up.
+
+    Returns:
+        list: The website IDs, longest first.
+    """
+    if expected_costs is None:
+      expected_costs = self.get_expected_costs(website_ids)
+    return sorted(website_ids, key=lambda website_id: (-expected_costs[website_id], website_id))
+
+  def record(self, website_id, status, num_courses, seconds):
+    """
+    Summary:
+        Records the result of scraping a school. Schools that were skipped because they were recently scraped keep the
+        duration of their last full scrape, since that is what they will cost once their page is updated. Safe to call
+        from any thread.
+
+    Args:
+        website_id (int): The unique 3-4 digit ID used by the A-G course list website to identify institutions.
+        status (string): "ok", "invalid", or "error".
+        num_courses (int): The number of courses scraped from the school.
+        seconds (float): The time, in seconds, taken to scrape the school.
+    """
+    with self._lock:
+      previous = self._history.get(website_id)
+      # An error ends the scrape early, and a valid school with no courses was most likely skipped as recently
+      # scraped, so neither is a better estimate than an existing full scrape
+      if previous and previous.get('num_courses') and (status == "error" or (status == "ok" and not num_courses)):
+        return
+      self._history[website_id] = {'status': status, 'num_courses': num_courses, 'seconds': round(seconds, 3)}
+
+  def save(self):
+    """
+    Summary:
+        Writes the history to its JSON file, replacing the previous file only once the new one is complete.
+    """
+    with self._lock:
+      history = {str(website_id): entry for website_id, entry in sorted(self._history.items())}
+    temp_filepath = self._filepath + "." + str(os.getpid()) + ".tmp"
+    with open(temp_filepath, 'w') as f:
+      json.dump(history, f)
+    os.replace(temp_filepath, self._filepath)
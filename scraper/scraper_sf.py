@@ -1,11 +1,47 @@
 from scraper_worker_sf import ScraperWorker
+from rate_limiter import AdaptiveRateLimiter
+from stage_timer import StageTimer
+from progress import ProgressAggregator, format_time, get_time_per_page_str
+from run_log import RunLog
+from scheduler import CostScheduler
+from lease_queue import LeaseQueue
+from staging import StagingWriter
+from external_ids import ExternalIdService
+from sf_client import create_salesforce, get_last_modified_by_website_id
+from simple_salesforce.exceptions import SalesforceError
+from requests.exceptions import RequestException
 import concurrent.futures
+import threading
+import socket
+import textwrap
+import logging
 import time
 import datetime
 import os.path
 from os import path
 from statistics import mean
-import sys
+
+class _WebsiteIdFilter(logging.Filter):
+  """
+  Summary:
+      Logging filter that gives every record a website_id attribute, so that records from loggers other than a
+      ScraperWorker's (such as Selenium's) can be formatted alongside them.
+  """
+
+  def filter(self, record):
+    """
+    Summary:
+        Sets a placeholder website_id on any record that does not have one.
+
+    Args:
+        record (LogRecord): The record being logged.
+
+    Returns:
+        bool: Always True, as no records are filtered out.
+    """
+    if not hasattr(record, "website_id"):
+      record.website_id = "-"
+    return True
 
 class Scraper:
   """ 
@@ -21,12 +57,33 @@ class Scraper:
       Tufts Code For Good: The Village Method Project
   """
 
-  def __init__(self):
+  def __init__(self, website_address=None, sf_options=None, page_rate_limiter=None, sf_rate_limiter=None,
+    history_filepath=None, external_ids_filepath=None):
     """
     Summary:
         Constructor that initializes a Scraper object.
 
+    Args:
+        website_address (string, optional): The partially complete address of a listing of the A-G Course List
+                                            website. Defaults to None, which corresponds with the live website.
+        sf_options (dict, optional): Keyword arguments used by each ScraperWorker to create its Salesforce instance.
+                                     Defaults to None, which authenticates with the credentials found in environment
+                                     variables.
+        page_rate_limiter (AdaptiveRateLimiter, optional): The rate limiter for loading pages. Defaults to None, which
+                                                           creates a rate limiter suited to the live website.
+        sf_rate_limiter (AdaptiveRateLimiter, optional): The rate limiter for calls to the Salesforce API. Defaults to
+                                                         None, which creates a rate limiter suited to Salesforce.
+        history_filepath (string, optional): The path of the JSON file storing the course counts and durations of each
+                                             school in previous runs. Defaults to None, which uses cost-history.json in
+                                             the "logs" subdirectory.
+        external_ids_filepath (string, optional): The path of the SQLite database storing the external ID of every
+                                                  course scraped so far. Defaults to None, which uses
+                                                  external-ids.sqlite3 in the "logs" subdirectory.
+
     Fields:
+        _website_address (string): The partially complete address of a listing of the A-G Course List website, or None
+                                   for the live website.
+        _sf_options (dict): Keyword arguments used by each ScraperWorker to create its Salesforce instance, or None.
         _fsc (int): A unique 3-4 digit ID used by the A-G course list website to identify institutions. Specifies the
                    school where scraping will begin.
         _lsc (int): A unique 3-4 digit ID used by the A-G course list website to identify institutions. Specifies the
@@ -36,48 +93,79 @@ class Scraper:
         _force_rescraping (bool): Specifies whether the scraper should rescrape data which has not been recently
                                  updated.
         _run_start_time (float): Stores a float value representing the starting time, in seconds, of the run function.
-        _error_output_list (list): Contains all errors that were collected during the execution of the scraper.
-        _school_dicts_list (list): Contains all scraped data in the form of dictionaries representing School objects.
-        _completed_ids (list): Contains all website IDs for the institutions that have been fully scraped.
+        _run_log (RunLog): The JSON Lines log to which every error, skipped school, and per-school summary is written
+                           while the scraper runs.
+        _schools_list (list): Contains all scraped data in the form of School objects.
+        _log_filepath (string): The path of the .txt debug file for the current run. The .log file capturing the
+                                output of each ScraperWorker shares its name.
+        _log_handler (FileHandler): The logging handler that writes the .log file during the run.
+        _progress (ProgressAggregator): Collects the results of every ScraperWorker instance and renders the progress
+                                        bar during the run.
         _num_courses_list (list): Contains the number of courses from each school course page visited.
         _invalid_ids_list (list): Contains the website IDs of all pages that were not valid institution pages.
         _school_error_ids_list (list): Contains the website IDs of all pages that experienced an error while creating a
                                       School object.
         _course_error_ids_list (list): Contains the website IDs of all pages that experienced an error while creating a
                                       Course object.
+        _retried_ids_list (list): Contains the website IDs of all pages that were re-queued after an error.
+        _unchanged_ids_list (list): Contains the website IDs of all schools that were skipped by the delta pre-pass, as
+                                    they have not been updated since they were last scraped.
+        _probe_workers (list): Contains the ScraperWorker instances used by the delta pre-pass, one per thread.
+        _probe_local (local): Holds the ScraperWorker instance used by each thread during the delta pre-pass.
+        _probe_lock (Lock): Guards _probe_workers, as probe workers are created by multiple threads.
+        _staging_writer (StagingWriter): The staging area to which every ScraperWorker writes scraped schools and
+                                         courses, or None if they are upserted into Salesforce while scraping.
+        _last_modified_sf (dict): Maps each website ID to the most recent date of change of its school on Salesforce,
+                                  fetched once at the start of a staged run, or None.
+        _page_rate_limiter (AdaptiveRateLimiter): The rate limiter shared by all ScraperWorker instances for loading
+                                                  pages from the A-G Course List website.
+        _sf_rate_limiter (AdaptiveRateLimiter): The rate limiter shared by all ScraperWorker instances for calls to the
+                                                Salesforce API.
+        _stage_timer (StageTimer): The timer shared by all ScraperWorker instances for collecting per-stage timings.
+                                   Only enabled when the run function is called with collect_timings set to True.
+        _history_filepath (string): The path of the JSON file storing the history of previous runs, or None.
+        _scheduler (CostScheduler): Orders website IDs by their expected cost and records the cost of each school
+                                    during the run.
+        _external_ids_filepath (string): The path of the SQLite database storing the external ID of every course
+                                         scraped so far, or None.
+        _external_ids (ExternalIdService): Issues the external ID of each course to every ScraperWorker during the run.
     """
+    self._website_address = website_address
+    self._sf_options = sf_options
     self._fsc = None
     self._lsc = None
     self._num_websites = None
     self._years = None
     self._force_rescraping = None
     self._run_start_time = None
-    self._error_output_list = []
-    self._school_dicts_list = []
-    self._completed_ids = []
+    self._run_log = None
+    self._schools_list = []
+    self._log_filepath = None
+    self._log_handler = None
+    self._progress = None
     self._num_courses_list = []
     self._invalid_ids_list = []
     self._school_error_ids_list = []
     self._course_error_ids_list = []
+    self._retried_ids_list = []
+    self._unchanged_ids_list = []
+    self._probe_workers = []
+    self._probe_local = threading.local()
+    self._probe_lock = threading.Lock()
+    self._staging_writer = None
+    self._last_modified_sf = None
+    self._page_rate_limiter = page_rate_limiter if page_rate_limiter else AdaptiveRateLimiter()
+    self._sf_rate_limiter = sf_rate_limiter if sf_rate_limiter else AdaptiveRateLimiter(rate=5.0, max_rate=25.0)
+    self._stage_timer = StageTimer()
+    self._history_filepath = history_filepath
+    self._scheduler = None
+    self._external_ids_filepath = external_ids_filepath
+    self._external_ids = None
 
   #####################################################################################################################
   ######################################### PRIVATE GENERAL PURPOSE METHODS ###########################################
   #####################################################################################################################
 
-  def _block_print(self):
-    """
-    Summary:
-        Prevents any code following a call to this function from printing to the terminal.
-    """
-    sys.stdout = open(os.devnull, 'w')
-
-  def _enable_print(self):
-    """
-    Summary:
-        Enables any code following a call to this function from printing to the terminal.
-    """
-    sys.stdout = sys.__stdout__
-
   def _populate(self, list_to_populate, data_list):
     """
     Summary: Populates the list specified by list_to_populate with the elements of data_list
@@ -89,57 +177,6 @@ class Scraper:
     for elem in data_list:
       list_to_populate.append(elem)
 
-  def _format_time(self, time_diff):
-    """
-    Summary:
-        Formats a time, specified in seconds, into the form "hours:minutes:seconds.milliseconds".
-
-    Args:
-        time_diff (float): The time, in seconds, to be formatted.
-
-    Returns:
-        string: The formatted version of time_diff.
-    """
-    hours, rem = divmod(time_diff, 3600)
-    minutes, seconds = divmod(rem, 60)
-    return "{:0>2}:{:0>2}:{:05.2f}".format(int(hours),int(minutes),seconds)
-
-  def _print_progress_bar(self, decimals=1, length=50, fill="█", print_end=""):
-    """
-    Summary:
-        Prints a progress bar to monitor the progress and remaining time of the scraping process.
-
-    Args:
-        decimals (int, optional): The number of decimal places to display for the completion percentage. Defaults to 1.
-        length (int, optional): The length of the progress bar in characters. Defaults to 50.
-        fill (string, optional): The string to fill the progress bar with. Defaults to "█".
-        print_end (string, optional): The string to print at the end of the progress bar. Defaults to "".
-    """
-    # The current iteration, or progress level, is the length of self._completed_ids
-    iteration = len(self._completed_ids)
-    current_id = "none"
-    remaining_time = "unknown"
-
-    # If _completed_ids is not empty, obtain values for current_id and remaining_time
-    if self._completed_ids:
-      current_id = str(self._completed_ids[-1])
-      # Remaining time is the average time to scrape one school times the number of schools left to scrape
-      remaining_time = self._format_time((time.time() - self._run_start_time) / float(iteration) * \
-        (self._num_websites - iteration))
-
-    # Format the progress bar
-    percent = ("{0:." + str(decimals) + "f}").format(100 * (iteration / float(self._num_websites)))
-    filled_length = int(length * iteration // self._num_websites)
-    bar = fill * filled_length + '-' * (length - filled_length)
-
-    # Print the progress bar
-    print(f'\rProgress: |{bar}| {percent}% Complete, Time Remaining: {remaining_time}, Latest ID: {current_id}', \
-      end = print_end, flush=True)
-
-    # Print a newline when the progress bar finishes
-    if iteration == self._num_websites: 
-      print()
-
   #####################################################################################################################
   ########################################## PRIVATE FILE CREATION METHODS ############################################
   #####################################################################################################################
@@ -194,19 +231,8 @@ class Scraper:
     if not error_list:
       return "None"
 
-    error_list_str = "\n    "
-    current_line_str = ""
-
-    # Add each error to the error list string, adding a newline and spaces if the line length exceeds 80
-    for error_id in error_list:
-      current_line_str += str(error_id) + ", "
-      error_list_str += str(error_id) + ", "
-      if (len(current_line_str) > 80):
-        error_list_str += "\n    "
-        current_line_str = ""
-
-    # Find the last instance of a comma and remove it from the string before returning
-    return error_list_str[:error_list_str.rfind(",")]
+    # Join the error IDs once, then wrap the result into indented lines of roughly 80 characters
+    return "\n    " + "\n    ".join(textwrap.wrap(", ".join(str(error_id) for error_id in error_list), 84))
 
   def _get_avg_num_courses_str(self):
     """
@@ -241,61 +267,108 @@ class Scraper:
     # Save relevant information into header_str
     header_str = ""
     header_str += "Date: " + datetime.datetime.now().strftime("%x") + "\n"
-    header_str += "Time to run scraper: " + self._format_time(time_to_run_program) + "\n"
+    header_str += "Time to run scraper: " + format_time(time_to_run_program) + "\n"
     header_str += "Websites visited: " + str(self._num_websites) + "\n"
     header_str += "Years scraped: " + str(self._years) + "\n"
     header_str += self._get_avg_num_courses_str()
-    time_per_school = time_to_run_program / self._num_websites
-    header_str += "Average time to scrape one school course page: " + self._format_time(time_per_school) + "\n"
-    header_str += "Estimated time to run scraper fully (~5141 school course pages): " + \
-      self._format_time(5141 * time_per_school) + "\n"
+    header_str += get_time_per_page_str(time_to_run_program, self._num_websites)
+    header_str += "Final page request rate: " + self._page_rate_limiter.get_stats_str() + "\n"
+    header_str += "Final Salesforce request rate: " + self._sf_rate_limiter.get_stats_str() + "\n"
     header_str += "\nInvalid website IDs: " + self._get_error_list_string(self._invalid_ids_list) + "\n"
     header_str += "Error website IDs (while creating a School object): " + \
       self._get_error_list_string(self._school_error_ids_list) + "\n"
     header_str += "Error website IDs (while creating a Course object): " + \
       self._get_error_list_string(self._course_error_ids_list) + "\n"
-    header_str += "\nError Messages:\n\n" 
+    header_str += "Retried website IDs: " + self._get_error_list_string(self._retried_ids_list) + "\n"
+    if self._staging_writer:
+      header_str += "Staged to: " + self._staging_writer.get_run_directory() + "\n"
+    if self._unchanged_ids_list:
+      header_str += "Unchanged schools skipped by the delta pre-pass: " + str(len(self._unchanged_ids_list)) + "\n"
+    if self._stage_timer.is_enabled():
+      header_str += "\nStage Timings:\n" + self._stage_timer.get_summary_str()
+    header_str += "\nError messages, skipped schools, and per-school summaries: " + self._run_log.get_filepath() + "\n"
 
     return header_str
 
   def _format_data_tuples(self, data_tuples):
     """
     Summary:
-        Formats the list of data tuples obtained from the ScraperWorker objects into string format.
+        Collects the list of data tuples obtained from the ScraperWorker objects, returning the summary of the run in
+        string format. Error messages are not included, as they were already written to the run log.
 
     Args:
         data_tuples (list): The list of data tuples obtained from the ScraperWorker objects.
 
     Returns:
-        string: The properly formatted data from each data tuple in string format.
+        string: The summary of the run in string format.
     """
     for data_tuple in data_tuples:
-      self._populate(self._school_dicts_list, data_tuple[0])
-      self._error_output_list.append(data_tuple[1])
-      self._populate(self._num_courses_list, data_tuple[2])
-      self._populate(self._invalid_ids_list, data_tuple[3])
-      self._populate(self._school_error_ids_list, data_tuple[4])
-      self._populate(self._course_error_ids_list, data_tuple[5])
-
-    data_string = ""
-    data_string += self._get_header_str()
-    for error_string in self._error_output_list:
-      data_string += error_string + "\n"
-    return data_string
+      self._populate(self._schools_list, data_tuple[0])
+      self._populate(self._num_courses_list, data_tuple[1])
+      self._populate(self._invalid_ids_list, data_tuple[2])
+      self._populate(self._school_error_ids_list, data_tuple[3])
+      self._populate(self._course_error_ids_list, data_tuple[4])
+
+    return self._get_header_str()
+
+  def _write_timings_output(self, filepath):
+    """
+    Summary:
+        Exports the per-stage timings collected during the run as JSON, so that different runs can be compared.
+
+    Args:
+        filepath (string): The path of the .txt debug file, which the JSON file is named after.
+    """
+    metadata = {
+        'date': datetime.datetime.now().isoformat(),
+        'first_website_id': self._fsc,
+        'last_website_id': self._lsc,
+        'websites_visited': self._num_websites,
+        'years': self._years,
+        'force_rescraping': self._force_rescraping,
+        'time_to_run': time.time() - self._run_start_time
+    }
+    self._stage_timer.write_json(os.path.splitext(filepath)[0] + "-timings.json", metadata)
+
+  def _start_logging(self):
+    """
+    Summary:
+        Captures log records from every ScraperWorker (tagged with their thread and website ID), as well as warnings
+        from third-party libraries, into a .log file next to the .txt debug file for the current run.
+    """
+    self._log_handler = logging.FileHandler(os.path.splitext(self._log_filepath)[0] + ".log")
+    self._log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(threadName)s] [ID %(website_id)s] "
+                                                     "%(name)s: %(message)s"))
+    self._log_handler.addFilter(_WebsiteIdFilter())
+    logging.getLogger().addHandler(self._log_handler)
+    logging.getLogger("scraper").setLevel(logging.INFO)
+
+  def _stop_logging(self):
+    """
+    Summary:
+        Stops capturing log records into the .log file for the current run.
+    """
+    logging.getLogger().removeHandler(self._log_handler)
+    self._log_handler.close()
+    self._log_handler = None
 
   def _write_debug_output(self, data_tuples):
     """
     Summary:
-        Writes debug metadata to an output file in the "logs" subdirectory.
+        Writes debug metadata to an output file in the "logs" subdirectory, along with a JSON export of the per-stage
+        timings if they were collected.
 
     Args:
         data_tuples (list): The list of data tuples obtained from the ScraperWorker objects.
     """
     try:
-      f = open(self._create_file_name(), 'w')
+      filepath = self._log_filepath
+      f = open(filepath, 'w')
       data_string = self._format_data_tuples(data_tuples)
       f.write(data_string)
       f.close()
+      if self._stage_timer.is_enabled():
+        self._write_timings_output(filepath)
     except Exception:
       print("An error occurred while attempting to write to the debug output log.")
 
@@ -303,7 +376,7 @@ class Scraper:
   ############################################ PRIVATE SCRAPING METHODS ###############################################
   #####################################################################################################################
 
-  def _run_scraper_worker(self, website_id, years, force_rescraping):
+  def _run_scraper_worker(self, website_id, years, force_rescraping, retrying=False):
     """
     Summary:
         Creates a new ScraperWorker instance to obtain data from a specified school, returning that data for later use.
@@ -313,25 +386,329 @@ class Scraper:
         years (int): The number of years, starting from the most recent year, from which data should be scraped.
         force_rescraping (bool): Specifies whether the scraper should rescrape data which has not been recently
                                  updated.
+        retrying (bool, optional): Specifies whether this school is being re-queued after an error, in which case the
+                                   progress bar is not updated. Defaults to False.
 
     Returns:
-        tuple: A tuple containing all necessary school/course/debug information collected by the ScraperWorker
-               instance.
+        tuple: The data tuple obtained from the ScraperWorker instance.
     """
-    self._block_print()
-    scraper_worker = ScraperWorker()
+    start_time = time.time()
+    scraper_worker = ScraperWorker(self._page_rate_limiter, self._sf_rate_limiter, self._stage_timer,
+                                   self._website_address, self._sf_options, self._run_log, self._staging_writer,
+                                   self._last_modified_sf, self._external_ids)
     data_tuple = scraper_worker.run_page(website_id, years, force_rescraping)
     scraper_worker.close()
-    self._completed_ids.append(website_id)
-    self._enable_print()
-    self._print_progress_bar()
+    # Record the cost of the school so that future runs can schedule it accordingly
+    self._scheduler.record(website_id, self._get_status(website_id, data_tuple), sum(data_tuple[1]),
+                           time.time() - start_time)
+    # Hand the results to the aggregator, which owns all progress and result accounting
+    self._progress.complete(website_id, data_tuple, retrying)
     return data_tuple
 
+  def _get_status(self, website_id, data_tuple):
+    """
+    Summary:
+        Returns the status of a scraped page, as written to the run log.
+
+    Args:
+        website_id (int): The unique 3-4 digit ID used by the A-G course list website to identify institutions.
+        data_tuple (tuple): The data tuple obtained from the ScraperWorker instance.
+
+    Returns:
+        string: "invalid" if the page was not a valid institution page, "error" if the page experienced an error while
+                creating a School or Course object, and "ok" otherwise.
+    """
+    if website_id in data_tuple[2]:
+      return "invalid"
+    if website_id in data_tuple[3] or website_id in data_tuple[4]:
+      return "error"
+    return "ok"
+
+  def _get_failed_ids(self, data_tuples_by_id):
+    """
+    Summary:
+        Returns the website IDs of all pages that experienced an error while creating a School or Course object.
+
+    Args:
+        data_tuples_by_id (dict): Maps each website ID to the data tuple obtained from its ScraperWorker instance.
+
+    Returns:
+        list: The website IDs of all pages that should be re-queued.
+    """
+    return [website_id for website_id, data_tuple in data_tuples_by_id.items()
+            if self._get_status(website_id, data_tuple) == "error"]
+
+  def _retry_failed_ids(self, executor, years, max_retries=3, base_delay=30):
+    """
+    Summary:
+        Re-queues every page that experienced an error, waiting an exponentially increasing amount of time before each
+        round of retries so that a throttled upstream has time to recover. The aggregator replaces the data tuple of
+        each retried page with the data tuple of its latest attempt.
+        Note: Retries always force rescraping, since the first attempt may have already upserted the school, which
+        would otherwise cause the retry to skip it as recently scraped.
+
+    Args:
+        executor (ThreadPoolExecutor): The executor used to run the retried ScraperWorker instances.
+        years (int): The number of years, starting from the most recent year, from which data should be scraped.
+        max_retries (int, optional): The maximum number of rounds of retries. Defaults to 3.
+        base_delay (float, optional): The time, in seconds, to wait before the first round of retries. Each following
+                                      round waits twice as long as the previous one. Defaults to 30.
+    """
+    for attempt in range(max_retries):
+      failed_ids = self._get_failed_ids(self._progress.wait())
+      if not failed_ids:
+        return
+      for website_id in failed_ids:
+        if not website_id in self._retried_ids_list:
+          self._retried_ids_list.append(website_id)
+
+      delay = base_delay * 2 ** attempt
+      print("Retrying " + str(len(failed_ids)) + " school course page(s) in " + str(delay) + " seconds (attempt " + \
+        str(attempt + 1) + " of " + str(max_retries) + ")...")
+      time.sleep(delay)
+
+      list(executor.map(lambda website_id: self._run_scraper_worker(website_id, years, True, retrying=True),
+                        self._scheduler.order(failed_ids)))
+
+  def _fetch_last_modified_sf(self):
+    """
+    Summary:
+        Fetches the most recent date of change of every school on Salesforce in a single query, so that a staged or
+        delta run can skip recently scraped schools without querying Salesforce for each one. If Salesforce cannot be
+        reached, every school is scraped instead.
+
+    Returns:
+        dict: Maps each website ID to the most recent date of change of its school on Salesforce, or None if Salesforce
+              could not be reached.
+    """
+    try:
+      with self._sf_rate_limiter.limit():
+        return get_last_modified_by_website_id(create_salesforce(self._sf_options))
+    except (SalesforceError, RequestException):
+      logging.getLogger("scraper").warning("Could not fetch the dates of change from Salesforce", exc_info=True)
+      print("Could not reach Salesforce, so every school will be scraped.")
+      return None
+
+  def _get_probe_worker(self):
+    """
+    Summary:
+        Returns the ScraperWorker instance used by the current thread during the delta pre-pass, creating it if
+        necessary. Each thread reuses a single worker (and Chrome instance) for every page it probes.
+
+    Returns:
+        ScraperWorker: The ScraperWorker instance of the current thread.
+    """
+    scraper_worker = getattr(self._probe_local, "worker", None)
+    if scraper_worker is None:
+      scraper_worker = ScraperWorker(self._page_rate_limiter, self._sf_rate_limiter, self._stage_timer,
+                                     self._website_address, self._sf_options, self._run_log)
+      self._probe_local.worker = scraper_worker
+      with self._probe_lock:
+        self._probe_workers.append(scraper_worker)
+    return scraper_worker
+
+  def _probe_website(self, website_id, progress):
+    """
+    Summary:
+        Probes the school course page with the specified ID for its most recent date of change, reporting the result
+        to the given aggregator.
+
+    Args:
+        website_id (int): The unique 3-4 digit ID used by the A-G course list website to identify institutions.
+        progress (ProgressAggregator): Collects the result of each probe and renders the progress bar.
+    """
+    progress.complete(website_id, self._get_probe_worker().probe_page(website_id))
+
+  def _run_delta_pre_pass(self, website_ids, max_workers):
+    """
+    Summary:
+        Gathers the most recent date of change of every school in a single Salesforce query, and the most recent date
+        of change of every page by loading only its most recent year, then returns the website IDs of the schools that
+        need to be scraped: those that are new, have changed since they were last scraped, have no date of change, or
+        could not be probed. Invalid pages and unchanged schools are recorded and skipped.
+        Note: Only the most recent year of each page is checked, so a school whose older years are updated without
+        its most recent year changing will be skipped until its most recent year changes (or a full run is made).
+        If Salesforce cannot be reached, every school that is not invalid is scraped.
+
+    Args:
+        website_ids (list): The website IDs to be probed.
+        max_workers (int): The number of pages to probe in parallel, or None for the ThreadPoolExecutor default.
+
+    Returns:
+        list: The website IDs of the schools that need to be scraped.
+    """
+    print("Checking " + str(len(website_ids)) + " school course pages for updates...")
+    start_time = time.time()
+    progress = ProgressAggregator(len(website_ids))
+    try:
+      with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Fetch the Salesforce dates of change alongside the first probes, unless staging has already fetched them
+        last_modified_sf_future = None
+        if self._last_modified_sf is None:
+          last_modified_sf_future = executor.submit(self._fetch_last_modified_sf)
+        list(executor.map(lambda website_id: self._probe_website(website_id, progress), website_ids))
+        last_modified_sf = self._last_modified_sf
+        if last_modified_sf_future:
+          last_modified_sf = last_modified_sf_future.result()
+    finally:
+      probes = progress.stop()
+      for scraper_worker in self._probe_workers:
+        scraper_worker.close()
+      self._probe_workers = []
+
+    changed_ids = []
+    for website_id in website_ids:
+      status, last_updated = probes[website_id]
+      # Without the Salesforce dates of change, every valid school is treated as changed
+      last_modified = last_modified_sf.get(website_id) if last_modified_sf else None
+      if status == "invalid":
+        self._invalid_ids_list.append(website_id)
+      elif status == "ok" and last_updated and last_modified and last_modified >= last_updated:
+        self._unchanged_ids_list.append(website_id)
+      else:
+        changed_ids.append(website_id)
+
+    self._run_log.write("delta", checked=len(website_ids), changed=len(changed_ids),
+                        unchanged=len(self._unchanged_ids_list), invalid=len(self._invalid_ids_list),
+                        seconds=round(time.time() - start_time, 3))
+    print(str(len(changed_ids)) + " of " + str(len(website_ids)) + " school course pages changed since they were " + \
+      "last scraped.")
+    return changed_ids
+
+  def _run_node_thread(self, queue, node_id, years, force_rescraping, poll_interval):
+    """
+    Summary:
+        Repeatedly leases a website ID from the shared work queue, scrapes it, and reports the result, until no ID in
+        the queue is pending or leased.
+
+    Args:
+        queue (LeaseQueue): The shared work queue.
+        node_id (string): The unique name of this node in the queue.
+        years (int): The number of years, starting from the most recent year, from which data should be scraped.
+        force_rescraping (bool): Specifies whether the scraper should rescrape data which has not been recently
+                                 updated.
+        poll_interval (float): The time, in seconds, to wait before asking for more work when no ID is ready to be
+                               leased.
+    """
+    try:
+      while True:
+        leases = queue.lease(node_id)
+        if not leases:
+          # IDs may still be leased by other nodes or waiting to be retried, and are only finished once completed
+          counts = queue.get_counts()
+          if not counts['pending'] and not counts['leased']:
+            return
+          time.sleep(poll_interval)
+          continue
+
+        website_id, attempts = leases[0]
+        # A retried ID may have been upserted by its first attempt, so retries always force rescraping
+        retrying = attempts > 1
+        if retrying and not website_id in self._retried_ids_list:
+          self._retried_ids_list.append(website_id)
+        start_time = time.time()
+        data_tuple = self._run_scraper_worker(website_id, years, force_rescraping or retrying)
+        status = self._get_status(website_id, data_tuple)
+        queue.complete(node_id, website_id, {'node': node_id, 'status': status, 'num_courses': sum(data_tuple[1]),
+                                             'seconds': round(time.time() - start_time, 3)}, failed=status == "error")
+    finally:
+      queue.close()
+
+  def _run_heartbeat(self, queue, node_id, interval, stopped):
+    """
+    Summary:
+        Renews the leases held by this node and reports the state of the shared work queue until stopped is set.
+
+    Args:
+        queue (LeaseQueue): The shared work queue.
+        node_id (string): The unique name of this node in the queue.
+        interval (float): The time, in seconds, between renewals.
+        stopped (Event): Set once the node has finished scraping.
+    """
+    try:
+      while not stopped.wait(interval):
+        queue.renew(node_id)
+        counts = queue.get_counts()
+        print("Queue: " + str(counts['pending']) + " pending, " + str(counts['leased']) + " leased, " + \
+          str(counts['done']) + " done, " + str(counts['failed']) + " failed", flush=True)
+    finally:
+      queue.close()
+
+  def _get_history_filepath(self):
+    """
+    Summary:
+        Returns the path of the JSON file storing the course counts and durations of each school in previous runs.
+
+    Returns:
+        string: The path of the history file.
+    """
+    if self._history_filepath:
+      return self._history_filepath
+    return os.path.join(os.path.dirname(os.path.realpath(__file__)), "logs", "cost-history.json")
+
+  def _get_external_ids_filepath(self):
+    """
+    Summary:
+        Returns the path of the SQLite database storing the external ID of every course scraped so far.
+
+    Returns:
+        string: The path of the external ID database.
+    """
+    if self._external_ids_filepath:
+      return self._external_ids_filepath
+    return os.path.join(os.path.dirname(os.path.realpath(__file__)), "logs", "external-ids.sqlite3")
+
+  def _begin_run(self, first_website_id, last_website_id, years, force_rescraping, collect_timings, compress_run_log):
+    """
+    Summary:
+        Initializes the fields of a run, opens the external ID database, starts capturing log records, and opens the run
+        log.
+
+    Args:
+        first_website_id (int): The lowest website ID to be scraped.
+        last_website_id (int): The highest website ID to be scraped.
+        years (int): The number of years, starting from the most recent year, from which data should be scraped.
+        force_rescraping (bool): Specifies whether the scraper should rescrape data which has not been recently
+                                 updated.
+        collect_timings (bool): Specifies whether per-stage timings should be collected.
+        compress_run_log (bool): Specifies whether the JSON Lines run log should be gzip compressed.
+    """
+    self._fsc = first_website_id
+    self._lsc = last_website_id
+    self._run_start_time = time.time()
+    self._num_websites = self._lsc - self._fsc + 1
+    self._years = years
+    self._force_rescraping = force_rescraping
+    self._stage_timer = StageTimer(enabled=collect_timings)
+    self._log_filepath = self._create_file_name()
+    self._scheduler = CostScheduler(self._get_history_filepath())
+    self._external_ids = ExternalIdService(self._get_external_ids_filepath())
+    self._start_logging()
+    self._run_log = RunLog(os.path.splitext(self._log_filepath)[0] + ".jsonl", compress=compress_run_log)
+    self._run_log.write("run", first_website_id=self._fsc, last_website_id=self._lsc, years=self._years,
+                        force_rescraping=self._force_rescraping)
+
+  def _end_run(self, data_tuples_by_id):
+    """
+    Summary:
+        Saves the cost history, writes the .txt debug file, and writes the summary of the run to the run log.
+
+    Args:
+        data_tuples_by_id (dict): Maps each website ID to the data tuple of its latest attempt.
+    """
+    self._scheduler.save()
+    # Write the data to a new debug output file
+    self._write_debug_output(list(data_tuples_by_id.values()))
+    self._run_log.write("summary", websites_visited=self._num_websites, invalid_ids=self._invalid_ids_list,
+                        school_error_ids=self._school_error_ids_list, course_error_ids=self._course_error_ids_list,
+                        retried_ids=self._retried_ids_list, seconds=round(time.time() - self._run_start_time, 3))
+
   #####################################################################################################################
   ######################################### PUBLIC METHODS FOR USE BY CLIENT ##########################################
   #####################################################################################################################
 
-  def run(self, first_website_id=320, last_website_id=5461, years=4, force_rescraping=False):
+  def run(self, first_website_id=320, last_website_id=5461, years=4, force_rescraping=False, collect_timings=False,
+    max_workers=None, compress_run_log=False, delta_only=False, staging_directory=None):
     """
     Summary:
         Scrapes the A-G Course List webpage, utilizing parallel processing to increase time efficiency.
@@ -344,14 +721,21 @@ class Scraper:
         years (int): The number of years, starting from the most recent year, from which data should be scraped.
         force_rescraping (bool): Specifies whether the scraper should rescrape data which has not been recently
                                  updated.
+        collect_timings (bool, optional): Specifies whether per-stage timings should be collected, written into the
+                                          .txt debug file, and exported as JSON. Defaults to False.
+        max_workers (int, optional): The number of school course pages to scrape in parallel. Defaults to None, which
+                                     uses the ThreadPoolExecutor default.
+        compress_run_log (bool, optional): Specifies whether the JSON Lines run log should be gzip compressed. Defaults
+                                           to False.
+        delta_only (bool, optional): Specifies whether only the schools whose pages changed since they were last
+                                     scraped should be scraped, as determined by a fast pre-pass over the most recent
+                                     year of every page. Defaults to False.
+        staging_directory (string, optional): The directory of the staging area. If set, scraped schools and courses
+                                              are written to a new run directory inside the staging area rather than
+                                              to Salesforce, to be loaded later with load_staging.py. Defaults to None,
+                                              in which case they are upserted into Salesforce while scraping.
     """
-    # Initialize values of fields
-    self._fsc = first_website_id
-    self._lsc = last_website_id
-    self._run_start_time = time.time()
-    self._num_websites = self._lsc - self._fsc + 1
-    self._years = years
-    self._force_rescraping = force_rescraping
+    self._begin_run(first_website_id, last_website_id, years, force_rescraping, collect_timings, compress_run_log)
 
     # Print initial run configuration
     page_str = "pages"
@@ -361,19 +745,135 @@ class Scraper:
     if self._years == 1:
       year_str = "scraping data from most recent school year only"
     print("Running scraper (" + str(self._num_websites) + " school course " + page_str + ", " + year_str + ")...")
-    
-    # Print the progress bar initially
-    self._print_progress_bar()
 
     # Generate the list of website IDs to visit
-    website_ids=list(range(self._fsc, self._lsc + 1))
-
-    # Utilize a ThreadPoolExecutor instance to leverage multithreading while scraping
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-      # Map the output of self.run_scraper to a Future object
-      future = executor.map(lambda website_id: self._run_scraper_worker(website_id, years, force_rescraping),
-                            website_ids)
-      # When data collection has completed, cast the Future object to a list of tuples containing the scraped data
-      data_tuples = list(future)
-      # Write the data to a new debug output file
-      self._write_debug_output(data_tuples)
\ No newline at end of file
+    website_ids = list(range(self._fsc, self._lsc + 1))
+    try:
+      # Set up the staging area, named after the log files of this run
+      self._staging_writer = None
+      self._last_modified_sf = None
+      if staging_directory:
+        self._staging_writer = StagingWriter(staging_directory,
+                                             os.path.splitext(os.path.basename(self._log_filepath))[0])
+        if not force_rescraping:
+          self._last_modified_sf = self._fetch_last_modified_sf()
+      # Only schedule the schools that changed since they were last scraped
+      if delta_only:
+        website_ids = self._run_delta_pre_pass(website_ids, max_workers)
+      # Order the website IDs so that the most expensive schools are dispatched first. Every idle thread pulls the next
+      # ID from the executor's shared queue, so cheap schools fill in around the expensive ones rather than leaving a
+      # single large school to finish after every other thread has gone idle
+      expected_costs = self._scheduler.get_expected_costs(website_ids)
+      website_ids = self._scheduler.order(website_ids, expected_costs)
+
+      # The aggregator collects results and renders the progress bar from its own thread, weighting the estimated
+      # remaining time by the expected cost of each school
+      self._progress = ProgressAggregator(len(website_ids), expected_costs=expected_costs)
+      # Utilize a ThreadPoolExecutor instance to leverage multithreading while scraping
+      with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Wait for every school to be scraped, re-raising any unexpected exception from a worker
+        list(executor.map(lambda website_id: self._run_scraper_worker(website_id, years, force_rescraping),
+                          website_ids))
+        # Re-queue any schools that failed with exponential backoff
+        self._retry_failed_ids(executor, years)
+      self._end_run(self._progress.stop())
+      if self._staging_writer:
+        print("Staged schools and courses to " + self._staging_writer.get_run_directory() + ". Load them into " + \
+          "Salesforce with: python load_staging.py " + self._staging_writer.get_run_directory())
+    finally:
+      self._external_ids.close()
+      self._run_log.close()
+      self._stop_logging()
+
+  def seed_queue(self, queue_filepath, first_website_id=320, last_website_id=5461):
+    """
+    Summary:
+        Seeds a shared work queue with a range of website IDs for a distributed run, ordered so that the most expensive
+        schools are leased first. IDs already in the queue keep their progress. Once seeded, any number of machines can
+        call run_node with the same queue to scrape the IDs between them.
+
+    Args:
+        queue_filepath (string): The path of the SQLite database backing the shared work queue.
+        first_website_id (int, optional): A unique 3-4 digit ID used by the A-G course list website to identify
+                                          institutions. Specifies the school where scraping will begin. Defaults to 320.
+        last_website_id (int, optional): A unique 3-4 digit ID used by the A-G course list website to identify
+                                         institutions. Specifies the school where scraping will end. Defaults to 5461.
+
+    Returns:
+        int: The number of IDs that were added to the queue.
+    """
+    scheduler = CostScheduler(self._get_history_filepath())
+    website_ids = list(range(first_website_id, last_website_id + 1))
+    queue = LeaseQueue(queue_filepath)
+    try:
+      return queue.seed(website_ids, scheduler.get_expected_costs(website_ids))
+    finally:
+      queue.close()
+
+  def run_node(self, queue_filepath, years=4, force_rescraping=False, collect_timings=False, max_workers=4,
+    compress_run_log=False, node_id=None, lease_seconds=600, poll_interval=5):
+    """
+    Summary:
+        Scrapes website IDs leased from a shared work queue (see seed_queue) until every ID in the queue has been
+        completed, renewing the leases held by this node from a heartbeat thread. IDs whose leases expire, because the
+        node holding them crashed or lost its connection, are automatically leased again by the remaining nodes, and
+        failed IDs are retried by whichever node is free once their backoff delay has passed. The .txt debug file,
+        .log file, and run log of each node only cover the IDs it scraped.
+
+    Args:
+        queue_filepath (string): The path of the SQLite database backing the shared work queue.
+        years (int, optional): The number of years, starting from the most recent year, from which data should be
+                               scraped. Defaults to 4.
+        force_rescraping (bool, optional): Specifies whether the scraper should rescrape data which has not been
+                                           recently updated. Defaults to False.
+        collect_timings (bool, optional): Specifies whether per-stage timings should be collected, written into the
+                                          .txt debug file, and exported as JSON. Defaults to False.
+        max_workers (int, optional): The number of school course pages this node scrapes in parallel. Defaults to 4.
+        compress_run_log (bool, optional): Specifies whether the JSON Lines run log should be gzip compressed. Defaults
+                                           to False.
+        node_id (string, optional): The unique name of this node in the queue. Defaults to None, which uses the host
+                                    name and process ID.
+        lease_seconds (float, optional): The time, in seconds, after which a lease that has not been renewed expires.
+                                         Defaults to 600.
+        poll_interval (float, optional): The time, in seconds, to wait before asking for more work when no ID is ready
+                                         to be leased. Defaults to 5.
+    """
+    if not node_id:
+      node_id = socket.gethostname() + "-" + str(os.getpid())
+    queue = LeaseQueue(queue_filepath, lease_seconds=lease_seconds)
+    first_website_id, last_website_id = queue.get_id_range()
+    if first_website_id is None:
+      print("The work queue is empty; seed it with seed_queue before running a node.")
+      return
+    counts = queue.get_counts()
+    self._begin_run(first_website_id, last_website_id, years, force_rescraping, collect_timings, compress_run_log)
+    print("Running scraper node " + node_id + " (" + str(counts['pending'] + counts['leased']) + " of " + \
+      str(sum(counts.values())) + " school course pages remaining in the queue)...")
+
+    # The queue is shared with other nodes, so progress is reported from the queue rather than with a progress bar
+    self._progress = ProgressAggregator(self._num_websites, show_progress=False)
+    stopped = threading.Event()
+    heartbeat = threading.Thread(target=self._run_heartbeat, args=(queue, node_id, lease_seconds / 3.0, stopped),
+                                 name="Heartbeat", daemon=True)
+    heartbeat.start()
+    try:
+      with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(self._run_node_thread, queue, node_id, years, force_rescraping, poll_interval)
+                   for i in range(max_workers)]
+        # Re-raise any unexpected exception from a worker
+        for future in futures:
+          future.result()
+      stopped.set()
+      heartbeat.join()
+      data_tuples_by_id = self._progress.stop()
+      self._num_websites = len(data_tuples_by_id)
+      counts = queue.get_counts()
+      print("Node " + node_id + " finished after scraping " + str(self._num_websites) + " school course pages (" + \
+        str(counts['done']) + " completed and " + str(counts['failed']) + " failed across all nodes).")
+      self._end_run(data_tuples_by_id)
+    finally:
+      stopped.set()
+      queue.close()
+      self._external_ids.close()
+      self._run_log.close()
+      self._stop_logging()
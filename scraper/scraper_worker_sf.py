@@ -1,8 +1,9 @@
 from traceback import format_exc
+from sys import exc_info
 from os import environ
 from datetime import datetime
-from uuid import NAMESPACE_URL, uuid5
 import time
+import logging
 import concurrent.futures
 
 from selenium import webdriver
@@ -13,9 +14,15 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 
-from simple_salesforce import Salesforce
 from simple_salesforce.exceptions import SalesforceError, SalesforceMalformedRequest
 
+from sf_client import create_salesforce
+
+from rate_limiter import AdaptiveRateLimiter
+from records import School, Course
+from external_ids import ExternalIdService
+from stage_timer import StageTimer
+
 class ScraperWorker:
   """ 
   Summary:
@@ -34,12 +41,39 @@ class ScraperWorker:
   #################################### METHODS FOR CREATING SCRAPERWORKER OBJECTS #####################################
   #####################################################################################################################
 
-  def __init__(self):
+  def __init__(self, page_rate_limiter=None, sf_rate_limiter=None, stage_timer=None, website_address=None,
+    sf_options=None, run_log=None, staging_writer=None, last_modified_sf=None, external_ids=None):
     """ 
     Summary:
         Initializes a ScraperWorker object. This instantiates a new headless Chrome window instance where future
         actions involving scraping will occur.
 
+    Args:
+        page_rate_limiter (AdaptiveRateLimiter, optional): The rate limiter shared by all workers for loading pages
+                                                           from the A-G Course List website. Defaults to None, which
+                                                           creates a rate limiter private to this worker.
+        sf_rate_limiter (AdaptiveRateLimiter, optional): The rate limiter shared by all workers for calls to the
+                                                         Salesforce API. Defaults to None, which creates a rate limiter
+                                                         private to this worker.
+        stage_timer (StageTimer, optional): The timer shared by all workers for collecting per-stage timings. Defaults
+                                            to None, which creates a disabled timer.
+        website_address (string, optional): The partially complete address of a listing of the A-G Course List
+                                            website. Defaults to None, which corresponds with the live website.
+        sf_options (dict, optional): Keyword arguments used to create the Salesforce instance. Defaults to None, which
+                                     authenticates with the credentials found in environment variables.
+        run_log (RunLog, optional): The JSON Lines log shared by all workers, to which errors, skipped schools, and
+                                    per-school summaries are written. Defaults to None, in which case they are only
+                                    logged through the logging module.
+        staging_writer (StagingWriter, optional): The staging area to which scraped schools and courses are written
+                                                  instead of Salesforce. Defaults to None, in which case they are
+                                                  upserted into Salesforce while scraping.
+        last_modified_sf (dict, optional): Maps each website ID to the most recent date of change of its school on
+                                           Salesforce, used to skip recently scraped schools while staging. Defaults to
+                                           None.
+        external_ids (ExternalIdService, optional): The service shared by all workers for issuing the external IDs of
+                                                    courses. Defaults to None, which creates a service private to this
+                                                    worker that does not persist any IDs.
+
     Fields:
         _driver (WebDriver): The WebDriver object representing the current webpage that is being scraped. Essential to
                             nearly every operation relating to extracting information from a webpage.
@@ -54,28 +88,45 @@ class ScraperWorker:
                                  School object.
         _course_error_ids (list): Contains the website IDs of all pages that experienced an error while creating a
                                  Course object.
-        _error_output (string): A summary of the errors that occurred while scraping the school course page.
-        _sf (Salesforce): The Salesforce instance that corresponds to The Village Method's backend database. This field
-                          sources authentication information (username, password, security token) from environment
-                          variables, which must be set appropriately before running this scraper.
-        _NAMESPACE: The UUID namespace which Course external ID fields use to determine their UUIDs. This field is
-                    dynamically set in the _parse_school method based on the website URL.
+        _run_log (RunLog): The JSON Lines log to which errors, skipped schools, and per-school summaries are written,
+                           or None.
+        _logger (LoggerAdapter): Logs the progress and errors of this worker, tagged with the website ID currently being
+                                 scraped.
+        _sf_options (dict): Keyword arguments used to create the Salesforce instance, or None.
+        _sf (Salesforce): The Salesforce instance that corresponds to The Village Method's backend database, which is
+                          only created once it is first needed (see _get_sf), so that a worker writing to a staging
+                          area never connects to Salesforce.
+        _staging_writer (StagingWriter): The staging area to which scraped schools and courses are written, or None.
+        _last_modified_sf (dict): Maps each website ID to the most recent date of change of its school on Salesforce,
+                                  or None.
+        _page_rate_limiter (AdaptiveRateLimiter): Throttles the rate at which pages are loaded from the A-G Course
+                                                  List website.
+        _sf_rate_limiter (AdaptiveRateLimiter): Throttles the rate at which calls are made to the Salesforce API.
+        _stage_timer (StageTimer): Collects the time spent in each stage of scraping (driver startup, page loads, waits,
+                                   year probing, course clicks, and Salesforce queries/upserts).
+        _external_ids (ExternalIdService): Issues the external ID of each course.
     """
+    self._stage_timer = stage_timer if stage_timer else StageTimer()
     # Initializes the webdriver object, installing ChromeDriver if necessary
-    self._driver = self._create_driver()
+    with self._stage_timer.time("driver_startup"):
+      self._driver = self._create_driver()
     # Initializes remaining fields
-    self._website_address = "https://hs-articulation.ucop.edu/agcourselist/institution/"
+    self._website_address = website_address if website_address else \
+      "https://hs-articulation.ucop.edu/agcourselist/institution/"
     self._schools = []
     self._num_courses = []
     self._invalid_ids = []
     self._school_error_ids = []
     self._course_error_ids = []
-    self._error_output = ""
-    self._sf = Salesforce(username=environ.get('SF_USERNAME'), password=environ.get('SF_PASSWORD'), 
-                          security_token=environ.get('SF_TOKEN'), domain='test')
-
-    # This field is dynamically set in _parse_school depending on the website URL
-    self._NAMESPACE = None
+    self._run_log = run_log
+    self._logger = logging.LoggerAdapter(logging.getLogger("scraper.worker"), {'website_id': "-"})
+    self._sf_options = sf_options
+    self._sf = None
+    self._staging_writer = staging_writer
+    self._last_modified_sf = last_modified_sf
+    self._page_rate_limiter = page_rate_limiter if page_rate_limiter else AdaptiveRateLimiter()
+    self._sf_rate_limiter = sf_rate_limiter if sf_rate_limiter else AdaptiveRateLimiter(rate=5.0, max_rate=25.0)
+    self._external_ids = external_ids if external_ids else ExternalIdService()
   
   def _create_driver(self, cache_valid_range=7):
     """ 
@@ -137,13 +188,52 @@ class ScraperWorker:
     Returns:
         WebElement: the element on the page that was searched for and identified.
     """
-    return WebDriverWait(self._driver, wait_time, poll_frequency=1).until(wait_tactic((search_tactic,
-                         search_tactic_specifier)))
+    with self._stage_timer.time("wait"):
+      return WebDriverWait(self._driver, wait_time, poll_frequency=1).until(wait_tactic((search_tactic,
+                           search_tactic_specifier)))
+
+  def _get_sf(self):
+    """
+    Summary:
+        Returns the Salesforce instance of this worker, creating it on first use.
+
+    Returns:
+        Salesforce: The Salesforce instance that corresponds to The Village Method's backend database.
+    """
+    if self._sf is None:
+      self._sf = create_salesforce(self._sf_options)
+    return self._sf
+
+  def _write_run_log(self, record_type, **fields):
+    """
+    Summary:
+        Writes a record about the school currently being scraped to the JSON Lines run log, if there is one.
+
+    Args:
+        record_type (string): The type of the record, such as "error", "skip", or "school".
+        **fields: The remaining fields of the record.
+    """
+    if self._run_log:
+      self._run_log.write(record_type, website_id=self._logger.extra['website_id'], **fields)
+
+  def _record_error(self, error_string):
+    """
+    Summary:
+        Records an error that occurred while scraping, along with the traceback of the exception currently being
+        handled (if any), in both the run log and the log.
+
+    Args:
+        error_string (string): A description of the error.
+    """
+    traceback = format_exc() if exc_info()[0] else None
+    self._write_run_log("error", message=error_string, traceback=traceback)
+    self._logger.warning(error_string, exc_info=traceback is not None)
 
   def _load_webpage(self, address, website_id, academic_id=None):
     """
     Summary:
-        Attempts to load the webpage with the specified address, catching any related WebDriver exceptions.
+        Attempts to load the webpage with the specified address, catching any related WebDriver exceptions. Pages are
+        loaded through the shared page rate limiter, and a page that fails to load marks the school for a retry.
 
     Args:
         address (string): The address of the webpage to load via the WebDriver.
@@ -153,15 +243,18 @@ class ScraperWorker:
                                      which corresponds with the most recent year of courses.
     """
     try:
-      if academic_id == None:
-        self._driver.get(address)
-      else:
-        # Add the academic ID to the end of the address to get the proper year
-        self._driver.get(address + ";academicYearId=" + str(academic_id))
+      self._stage_timer.count("page_loads")
+      with self._page_rate_limiter.limit(), self._stage_timer.time("page_load"):
+        if academic_id == None:
+          self._driver.get(address)
+        else:
+          # Add the academic ID to the end of the address to get the proper year
+          self._driver.get(address + ";academicYearId=" + str(academic_id))
     except WebDriverException:
       error_string = "Could not open school course page properly (ID: " + str(website_id) + ")"
-      error_message = format_exc()
-      self._error_output += error_string + "\n" + error_message + "\n"
+      self._record_error(error_string)
+      if not website_id in self._school_error_ids:
+        self._school_error_ids.append(website_id)
       return
 
   #####################################################################################################################
@@ -195,9 +288,10 @@ class ScraperWorker:
       if last_updated and last_updated_sf and last_updated_sf >= last_updated:
         last_updated_string = str(last_updated).partition(" ")[0]
         last_updated_sf_string = str(last_updated_sf).partition(" ")[0]
-        self._error_output += f"This school (Website ID: {website_id}, Academic ID: {academic_id}) was already scraped"
-        self._error_output += f" recently: Last updated on {last_updated_string} versus last modified on Salesforce on"
-        self._error_output += f" {last_updated_sf_string}\n"
+        self._write_run_log("skip", reason="recently_scraped", academic_id=academic_id,
+                            last_updated=last_updated_string, last_modified_sf=last_updated_sf_string)
+        self._logger.info("This school (Academic ID: %s) was already scraped recently: Last updated on %s versus last "
+                          "modified on Salesforce on %s", academic_id, last_updated_string, last_updated_sf_string)
         return True
     return False
 
@@ -240,7 +334,8 @@ class ScraperWorker:
     """
     try:
       # Select the last modified date from Salesforce for the current school
-      query = self._sf.query(f"SELECT LastModifiedDate FROM HighSchool__c WHERE School_ID__c = '{school_id}'")
+      with self._sf_rate_limiter.limit(), self._stage_timer.time("sf_query"):
+        query = self._get_sf().query(f"SELECT LastModifiedDate FROM HighSchool__c WHERE School_ID__c = '{school_id}'")
       if query['records']:
         lmd_string = query['records'][0]['LastModifiedDate']
         date_string_dashes = lmd_string.partition('T')[0]
@@ -251,8 +346,7 @@ class ScraperWorker:
     except SalesforceError:
       error_string = f"""An error occurred while obtaining the most recent date of change for school with Salesforce ID
                          {school_id}."""
-      error_message = format_exc()
-      self._error_output += error_string + "\n" + error_message + "\n"
+      self._record_error(error_string)
       return None
 
   #####################################################################################################################
@@ -475,8 +569,7 @@ class ScraperWorker:
   def _create_course(self, course_div, subject, course_title, school_sf_id):
     """ 
     Summary:
-        Creates and returns a dictionary representing a Course by obtaining all relevant data from an A-G school course
-        list page.
+        Creates and returns a Course object by obtaining all relevant data from an A-G school course list page.
 
     Args:
         course_div (WebElement): The WebElement object containing the relevant course information. This should be a div
@@ -486,32 +579,24 @@ class ScraperWorker:
         school_sf_id (string): The unique Salesforce ID of the school that the course to be created belongs to.
 
     Returns:
-        dict: The newly initialized Course object, in dictionary form.
-    """
-    # Gets all relevant course information
-    expanded_course_div = self._get_expanded_course_div(course_div)
-    is_honors = self._get_is_honors(expanded_course_div)
-    provider = self._get_provider(expanded_course_div)
-    academic_years = self._get_academic_years(expanded_course_div)
-    grade_levels = self._get_grade_levels(expanded_course_div)
-    course_length = self._get_course_length(expanded_course_div)
-    transcript_abbs = self._get_transcript_abbs(expanded_course_div)
-    ag_designation = self._get_ag_designation(expanded_course_div)
-
-    # Clicks on the close button using JS to avoid width errors, and to prevent access to already scraped courses
-    self._driver.execute_script("arguments[0].click();", expanded_course_div.find_element_by_xpath(".//a"))
-    return {
-        'Name': course_title,
-        'High_School__c': school_sf_id, 
-        'Academic_Years__c': ";".join(academic_years),
-        'Is_Honors__c': is_honors,
-        'Provider__c': provider,
-        'Grade_Levels__c': ";".join(grade_levels),
-        'Course_Length__c': course_length,
-        'Transcript_Abbs__c': ";".join(transcript_abbs),
-        'Subject__c': subject,
-        'AG_Designation__c': ag_designation
-    }
+        Course: The newly initialized Course object.
+    """
+    with self._stage_timer.time("course_click"):
+      # Gets all relevant course information
+      expanded_course_div = self._get_expanded_course_div(course_div)
+      is_honors = self._get_is_honors(expanded_course_div)
+      provider = self._get_provider(expanded_course_div)
+      academic_years = self._get_academic_years(expanded_course_div)
+      grade_levels = self._get_grade_levels(expanded_course_div)
+      course_length = self._get_course_length(expanded_course_div)
+      transcript_abbs = self._get_transcript_abbs(expanded_course_div)
+      ag_designation = self._get_ag_designation(expanded_course_div)
+
+      # Clicks on the close button using JS to avoid width errors, and to prevent access to already scraped courses
+      self._driver.execute_script("arguments[0].click();", expanded_course_div.find_element_by_xpath(".//a"))
+    self._stage_timer.count("courses_scraped")
+    return Course(course_title, school_sf_id, academic_years, is_honors, provider, grade_levels, course_length,
+                  transcript_abbs, subject, ag_designation)
 
   def _is_in_courses(self, courses, course_title):
     """
@@ -519,14 +604,14 @@ class ScraperWorker:
         Helper method that checks to see if the course with the specified title is in the specified list of courses.
 
     Args:
-        courses (list): The list of courses (dictionary representations) that should be checked.
+        courses (list): The list of Course objects that should be checked.
         course_title (string): The title of the course that should be checked for existence.
 
     Returns:
         bool: True if the course exists in courses, False otherwise.
     """
     for course in courses:
-      if course['Name'] == course_title:
+      if course.name == course_title:
         return True
     return False
 
@@ -534,8 +619,8 @@ class ScraperWorker:
     """
     Summary:
         Parses all courses for the current school course page. In this case, parsing includes sourcing data from the
-        A-G course list website, serializing that data into a dictionary representation, and adding those
-        representations to a list, which is returned.
+        A-G course list website, storing that data in a Course object, and adding those objects to a list, which is
+        returned.
 
     Args:
         school_id (string): The unique A-G identifier used to differentiate different schools.
@@ -548,17 +633,18 @@ class ScraperWorker:
                                  updated.
 
     Returns:
-        list: A list of dictionary course representations that are to be serialized into Salesforce.
+        list: A list of Course objects that are to be serialized into Salesforce.
     """
     courses = []
     # Obtain the valid academic year ids for this webpage
-    academic_year_ids = self._get_academic_year_ids(website_id, years)
+    with self._stage_timer.time("year_probe"):
+      academic_year_ids = self._get_academic_year_ids(website_id, years)
     for academic_id in academic_year_ids:
       # Load the webpage with the current academic ID
       self._load_webpage(self._website_address + str(website_id), website_id, academic_id=academic_id)
       # Only rescrape data if the course has not been recently scraped
       if not self._recently_scraped(website_id, academic_id, last_updated_sf, force_rescraping):
-        # Go through the course divs and create a new course dictionary for each one
+        # Go through the course divs and create a new Course object for each one
         for course_div in self._get_course_divs():
           course_title = self._get_course_title(course_div)
           course_subject = self._get_subject(course_div)
@@ -568,8 +654,7 @@ class ScraperWorker:
               courses.append(self._create_course(course_div, course_subject, course_title, school_sf_id))
           except WebDriverException:
             error_string = "There was an error creating a course (ID: " + str(website_id) + "):"
-            error_message = format_exc()
-            self._error_output += error_string + "\n" + error_message + "\n"
+            self._record_error(error_string)
             if not website_id in self._course_error_ids:
               self._course_error_ids.append(website_id)
             continue
@@ -693,25 +778,31 @@ class ScraperWorker:
                                  updated.
 
     Returns:
-        School: The newly initialized School object, in dictionary representation.
+        School: The newly initialized School object.
     """
     # Gets all remaining information necessary to create the School object
     school_name = self._get_school_name()
     city, state = self._get_location_tuple()
 
-    # Create the dictionary representation of the School object
-    new_school = {
-        'Name': school_name,
-        'Website_ID__c': website_id,
-        'City__c': city,
-        'State__c': state,
-        'Institution_Type__c': institution_type
-    }
+    # Create the School object, which is only converted into its Salesforce payload when it is serialized
+    new_school = School(school_name, website_id, city, state, institution_type)
+
+    if self._staging_writer:
+      # Stage the school and its courses, which are loaded into Salesforce separately
+      if not school_id:
+        return
+      last_updated_sf = self._last_modified_sf.get(website_id) if self._last_modified_sf else None
+      courses_to_add = self._parse_courses(school_id, website_id, years, None, last_updated_sf, force_rescraping)
+      staged_courses = [dict(course.to_sf_dict(), External_ID__c=self._get_uuid_of_course(website_id, course.name))
+                        for course in courses_to_add]
+      self._staging_writer.write_school(website_id, school_id, new_school.to_sf_dict(), staged_courses)
+      self._num_courses.append(len(courses_to_add))
+      return new_school
 
     # Check to see if the school needs to be scraped
     last_updated_sf = self._get_last_updated_sf(school_id)
     # Create or update school on Salesforce database
-    if not self._upsert_school(school_id, new_school):
+    if not self._upsert_school(school_id, new_school.to_sf_dict()):
       return
 
     # Obtain the courses to serialize into Salesforce
@@ -720,12 +811,11 @@ class ScraperWorker:
     # Loop through the courses and attempt to serialize each one
     for course in courses_to_add:
       try:
-        external_id = self._get_uuid_of_course(course['Name'])
-        self._upsert_sf_course(external_id, course)
+        external_id = self._get_uuid_of_course(website_id, course.name)
+        self._upsert_sf_course(external_id, course.to_sf_dict(), website_id)
       except SalesforceError:
         error_string = "An error occurred while serializing a Course object in Salesforce:"
-        error_message = format_exc()
-        self._error_output += error_string + "\n" + error_message + "\n"
+        self._record_error(error_string)
         continue
 
     # Appends the length of the courses list to num_courses to keep track of the average number of courses
@@ -746,8 +836,6 @@ class ScraperWorker:
         force_rescraping (bool): Specifies whether the scraper should rescrape data which has not been recently
                                  updated.
     """
-    # Save the namespace for this website, which is a hash linked to the address of the webpage
-    self._NAMESPACE = uuid5(NAMESPACE_URL, address)
     # Try to load the webpage
     self._load_webpage(address, website_id)
     # Ensure that the webpage is valid by checking to see if it has a valid institution type
@@ -794,7 +882,8 @@ class ScraperWorker:
     """
     if not school_id:
       return False
-    self._sf.HighSchool__c.upsert(f'School_ID__c/{school_id}', data)
+    with self._sf_rate_limiter.limit(), self._stage_timer.time("sf_upsert"):
+      self._get_sf().HighSchool__c.upsert(f'School_ID__c/{school_id}', data)
     return True
 
   def _get_sf_high_school_id(self, school_id):
@@ -809,41 +898,47 @@ class ScraperWorker:
     Returns:
         string: The Salesforce ID for the high school with specified school ID.
     """
-    query = self._sf.query(f"SELECT Id FROM HighSchool__c WHERE School_ID__c = '{school_id}'")
+    with self._sf_rate_limiter.limit(), self._stage_timer.time("sf_query"):
+      query = self._get_sf().query(f"SELECT Id FROM HighSchool__c WHERE School_ID__c = '{school_id}'")
     return self._get_property_from_query('Id', query)
 
-  def _upsert_sf_course(self, external_id, data):
+  def _upsert_sf_course(self, external_id, data, website_id):
     """
     Summary:
-        Updates an existing Course instance on Salesforce, or inserts a new instance if no such instance is found.
+        Updates an existing Course instance on Salesforce, or inserts a new instance if no such instance is found. A
+        course that fails to upsert marks its school for a retry.
 
     Args:
         external_id (string): The external UUID generated by self.NAMESPACE for each course.
         data (dict): The Course object dictionary representation containing data to update the course with.
+        website_id (int): The unique 3-4 digit ID used by the A-G course list website to identify institutions.
     """
     try:
-      getattr(self._sf, "Course__c").upsert(f'External_ID__c/{external_id}', data)
+      with self._sf_rate_limiter.limit(), self._stage_timer.time("sf_upsert"):
+        getattr(self._get_sf(), "Course__c").upsert(f'External_ID__c/{external_id}', data)
     except SalesforceError:
       error_string = f"A SalesforceError occurred while upserting course with ID {external_id}"
-      error_message = format_exc()
-      self._error_output += error_string + "\n" + error_message + "\n"
+      self._record_error(error_string)
+      if not website_id in self._course_error_ids:
+        self._course_error_ids.append(website_id)
 
-  def _get_uuid_of_course(self, course_name):
+  def _get_uuid_of_course(self, website_id, course_name):
     """
     Summary:
-        Generates a deterministic UUID for any course based on the course's name and the URL of the school page. Since
-        the URL namespace is determined dynamically when the scraper begins to run, a UUID can be generated using this
-        namespace and the course name.
+        Returns the deterministic UUID of a course, based on the course's name and the address of its school page on
+        the live A-G Course List website. IDs are looked up in the shared ExternalIdService, so the UUID of a course
+        that has been seen before is not generated again.
         Note: This function assumes that a course's name will be unique within the scope of its school - if this is not
         the case, there may be an error while upserting a course with a matching name.
 
     Args:
+        website_id (int): The unique 3-4 digit ID used by the A-G course list website to identify institutions.
         course_name (string): The name of the course for which a UUID should be determined.
 
     Returns:
         string: The UUID for the specified course.
     """
-    return str(uuid5(self._NAMESPACE, course_name))
+    return self._external_ids.get(website_id, course_name)
 
   #####################################################################################################################
   ################################## PRIVATE METHODS FOR OBTAINING YEAR INFORMATION ###################################
@@ -861,8 +956,7 @@ class ScraperWorker:
       return self._wait("//div[@class='gridButtonMain']")
     except TimeoutException:
       error_string = "There was an error accessing the buttons div:"
-      error_message = format_exc()
-      self._error_output += error_string + "\n" + error_message + "\n"
+      self._record_error(error_string)
       return None
 
   def _get_active_button(self):
@@ -889,8 +983,7 @@ class ScraperWorker:
         return None
     except NoSuchElementException:
       error_string = "There was an error accessing the active button:"
-      error_message = format_exc()
-      self._error_output += error_string + "\n" + error_message + "\n"
+      self._record_error(error_string)
       return None
 
   def _get_valid_academic_year_ids(self, website_id, years, first_academic_id, first_active_button_text):
@@ -946,7 +1039,7 @@ class ScraperWorker:
     if first_active_button:
       self._driver.execute_script("arguments[0].click();", first_active_button)
     else:
-      self._error_output += "\nFirst active button was not found properly (ID " + str(website_id) + ")\n"
+      self._record_error("First active button was not found properly (ID " + str(website_id) + ")")
       return []
 
     # Extract academic ID from link and save, get range of academic IDs based on the value of years
@@ -973,20 +1066,57 @@ class ScraperWorker:
 
     Returns:
         tuple: A tuple containing each of the relevant data fields for client use. Follows the format specified below:
-               (schools, error_output, num_courses, invalid_ids, school_error_ids, course_error_ids).
-               Reference the constructor for descriptions of each field.
+               (schools, num_courses, invalid_ids, school_error_ids, course_error_ids).
+               Reference the constructor for descriptions of each field. Error messages are written to the run log.
     """
+    self._logger.extra['website_id'] = website_id
+    self._logger.info("Scraping school course page")
+    start_time = time.time()
     try:
-      self._parse_school(self._website_address + str(website_id), website_id, years, force_rescraping)
-      return (self._schools, self._error_output, self._num_courses, self._invalid_ids, self._school_error_ids,
-        self._course_error_ids)
+      with self._stage_timer.time("school_total"):
+        self._parse_school(self._website_address + str(website_id), website_id, years, force_rescraping)
     except (WebDriverException, SalesforceError):
       error_string = "An error occurred while scraping school with ID " + str(website_id) + "."
-      error_message = format_exc()
-      self._error_output += error_string + "\n" + error_message + "\n"
+      self._record_error(error_string)
       self._school_error_ids.append(website_id)
-      return (self._schools, self._error_output, self._num_courses, self._invalid_ids, self._school_error_ids,
-        self._course_error_ids)
+
+    # Summarize the school in the run log
+    status = "ok"
+    if website_id in self._invalid_ids:
+      status = "invalid"
+    elif website_id in self._school_error_ids or website_id in self._course_error_ids:
+      status = "error"
+    self._write_run_log("school", status=status, num_courses=sum(self._num_courses),
+                        seconds=round(time.time() - start_time, 3))
+    self._logger.info("Finished scraping school course page (%s, %d courses)", status, sum(self._num_courses))
+    return (self._schools, self._num_courses, self._invalid_ids, self._school_error_ids, self._course_error_ids)
+
+  def probe_page(self, website_id):
+    """
+    Summary:
+        Loads only the most recent year of the school course page with the specified ID, returning whether it is a
+        valid institution page and when it was last updated. This skips the year probes, course clicks, and Salesforce
+        calls of run_page, so that a worker can cheaply probe many pages in a row.
+
+    Args:
+        website_id (int): The unique 3-4 digit ID used by the A-G course list website to identify institutions.
+
+    Returns:
+        tuple: A tuple pair containing the status of the page ("ok", "invalid", or "error") and its most recent date
+               of change, or None if the page is not valid or the date is not found.
+    """
+    self._logger.extra['website_id'] = website_id
+    try:
+      with self._stage_timer.time("probe"):
+        self._load_webpage(self._website_address + str(website_id), website_id)
+        if website_id in self._school_error_ids:
+          return ("error", None)
+        if self._get_institution_type() == "":
+          return ("invalid", None)
+        return ("ok", self.get_last_updated())
+    except WebDriverException:
+      self._record_error("An error occurred while probing school with ID " + str(website_id) + ".")
+      return ("error", None)
 
   def close(self):
     """ 
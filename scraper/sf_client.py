@@ -0,0 +1,46 @@
+from os import environ
+from datetime import datetime
+
+from simple_salesforce import Salesforce
+
+def create_salesforce(sf_options=None):
+  """
+  Summary:
+      Creates a Salesforce instance corresponding to The Village Method's backend database.
+
+  Args:
+      sf_options (dict, optional): Keyword arguments used to create the Salesforce instance. Defaults to None, which
+                                   authenticates with the credentials (username, password, security token) found in
+                                   environment variables, which must be set appropriately before running the scraper.
+
+  Returns:
+      Salesforce: The new Salesforce instance.
+  """
+  if sf_options:
+    return Salesforce(**sf_options)
+  return Salesforce(username=environ.get('SF_USERNAME'), password=environ.get('SF_PASSWORD'),
+                    security_token=environ.get('SF_TOKEN'), domain='test')
+
+def get_last_modified_by_website_id(sf):
+  """
+  Summary:
+      Fetches the most recent date of change on the Salesforce database of every school in a single query, rather than
+      one query per school.
+
+  Args:
+      sf (Salesforce): The Salesforce instance to query.
+
+  Returns:
+      dict: Maps each website ID to the most recent date of change of its school on Salesforce.
+  """
+  response = sf.query_all("SELECT Website_ID__c, LastModifiedDate FROM HighSchool__c")
+  last_modified_by_id = {}
+  for record in response['records']:
+    if record.get('Website_ID__c') is None:
+      continue
+    # Number fields are returned as floats by the Salesforce API
+    website_id = int(float(record['Website_ID__c']))
+    last_modified = datetime.strptime(record['LastModifiedDate'].partition('T')[0], '%Y-%m-%d')
+    if website_id not in last_modified_by_id or last_modified > last_modified_by_id[website_id]:
+      last_modified_by_id[website_id] = last_modified
+  return last_modified_by_id
@@ -0,0 +1,183 @@
+from contextlib import nullcontext
+import threading
+import time
+import json
+
+# Shared no-op context manager returned by disabled timers, so that timing a stage costs a single attribute check
+_NULL_CONTEXT = nullcontext()
+
+class _StageContext:
+  """
+  Summary:
+      Context manager that records the time spent in the enclosed block as one sample of a stage.
+  """
+  __slots__ = ("_timer", "_stage", "_start_time")
+
+  def __init__(self, timer, stage):
+    self._timer = timer
+    self._stage = stage
+    self._start_time = None
+
+  def __enter__(self):
+    self._start_time = time.perf_counter()
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self._timer.record(self._stage, time.perf_counter() - self._start_time)
+    return False
+
+class StageTimer:
+  """
+  Summary:
+      A lightweight, thread-safe collection of per-stage timings and counters that can be shared by every
+      ScraperWorker instance in a parallel processing environment. When disabled, timing a stage returns a shared no-op
+      context manager, so instrumented code pays almost nothing.
+      Note: Stages may be nested (for example, "wait" samples are also included in the enclosing "year_probe" sample),
+      so stage totals should not be summed.
+
+  Organization:
+      Tufts Code For Good: The Village Method Project
+  """
+
+  def __init__(self, enabled=False):
+    """
+    Summary:
+        Initializes a StageTimer object.
+
+    Args:
+        enabled (bool, optional): Specifies whether timings and counters should be collected. Defaults to False.
+
+    Fields:
+        _enabled (bool): Specifies whether timings and counters should be collected.
+        _durations (dict): Maps the name of each stage to a list of its durations, in seconds.
+        _counters (dict): Maps the name of each counter to its current value.
+        _lock (Lock): Guards _durations and _counters, as the timer is shared between threads.
+    """
+    self._enabled = enabled
+    self._durations = {}
+    self._counters = {}
+    self._lock = threading.Lock()
+
+  def is_enabled(self):
+    """
+    Summary:
+        Returns whether or not this timer collects timings and counters.
+
+    Returns:
+        bool: True if this timer is enabled, False otherwise.
+    """
+    return self._enabled
+
+  def time(self, stage):
+    """
+    Summary:
+        Returns a context manager that records the time spent in the enclosed block as one sample of the given stage.
+
+    Args:
+        stage (string): The name of the stage being timed.
+
+    Returns:
+        object: The context manager to use in a with statement.
+    """
+    if not self._enabled:
+      return _NULL_CONTEXT
+    return _StageContext(self, stage)
+
+  def record(self, stage, duration):
+    """
+    Summary:
+        Records one sample of the given stage.
+
+    Args:
+        stage (string): The name of the stage being timed.
+        duration (float): The duration of the sample, in seconds.
+    """
+    if not self._enabled:
+      return
+    with self._lock:
+      self._durations.setdefault(stage, []).append(duration)
+
+  def count(self, counter, amount=1):
+    """
+    Summary:
+        Increments the given counter.
+
+    Args:
+        counter (string): The name of the counter to increment.
+        amount (int, optional): The amount to increment the counter by. Defaults to 1.
+    """
+    if not self._enabled:
+      return
+    with self._lock:
+      self._counters[counter] = self._counters.get(counter, 0) + amount
+
+  def _percentile(self, sorted_durations, percent):
+    """
+    Summary:
+        Returns the given percentile of a sorted list of durations using the nearest-rank method.
+
+    Args:
+        sorted_durations (list): A non-empty list of durations, sorted in ascending order.
+        percent (float): The percentile to return, between 0 and 100.
+
+    Returns:
+        float: The duration at the given percentile.
+    """
+    rank = max(1, int(-(-percent * len(sorted_durations) // 100)))
+    return sorted_durations[rank - 1]
+
+  def get_summary(self):
+    """
+    Summary:
+        Returns a histogram summary (count, total, p50, p95, max) of every stage, along with the value of every
+        counter.
+
+    Returns:
+        dict: A dictionary of the form {"stages": {stage: {...}}, "counters": {counter: value}}.
+    """
+    with self._lock:
+      durations = {stage: sorted(samples) for stage, samples in self._durations.items()}
+      counters = dict(self._counters)
+
+    stages = {}
+    for stage, samples in sorted(durations.items()):
+      stages[stage] = {
+          'count': len(samples),
+          'total': sum(samples),
+          'p50': self._percentile(samples, 50),
+          'p95': self._percentile(samples, 95),
+          'max': samples[-1]
+      }
+    return {'stages': stages, 'counters': counters}
+
+  def get_summary_str(self):
+    """
+    Summary:
+        Returns the string representation of the per-stage histograms and counters for use in the .txt debug file.
+
+    Returns:
+        string: The formatted table of stage timings, followed by the value of every counter.
+    """
+    summary = self.get_summary()
+    summary_str = "{:<16}{:>8}{:>12}{:>10}{:>10}{:>10}\n".format("Stage", "Count", "Total (s)", "p50 (s)", "p95 (s)",
+                                                                "Max (s)")
+    for stage, histogram in summary['stages'].items():
+      summary_str += "{:<16}{:>8}{:>12.2f}{:>10.3f}{:>10.3f}{:>10.3f}\n".format(stage, histogram['count'],
+        histogram['total'], histogram['p50'], histogram['p95'], histogram['max'])
+    for counter, value in sorted(summary['counters'].items()):
+      summary_str += counter + ": " + str(value) + "\n"
+    return summary_str
+
+  def write_json(self, filepath, metadata=None):
+    """
+    Summary:
+        Exports the per-stage histograms and counters as JSON so that different runs can be compared.
+
+    Args:
+        filepath (string): The path of the JSON file to write.
+        metadata (dict, optional): Additional information about the run (such as the range of website IDs) to include
+                                   under the "run" key. Defaults to None.
+    """
+    summary = self.get_summary()
+    summary['run'] = metadata if metadata else {}
+    with open(filepath, 'w') as f:
+      json.dump(summary, f, indent=2, sort_keys=True)
@@ -0,0 +1,258 @@
+import concurrent.futures
+import threading
+import logging
+import json
+import time
+import os
+
+from sf_client import create_salesforce
+from run_log import RunLog
+
+# The external ID field used to upsert each staged object, which makes loading the same records again idempotent
+EXTERNAL_ID_FIELDS = {
+    'HighSchool__c': "School_ID__c",
+    'Course__c': "External_ID__c"
+}
+
+class StagingWriter:
+  """
+  Summary:
+      Writes the schools and courses scraped during a run to a local staging area instead of Salesforce, so that
+      scraping never waits on (or is lost to) Salesforce. Each school is written to its own JSON Lines file, partitioned
+      by run and website ID ("<staging directory>/<run ID>/<website ID>.jsonl"), with one record per line: the school
+      first, followed by each of its courses. Staged runs are loaded into Salesforce separately by a StagingLoader.
+
+  Organization:
+      Tufts Code For Good: The Village Method Project
+  """
+
+  def __init__(self, staging_directory, run_id):
+    """
+    Summary:
+        Initializes a StagingWriter object, creating the directory of the run if necessary.
+
+    Args:
+        staging_directory (string): The directory containing every staged run.
+        run_id (string): The unique name of the run being staged.
+
+    Fields:
+        _run_directory (string): The directory to which the schools of this run are written.
+    """
+    self._run_directory = os.path.join(staging_directory, run_id)
+    os.makedirs(self._run_directory, exist_ok=True)
+
+  def get_run_directory(self):
+    """
+    Summary:
+        Returns the directory to which the schools of this run are written.
+
+    Returns:
+        string: The directory of the run.
+    """
+    return self._run_directory
+
+  def write_school(self, website_id, school_id, school, courses):
+    """
+    Summary:
+        Stages a school and its courses, replacing any file previously staged for the same website ID (such as by an
+        earlier attempt that failed). The file only appears once it is complete, so a loader never sees a partial file.
+        Courses reference their school by its A-G school ID, since the school has no Salesforce ID until it is loaded.
+
+    Args:
+        website_id (int): The unique 3-4 digit ID used by the A-G course list website to identify institutions.
+        school_id (string): The unique A-G identifier used to differentiate different schools.
+        school (dict): The School object dictionary representation.
+        courses (list): The Course object dictionary representations, each including its External_ID__c.
+    """
+    filepath = os.path.join(self._run_directory, str(website_id) + ".jsonl")
+    temp_filepath = filepath + ".tmp"
+    with open(temp_filepath, 'w', encoding='utf-8') as f:
+      f.write(json.dumps({'object': "HighSchool__c", 'record': dict(school, School_ID__c=school_id)}) + "\n")
+      for course in courses:
+        record = {field: value for field, value in course.items() if field != "High_School__c"}
+        record['High_School__r'] = {'School_ID__c': school_id}
+        f.write(json.dumps({'object': "Course__c", 'record': record}) + "\n")
+    os.replace(temp_filepath, filepath)
+
+class StagingLoader:
+  """
+  Summary:
+      Bulk loads a staged run into Salesforce. Files are loaded in chunks, several chunks at a time, with one Bulk API
+      upsert job for the schools and one for the courses of each chunk. Every record is upserted by its external ID,
+      and each file is marked as loaded once all of its records succeed, so an interrupted or partially failed load can
+      simply be run again: loaded files are skipped, and any file that is loaded twice does not create duplicates.
+
+  Organization:
+      Tufts Code For Good: The Village Method Project
+  """
+
+  def __init__(self, run_directory, sf_options=None, max_workers=2, files_per_chunk=200, batch_size=10000):
+    """
+    Summary:
+        Initializes a StagingLoader object.
+
+    Args:
+        run_directory (string): The directory of the staged run to load.
+        sf_options (dict, optional): Keyword arguments used to create the Salesforce instance of each loading thread.
+                                     Defaults to None, which authenticates with the credentials found in environment
+                                     variables.
+        max_workers (int, optional): The number of chunks to load in parallel. Defaults to 2.
+        files_per_chunk (int, optional): The number of staged files (schools) per chunk. Defaults to 200.
+        batch_size (int, optional): The maximum number of records per Bulk API batch. Defaults to 10000.
+
+    Fields:
+        _run_directory (string): The directory of the staged run to load.
+        _sf_options (dict): Keyword arguments used to create each Salesforce instance, or None.
+        _max_workers (int): The number of chunks to load in parallel.
+        _files_per_chunk (int): The number of staged files per chunk.
+        _batch_size (int): The maximum number of records per Bulk API batch.
+        _local (local): Holds the Salesforce instance of each loading thread.
+        _load_log (RunLog): The JSON Lines log to which every record that fails to load is written.
+        _logger (Logger): Logs the progress of the load.
+    """
+    self._run_directory = run_directory
+    self._sf_options = sf_options
+    self._max_workers = max_workers
+    self._files_per_chunk = files_per_chunk
+    self._batch_size = batch_size
+    self._local = threading.local()
+    self._load_log = None
+    self._logger = logging.getLogger("scraper.staging")
+
+  def _get_sf(self):
+    """
+    Summary:
+        Returns the Salesforce instance of the current thread, creating it if necessary.
+
+    Returns:
+        Salesforce: The Salesforce instance of the current thread.
+    """
+    sf = getattr(self._local, "sf", None)
+    if sf is None:
+      sf = create_salesforce(self._sf_options)
+      self._local.sf = sf
+    return sf
+
+  def _get_pending_files(self):
+    """
+    Summary:
+        Returns the staged files of the run that have not been loaded yet, in website ID order.
+
+    Returns:
+        list: The paths of the staged files to load.
+    """
+    filenames = [filename for filename in os.listdir(self._run_directory) if filename.endswith(".jsonl")
+                 and not filename.startswith("load-log")
+                 and not os.path.exists(os.path.join(self._run_directory, filename[:-len(".jsonl")] + ".loaded"))]
+    filenames.sort(key=lambda filename: int(filename[:-len(".jsonl")]))
+    return [os.path.join(self._run_directory, filename) for filename in filenames]
+
+  def _upsert(self, object_name, records):
+    """
+    Summary:
+        Upserts records of one object with a single Bulk API job, returning whether each record succeeded.
+
+    Args:
+        object_name (string): The API name of the object, such as "Course__c".
+        records (list): The records to upsert.
+
+    Returns:
+        list: The result of each record, in the format returned by the Bulk API.
+    """
+    if not records:
+      return []
+    return getattr(self._get_sf().bulk, object_name).upsert(records, EXTERNAL_ID_FIELDS[object_name],
+                                                            batch_size=self._batch_size)
+
+  def _record_failures(self, filepaths_by_record, records, results, failed_filepaths):
+    """
+    Summary:
+        Writes every record that failed to load to the load log, adding the file it came from to failed_filepaths, and
+        returns the number of records that succeeded.
+
+    Args:
+        filepaths_by_record (list): The path of the file each record came from.
+        records (list): The records that were upserted.
+        results (list): The result of each record, in the format returned by the Bulk API.
+        failed_filepaths (set): The paths of files with at least one record that failed to load.
+
+    Returns:
+        int: The number of records that succeeded.
+    """
+    num_succeeded = 0
+    for filepath, record, result in zip(filepaths_by_record, records, results):
+      if result.get('success'):
+        num_succeeded += 1
+      else:
+        failed_filepaths.add(filepath)
+        self._load_log.write("error", file=os.path.basename(filepath), record=record, errors=result.get('errors'))
+    return num_succeeded
+
+  def _load_chunk(self, filepaths):
+    """
+    Summary:
+        Loads a chunk of staged files: first their schools, then the courses of every school that loaded successfully,
+        so that each course can resolve its school by external ID. Files whose records all succeeded are marked as
+        loaded.
+
+    Args:
+        filepaths (list): The paths of the staged files in the chunk.
+
+    Returns:
+        tuple: A tuple containing the number of schools and courses loaded, and the number of files that failed.
+    """
+    schools, school_filepaths, courses, course_filepaths = [], [], [], []
+    for filepath in filepaths:
+      with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+          staged = json.loads(line)
+          if staged['object'] == "HighSchool__c":
+            schools.append(staged['record'])
+            school_filepaths.append(filepath)
+          else:
+            courses.append(staged['record'])
+            course_filepaths.append(filepath)
+
+    failed_filepaths = set()
+    num_schools = self._record_failures(school_filepaths, schools, self._upsert("HighSchool__c", schools),
+                                        failed_filepaths)
+    # Courses are kept in file order, so that the courses of each school share as few batches as possible, which
+    # avoids lock contention on the school record while batches are processed in parallel
+    course_records = [(filepath, course) for filepath, course in zip(course_filepaths, courses)
+                      if filepath not in failed_filepaths]
+    courses = [course for filepath, course in course_records]
+    course_filepaths = [filepath for filepath, course in course_records]
+    num_courses = self._record_failures(course_filepaths, courses, self._upsert("Course__c", courses), failed_filepaths)
+
+    for filepath in filepaths:
+      if filepath not in failed_filepaths:
+        open(filepath[:-len(".jsonl")] + ".loaded", 'w').close()
+    return (num_schools, num_courses, len(failed_filepaths))
+
+  def load(self):
+    """
+    Summary:
+        Loads every staged file of the run that has not been loaded yet.
+
+    Returns:
+        dict: The number of files pending, schools loaded, courses loaded, and files that failed, along with the time
+              taken in seconds.
+    """
+    start_time = time.time()
+    filepaths = self._get_pending_files()
+    chunks = [filepaths[i:i + self._files_per_chunk] for i in range(0, len(filepaths), self._files_per_chunk)]
+    results = {'files': len(filepaths), 'schools': 0, 'courses': 0, 'failed_files': 0}
+    self._load_log = RunLog(os.path.join(self._run_directory, "load-log-" + str(int(start_time)) + ".jsonl"))
+    try:
+      with concurrent.futures.ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+        for num_schools, num_courses, num_failed in executor.map(self._load_chunk, chunks):
+          results['schools'] += num_schools
+          results['courses'] += num_courses
+          results['failed_files'] += num_failed
+          self._logger.info("Loaded %d schools and %d courses (%d files failed)", num_schools, num_courses,
+                            num_failed)
+      results['seconds'] = round(time.time() - start_time, 3)
+      self._load_log.write("summary", **results)
+    finally:
+      self._load_log.close()
+    return results
@@ -1,7 +1,8 @@
 """
 ASGI config for thevillagemethod project.
 
-It exposes the ASGI callable as a module-level variable named ``application``.
+It exposes the ASGI callable as a module-level variable named ``application``. The list and retrieve endpoints of
+schools and courses are served asynchronously (see api/async_views.py), and every other request by Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
@@ -9,8 +10,13 @@ https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'thevillagemethod.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'thevillagemethod.settings.prod')
 
-application = get_asgi_application()
+# The same setup as django.core.asgi.get_asgi_application, which the handlers below can only be imported after
+django.setup(set_prefix=False)
+
+from api.async_views import AsyncReadApplication, ThreadedASGIHandler
+
+application = AsyncReadApplication(ThreadedASGIHandler())
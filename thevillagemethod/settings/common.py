@@ -29,7 +29,7 @@ INSTALLED_APPS = [
     'corsheaders',
     'rest_framework',
     'salesforce',
-    'api'
+    'api.apps.ApiConfig'
 ]
 
 MIDDLEWARE = [
@@ -81,6 +81,18 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# New and updated passwords are hashed with Argon2, and passwords hashed with PBKDF2 (such as those in
+# test/data/users.json) are transparently rehashed with Argon2 the next time their user logs in. Every hash runs in a
+# bounded thread pool (see api/hashers.py)
+# https://docs.djangoproject.com/en/3.0/topics/auth/passwords/#using-argon2-with-django
+PASSWORD_HASHERS = [
+    'api.hashers.BoundedArgon2PasswordHasher',
+    'api.hashers.BoundedPBKDF2PasswordHasher',
+]
+
+# The number of passwords each process may hash at once, which defaults to the number of CPUs
+PASSWORD_HASHING_WORKERS = os.cpu_count() or 1
+
 #  https://www.django-rest-framework.org/api-guide/renderers/#setting-the-renderers
 DEFAULT_RENDERER_CLASSES = (
     'rest_framework.renderers.JSONRenderer',
@@ -106,6 +118,54 @@ USE_TZ = True
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 STATIC_URL = '/static/'
 
+# Pre-rendered course lists of every school (see the render_school_snapshots command), collected under
+# /static/snapshots/ so that WhiteNoise serves them compressed and with long cache headers
+SCHOOL_SNAPSHOTS_DIR = os.path.join(BASE_DIR, 'snapshots')
+STATICFILES_DIRS = [('snapshots', SCHOOL_SNAPSHOTS_DIR)]
+
+# Specifies whether /api/schoolcourses/<id>/ redirects to the snapshot of the school, when there is one rendered for the
+# current data version. Snapshots are public static files, so enabling this serves the course list of every school
+# without authentication
+SERVE_SCHOOL_SNAPSHOTS = False
+
+# Responses of the read-only endpoints are cached in Postgres, so that invalidating them (see api/caching.py) reaches
+# every web process. Create the tables with `python manage.py createcachetable`
+# https://docs.djangoproject.com/en/3.0/topics/cache/#database-caching
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'api_cache',
+    },
+    # Salesforce query results (see api/salesforce_cache.py) are shared by every process, so that the invalidation by
+    # the invalidate_api_cache command (run in a process of its own) reaches the web processes
+    'salesforce': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'salesforce_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000
+        }
+    }
+}
+
+# The time, in seconds, after which cached responses expire even if the data version has not changed
+API_CACHE_TIMEOUT = 60 * 60 * 24
+
+# The results of Salesforce queries are cached (see api/salesforce_cache.py) in this cache, for the number of seconds
+# given for each model; queries on models that are not listed, or returning more than SALESFORCE_QUERY_CACHE_MAX_ROWS
+# rows, are not cached. The cache must be shared by every process (such as a database or Redis cache), or queries
+# invalidated by another process would keep being served by each process until they time out
+SALESFORCE_QUERY_CACHE = 'salesforce'
+SALESFORCE_QUERY_CACHE_TIMEOUTS = {
+    'api.School': 60 * 60,
+    'api.Course': 60 * 60,
+    'api.UserAccount': 60
+}
+SALESFORCE_QUERY_CACHE_MAX_ROWS = 10000
+
+# The HTTP/2 connections (each carrying many reads at once) and timeout of the async Salesforce reads of each process
+SALESFORCE_HTTP_CONNECTIONS = 10
+SALESFORCE_HTTP_TIMEOUT = 30
+
 # https://github.com/davesque/django-rest-framework-simplejwt#settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=100),
@@ -114,6 +174,9 @@ SIMPLE_JWT = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
+        # Loads the user of every request, so that deactivated users and revoked staff status take effect at once. The
+        # read-only school and course viewsets authenticate from the claims of the token instead (see
+        # api/authentication.py)
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
 
@@ -15,15 +15,21 @@ ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        # Connections are pooled as in production (see api/pooling.py), and checked every time they are reused
+        'ENGINE': 'api.pooled_postgresql',
         'NAME': 'thevillagemethod',
         'USER': 'thevillagemethod',
         'PASSWORD': 'thevillagemethod',
         'HOST': 'localhost',
-        'PORT': '5432'
+        'PORT': '5432',
+        'POOL': {
+            'MAX_SIZE': 4,
+            'HEALTH_CHECK_INTERVAL': 0
+        }
     },
     'salesforce': {
-        'ENGINE': 'salesforce.backend',
+        # The django-salesforce backend, with repeated queries served from a cache (see api/salesforce_cache.py)
+        'ENGINE': 'api.cached_salesforce',
         'CONSUMER_KEY': '3MVG9jBOyAOWY5bX1guqUGLubgfbOz6pig5FWe_DxbQEIpCgJ0EAcO4uGqr9HGvycTLlDEkJwJrfzQqqpRe3R',
         'CONSUMER_SECRET': 'D7D6456030FA54E96D6E2ED786DE953E010B397EA350DD9A1E11E9466A723E64',
         'USER': 'kiran.misner@gmail.com',
@@ -33,5 +39,6 @@ DATABASES = {
 }
 
 DATABASE_ROUTERS = [
+    "api.routers.CacheRouter",
     "salesforce.router.ModelRouter"
 ]
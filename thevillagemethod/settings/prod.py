@@ -23,7 +23,8 @@ ALLOWED_HOSTS = ["the-village-method-app.herokuapp.com"]
 DATABASES = {
     'default': dj_database_url.config(default=os.environ.get('DATABASE_URL'), conn_max_age=600, ssl_require=True),
     'salesforce': {
-        'ENGINE': 'salesforce.backend',
+        # The django-salesforce backend, with repeated queries served from a cache (see api/salesforce_cache.py)
+        'ENGINE': 'api.cached_salesforce',
         'CONSUMER_KEY': os.environ.get('CONSUMER_KEY'),
         'CONSUMER_SECRET': os.environ.get('CONSUMER_SECRET'),
         'USER': os.environ.get('SALESFORCE_USER'),
@@ -33,10 +34,42 @@ DATABASES = {
 }
 
 DATABASE_ROUTERS = [
+    "api.routers.CacheRouter",
     "salesforce.router.ModelRouter"
 ]
 
+# DATABASE_POOL chooses how Postgres connections are shared: "process" (the default) pools them within each worker
+# process (see api/pooling.py), "pgbouncer" expects DATABASE_URL to point at a PgBouncer in transaction pooling mode
+# (such as the one run by the Heroku PgBouncer buildpack), and "none" keeps one persistent connection per thread
+DATABASE_POOL = os.environ.get('DATABASE_POOL', 'process')
+if DATABASE_POOL == 'process':
+    DATABASES['default'].update({
+        'ENGINE': 'api.pooled_postgresql',
+        # Every request gives its connection back to the pool, which replaces connections after MAX_LIFETIME instead
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DATABASE_POOL_SIZE', 10)),
+            'TIMEOUT': 10,
+            'MAX_LIFETIME': 600,
+            'HEALTH_CHECK_INTERVAL': 10
+        }
+    })
+elif DATABASE_POOL == 'pgbouncer':
+    # A transaction may run on a different server connection than the last, so server-side cursors cannot be used
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# With a Redis add-on, Salesforce query results are cached in Redis instead of Postgres, which keeps them shared by
+# every worker process without a database round trip for each cached query
+if os.environ.get('REDIS_URL'):
+    CACHES['salesforce'] = {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL')
+    }
+
 # Uncomment the next line if unable to migrate on Heroku
 # DATABASES['default']['ENGINE'] = 'django.db.backends.postgresql_psycopg2'
 
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+
+# Course list snapshots are rendered during the build (see bin/post_compile) when SERVE_SCHOOL_SNAPSHOTS is "true"
+SERVE_SCHOOL_SNAPSHOTS = os.environ.get('SERVE_SCHOOL_SNAPSHOTS') == 'true'